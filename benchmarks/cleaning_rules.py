@@ -0,0 +1,105 @@
+"""Micro-benchmark: the old rule interpreter vs. ``cleaningApp.rules`` on large payloads.
+
+Run from the repository root::
+
+    python benchmarks/cleaning_rules.py
+"""
+import copy
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from configs.endpoint import SOURCE_SERVICES_CLEAN
+from cleaningApp.rules import clean_content
+
+def interpreted_clean(content_to_save, relative_item_path):
+    """The per-record ``copy()``/``pop()`` interpreter the compiled rules replaced."""
+    if relative_item_path and relative_item_path in SOURCE_SERVICES_CLEAN:
+        rules = SOURCE_SERVICES_CLEAN[relative_item_path]
+        rule_type = rules.get("type")
+
+        if rule_type == "list_of_dicts" and isinstance(content_to_save, list):
+            keys_to_remove = rules.get("keys_to_remove", [])
+            if keys_to_remove:
+                new_list_data = []
+                for record_original in content_to_save:
+                    if isinstance(record_original, dict):
+                        record_copy = record_original.copy()
+                        for key in keys_to_remove:
+                            record_copy.pop(key, None)
+                        new_list_data.append(record_copy)
+                    else:
+                        new_list_data.append(record_original)
+                content_to_save = new_list_data
+
+        elif rule_type == "dict_with_feed" and isinstance(content_to_save, dict):
+            feed_keys_to_remove = rules.get("feed_keys_to_remove", [])
+            if feed_keys_to_remove:
+                main_dict_copy = content_to_save.copy()
+                if 'feed' in main_dict_copy:
+                    feed_content_original = main_dict_copy['feed']
+                    if isinstance(feed_content_original, list):
+                        cleaned_feed_list = []
+                        for feed_item_dict_original in feed_content_original:
+                            if isinstance(feed_item_dict_original, dict):
+                                feed_item_copy = feed_item_dict_original.copy()
+                                for key_to_remove in feed_keys_to_remove:
+                                    feed_item_copy.pop(key_to_remove, None)
+                                cleaned_feed_list.append(feed_item_copy)
+                            else:
+                                cleaned_feed_list.append(feed_item_dict_original)
+                        main_dict_copy['feed'] = cleaned_feed_list
+                    elif isinstance(feed_content_original, dict):
+                        feed_dict_copy = feed_content_original.copy()
+                        for key_to_remove in feed_keys_to_remove:
+                            feed_dict_copy.pop(key_to_remove, None)
+                        main_dict_copy['feed'] = feed_dict_copy
+                content_to_save = main_dict_copy
+    return content_to_save
+
+
+def stock_payload(count):
+    return [
+        {"symbol": f"SYM{i}", "name": f"Company {i} Inc.", "price": 10.0 + i % 500,
+         "exchange": "New York Stock Exchange", "exchangeShortName": "NYSE", "type": "stock"}
+        for i in range(count)
+    ]
+
+def feed_payload(count):
+    return {
+        "items": str(count),
+        "feed": [
+            {"title": f"Headline {i}", "url": f"https://news.example/{i}", "time_published": "20240101T000000",
+             "authors": ["Staff"], "summary": "Rates held steady.", "banner_image": None,
+             "source": "Example", "source_domain": "news.example", "overall_sentiment_score": 0.1}
+            for i in range(count)
+        ],
+    }
+
+def best_of(clean, payload, path, repeat=5):
+    """Fastest of ``repeat`` runs, each on a fresh copy since the compiled rules edit in place."""
+    timings = []
+    for _ in range(repeat):
+        fresh = copy.deepcopy(payload)
+        gc.collect()
+        gc.disable()
+        started = time.perf_counter()
+        clean(fresh, path)
+        timings.append(time.perf_counter() - started)
+        gc.enable()
+    return min(timings)
+
+def bench(path, payload, count):
+    assert clean_content(copy.deepcopy(payload), path) == interpreted_clean(payload, path)
+    old = best_of(interpreted_clean, payload, path)
+    new = best_of(clean_content, payload, path)
+    print(f"{path:<32} {count:>7} records  interpreted {count / old:12,.0f}/s  "
+          f"compiled {count / new:12,.0f}/s  x{old / new:4.1f}")
+
+if __name__ == "__main__":
+    count = 100000
+    bench("/services/v1/finance/stocks", stock_payload(count), count)
+    bench("/services/v1/economy/macro", feed_payload(count), count)
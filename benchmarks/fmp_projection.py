@@ -0,0 +1,52 @@
+"""Micro-benchmark: DRF serializer validation vs. ``financeApp.projection`` on FMP rows.
+
+Run from the repository root::
+
+    python benchmarks/fmp_projection.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import django
+from django.conf import settings
+
+settings.configure(USE_I18N=False)
+django.setup()
+
+from financeApp.projection import project_rows
+from financeApp.serializers import StockDataSerializer, MarketActiveStockSerializer
+
+def stock_rows(count):
+    return [
+        {"symbol": f"SYM{i}", "name": f"Company {i} Inc.", "price": 10.0 + i % 500,
+         "exchange": "New York Stock Exchange", "exchangeShortName": "NYSE", "type": "stock"}
+        for i in range(count)
+    ]
+
+def active_rows(count):
+    return [
+        {"symbol": f"SYM{i}", "name": f"Company {i} Inc.", "change": -1.5,
+         "price": 10.0 + i % 500, "changesPercentage": "-2.75"}
+        for i in range(count)
+    ]
+
+def drf(serializer_class, rows):
+    serializer = serializer_class(data=rows, many=True)
+    serializer.is_valid(raise_exception=True)
+    return serializer.data
+
+def bench(label, serializer_class, rows):
+    assert project_rows(serializer_class, rows) == drf(serializer_class, rows)
+    number = max(1, 20000 // len(rows))
+    drf_time = min(timeit.repeat(lambda: drf(serializer_class, rows), number=number, repeat=3)) / number
+    fast_time = min(timeit.repeat(lambda: project_rows(serializer_class, rows), number=number, repeat=3)) / number
+    print(f"{label:<28} {len(rows):>6} rows  drf {drf_time * 1000:9.3f} ms  "
+          f"projection {fast_time * 1000:8.3f} ms  x{drf_time / fast_time:5.1f}")
+
+if __name__ == "__main__":
+    for count in (100, 10000):
+        bench("StockDataSerializer", StockDataSerializer, stock_rows(count))
+        bench("MarketActiveStockSerializer", MarketActiveStockSerializer, active_rows(count))
@@ -0,0 +1,58 @@
+"""Micro-benchmark: vocabulary vs. hashing TF-IDF features on a synthetic corpus.
+
+Reports time, traced peak memory and how closely the hashed scores track the
+vocabulary scores for a few bucket counts. Run from the repository root::
+
+    python benchmarks/tfidf_hashing.py
+"""
+import os
+import random
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import django
+from django.conf import settings
+
+settings.configure(USE_I18N=False)
+django.setup()
+
+import numpy as np
+from django.test.utils import override_settings
+
+from transformationApp.tfidf import native_row_sums
+
+def corpus(documents, vocabulary, words=40, seed=7):
+    rng = random.Random(seed)
+    # Zipf-like draw: a few frequent market words and a long tail of rare tokens.
+    tokens = [f"tok{i}" for i in range(vocabulary)]
+    weights = [1.0 / (rank + 1) for rank in range(vocabulary)]
+    return [" ".join(rng.choices(tokens, weights, k=words)) for _ in range(documents)]
+
+def peak(function):
+    tracemalloc.start()
+    function()
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak_bytes / 2 ** 20
+
+def bench(label, function, baseline=None):
+    seconds = min(timeit.repeat(function, number=1, repeat=3))
+    scores = function()
+    line = f"{label:<22} {seconds * 1000:9.1f} ms  peak {peak(function):7.1f} MiB"
+    if baseline is not None:
+        line += (f"  max |diff| {np.abs(scores - baseline).max():.2e}"
+                 f"  corr {np.corrcoef(scores, baseline)[0, 1]:.6f}")
+    print(line)
+    return scores
+
+if __name__ == "__main__":
+    for documents, vocabulary in ((5000, 20000), (20000, 200000)):
+        print(f"{documents} documents, {vocabulary} distinct tokens")
+        docs = corpus(documents, vocabulary)
+        baseline = bench("vocabulary", lambda: native_row_sums(docs, features="vocabulary"))
+        for buckets in (2 ** 12, 2 ** 16, 2 ** 20):
+            with override_settings(TRANSFORMATION_HASHING_BUCKETS=buckets):
+                bench(f"hashing 2**{buckets.bit_length() - 1}", lambda: native_row_sums(docs, features="hashing"), baseline)
@@ -0,0 +1,67 @@
+"""Micro-benchmark: the per-row Decimal loop vs. ``transformationApp.scores`` for 100k documents.
+
+Run from the repository root::
+
+    python benchmarks/transformation_scores.py
+"""
+import os
+import random
+import sys
+import time
+from decimal import ROUND_HALF_UP, Decimal, DivisionByZero
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from transformationApp.scores import cents_to_decimals, percentage_change_cents, to_cents
+
+def decimal_loop(row_sums, previous):
+    """The per-row ``quantize`` and Decimal division the vectorized columns replaced."""
+    frequencies, percentages = [], []
+    two_decimal_places = Decimal("0.01")
+    for row_sum, prev_freq in zip(row_sums, previous):
+        frequency = Decimal(str(row_sum)).quantize(two_decimal_places, rounding=ROUND_HALF_UP)
+        percentage = Decimal("0.00")
+        if prev_freq is not None:
+            if prev_freq != Decimal("0.00"):
+                try:
+                    change = ((frequency - prev_freq) / prev_freq) * Decimal("100.0")
+                    percentage = change.quantize(two_decimal_places, rounding=ROUND_HALF_UP)
+                except DivisionByZero:
+                    percentage = Decimal("0.00")
+            elif frequency > Decimal("0.00"):
+                percentage = Decimal("100.00")
+        frequencies.append(frequency)
+        percentages.append(percentage)
+    return frequencies, percentages
+
+def aligned_previous(previous):
+    has_previous = np.array([prev is not None for prev in previous], dtype=bool)
+    previous_cents = np.array([int(prev * 100) if prev is not None else 0 for prev in previous], dtype=np.int64)
+    return previous_cents, has_previous
+
+def vectorized(row_sums, previous_cents, has_previous):
+    frequency_cents = to_cents(row_sums)
+    percentage_cents = percentage_change_cents(frequency_cents, previous_cents, has_previous)
+    return frequency_cents, percentage_cents
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+if __name__ == "__main__":
+    rng = random.Random(11)
+    count = 100000
+    row_sums = np.array([rng.uniform(0, 12) for _ in range(count)])
+    previous = [None if rng.random() < 0.2 else Decimal(rng.randrange(0, 1200)).scaleb(-2) for _ in range(count)]
+
+    legacy, legacy_time = timed(decimal_loop, row_sums, previous)
+    (previous_cents, has_previous), lookup_time = timed(aligned_previous, previous)
+    cents, vector_time = timed(vectorized, row_sums, previous_cents, has_previous)
+    decimals, boundary_time = timed(lambda: (cents_to_decimals(cents[0]), cents_to_decimals(cents[1])))
+    assert decimals == legacy
+    print(f"{count} documents  decimal loop {legacy_time * 1000:8.1f} ms  "
+          f"previous lookup {lookup_time * 1000:6.1f} ms  vectorized {vector_time * 1000:6.1f} ms  "
+          f"Decimal boundary {boundary_time * 1000:6.1f} ms")
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cleaningApp', '0002_alter_cleaningdata_createdat_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cleaningdata',
+            name='sourceHash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
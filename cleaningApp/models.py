@@ -6,6 +6,9 @@ class CleaningData(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     content = models.JSONField()
     source = models.URLField(unique=True, db_index=True)
+    # contentHash of the IngestionData snapshot this row was cleaned from.
+    sourceHash = models.CharField(max_length=64, blank=True, default='')
+    batchId = models.UUIDField(null=True, blank=True, db_index=True)
     createdAt = models.DateTimeField(default=now, db_index=True)
     updatedAt = models.DateTimeField(default=now, db_index=True)
 
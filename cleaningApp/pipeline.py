@@ -0,0 +1,180 @@
+from urllib.parse import urlparse
+from django.conf import settings
+from django.db import transaction
+from django.utils.timezone import now
+from cleaningApp.models import CleaningData
+from cleaningApp.rules import clean_content
+from cleaningApp.sql import sql_backend_enabled, upsert_cleaned_sql
+from configs.endpoint import SOURCE_SERVICES_TARGET
+from ingestionApp.models import IngestionData
+from pipelineApp.watermarks import advance_watermark, read_from
+
+WATERMARK_STAGE = "cleaning"
+
+def source_path(source_url):
+    """Relative service path of a stored source, whatever host it was ingested under."""
+    return urlparse(source_url).path if source_url else None
+
+def cleaning_chunk_size():
+    return getattr(settings, 'PIPELINE_CHUNK_SIZE', 500)
+
+def latest_ingestion_refs(queryset, targets=None, chunk_size=None):
+    """Newest row per target source path in ``queryset``, without loading any content.
+
+    Only ``id, source, createdAt, batchId, contentHash`` are streamed, newest
+    first, through a server-side cursor ``chunk_size`` rows at a time, and the
+    scan stops once every target has been seen, so memory stays bounded by the
+    number of targets whatever the size of the backlog.
+    """
+    targets = set(SOURCE_SERVICES_TARGET if targets is None else targets)
+    chunk_size = chunk_size or cleaning_chunk_size()
+    paths = {}
+    refs = {}
+    rows = (
+        queryset.order_by('-createdAt', '-id')
+        .values_list('id', 'source', 'createdAt', 'batchId', 'contentHash', named=True)
+        .iterator(chunk_size=chunk_size)
+    )
+    for ref in rows:
+        path = paths.get(ref.source)
+        if path is None:
+            path = paths[ref.source] = source_path(ref.source)
+        if path in targets and path not in refs:
+            refs[path] = ref
+            if len(refs) == len(targets):
+                break
+    return list(refs.values())
+
+def ingestion_window(batch_id=None, since=None, until=None):
+    """IngestionData rows of ``batch_id``, or created after ``since`` and up to ``until``."""
+    queryset = IngestionData.objects.all()
+    if batch_id:
+        return queryset.filter(batchId=batch_id)
+    if since is not None:
+        queryset = queryset.filter(createdAt__gt=since)
+    if until is not None:
+        queryset = queryset.filter(createdAt__lte=until)
+    return queryset
+
+def iter_ingestion_contents(refs, chunk_size=None):
+    """Yield ``(ref, content)`` for ``refs``, fetching ``chunk_size`` contents per query."""
+    chunk_size = chunk_size or cleaning_chunk_size()
+    for start in range(0, len(refs), chunk_size):
+        chunk = refs[start:start + chunk_size]
+        contents = dict(IngestionData.objects.filter(pk__in=[ref.id for ref in chunk]).values_list('id', 'content'))
+        for ref in chunk:
+            yield ref, contents[ref.id]
+
+def upsert_batch_size():
+    return getattr(settings, 'PIPELINE_UPSERT_BATCH_SIZE', 500)
+
+def write_cleaned(objects, batch_id, batch_size=None):
+    """Upsert cleaned payloads on ``source`` with one INSERT ... ON CONFLICT per ``batch_size`` rows.
+
+    ``createdAt`` and ``id`` are only set on insert; updates touch content,
+    hash, batch and ``updatedAt``.
+    """
+    if not objects:
+        return
+    current_time = now()
+    CleaningData.objects.bulk_create(
+        [
+            CleaningData(
+                source=obj_data['source'],
+                content=obj_data['content'],
+                sourceHash=obj_data['sourceHash'],
+                batchId=batch_id,
+                createdAt=current_time,
+                updatedAt=current_time,
+            )
+            for obj_data in objects
+        ],
+        batch_size=batch_size or upsert_batch_size(),
+        update_conflicts=True,
+        unique_fields=['source'],
+        update_fields=['content', 'sourceHash', 'batchId', 'updatedAt'],
+    )
+
+def run_cleaning(targets=None, force=False, batch_id=None, since=None, until=None, chunk_size=None, upsert_batch_size=None):
+    """Clean the newest ingested snapshot of every target source and upsert it into CleaningData.
+
+    With ``batch_id`` only the rows of that ingestion batch are read. Otherwise
+    only rows created after ``since`` (default: the stage watermark, i.e. the
+    newest row a previous run read, minus ``PIPELINE_WATERMARK_OVERLAP``) and
+    up to ``until`` are read, newest per source, so a steady-state run costs
+    what was ingested since the last one; rows of the overlap that were
+    already cleaned hash the same and are skipped.
+    ``force`` ignores the watermark and also re-cleans sources whose snapshot
+    hashes the same as the one their CleaningData row was built from.
+
+    IngestionData is streamed rather than materialized: the newest row per
+    source is picked from narrow rows (see ``latest_ingestion_refs``), then
+    contents are loaded, cleaned and written ``chunk_size`` sources at a time
+    (``PIPELINE_CHUNK_SIZE`` by default), each chunk as bulk upserts of
+    ``upsert_batch_size`` rows (``PIPELINE_UPSERT_BATCH_SIZE``). With
+    ``PIPELINE_CLEANING_BACKEND = "postgres"`` on PostgreSQL each chunk is
+    cleaned and upserted inside the database instead (see
+    ``cleaningApp.sql``). Returns a dict
+    with the ``batch_id``, the ``cleaned`` queryset of the sources that were
+    written, the ``unchanged`` source URLs that were skipped and the
+    ``inserted``/``updated`` counts of the written ones.
+    """
+    chunk_size = chunk_size or cleaning_chunk_size()
+    sources_processed = set()
+    unchanged_sources = []
+
+    if not batch_id and since is None and not force:
+        since = read_from(WATERMARK_STAGE)
+    refs = latest_ingestion_refs(ingestion_window(batch_id, since, until), targets, chunk_size)
+    if not refs:
+        return {"batch_id": batch_id, "cleaned": CleaningData.objects.none(), "unchanged": [], "inserted": 0, "updated": 0}
+    if not batch_id:
+        batch_id = max(refs, key=lambda ref: ref.createdAt).batchId
+    cleaned_hashes = dict(
+        CleaningData.objects.filter(source__in=[ref.source for ref in refs]).values_list('source', 'sourceHash')
+    )
+    stale_refs = []
+    for ref in refs:
+        if not force and ref.contentHash and cleaned_hashes.get(ref.source) == ref.contentHash:
+            unchanged_sources.append(ref.source)
+        else:
+            stale_refs.append(ref)
+    if not stale_refs:
+        # Typically the rows of the watermark overlap, cleaned by an earlier run.
+        advance_watermark(WATERMARK_STAGE, max(ref.createdAt for ref in refs))
+        return {"batch_id": batch_id, "cleaned": CleaningData.objects.none(), "unchanged": unchanged_sources, "inserted": 0, "updated": 0}
+
+    with transaction.atomic():
+        if sql_backend_enabled():
+            for start in range(0, len(stale_refs), chunk_size):
+                chunk = stale_refs[start:start + chunk_size]
+                written = upsert_cleaned_sql(chunk, [source_path(ref.source) for ref in chunk], batch_id, now())
+                sources_processed.update(source for source, _ in written)
+            stale_refs = []
+
+        pending = []
+        for ref, content in iter_ingestion_contents(stale_refs, chunk_size):
+            cleaned_content = clean_content(content, source_path(ref.source))
+            if isinstance(cleaned_content, (list, dict)):
+                pending.append({
+                    'source': ref.source,
+                    'content': cleaned_content,
+                    'sourceHash': ref.contentHash,
+                })
+                sources_processed.add(ref.source)
+            if len(pending) >= chunk_size:
+                write_cleaned(pending, batch_id, upsert_batch_size)
+                pending = []
+        write_cleaned(pending, batch_id, upsert_batch_size)
+
+        advance_watermark(WATERMARK_STAGE, max(ref.createdAt for ref in refs))
+
+    updated = sum(1 for source in sources_processed if source in cleaned_hashes)
+    cleaned = CleaningData.objects.filter(source__in=sources_processed).order_by('-updatedAt')
+    return {
+        "batch_id": batch_id,
+        "cleaned": cleaned,
+        "unchanged": unchanged_sources,
+        "inserted": len(sources_processed) - updated,
+        "updated": updated,
+    }
@@ -7,4 +7,4 @@ class GetCleaningDataSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = CleaningData
-        fields = ['id', 'result', 'source', 'updatedAt']
\ No newline at end of file
+        fields = ['id', 'result', 'source', 'batchId', 'updatedAt']
\ No newline at end of file
@@ -0,0 +1,144 @@
+"""Cleaning pushed down into PostgreSQL.
+
+The rules of ``cleaningApp.rules`` only drop or keep keys, which jsonb does
+natively (``jsonb - text[]``, ``jsonb_each``, ``jsonb_agg`` over
+``jsonb_array_elements``). ``upsert_cleaned_sql`` cleans a set of
+IngestionData rows with a single ``INSERT ... SELECT ... ON CONFLICT`` from
+``tb_ingestion_data`` into ``tb_cleaning_data``: payloads never leave the
+database. Each compiled rule is a SQL expression built to give the same
+document as its Python projector. Selected with
+``PIPELINE_CLEANING_BACKEND = "postgres"``.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+
+from cleaningApp.rules import RULE_TYPES, InvalidCleaningRule
+from configs.endpoint import SOURCE_SERVICES_CLEAN
+
+def sql_backend_enabled():
+    """True when the SQL backend is configured and the database can run it."""
+    backend = getattr(settings, 'PIPELINE_CLEANING_BACKEND', 'python')
+    return backend == 'postgres' and connection.vendor == 'postgresql'
+
+def _compose(template, **fragments):
+    """Fill ``{name}`` slots with ``(sql, params)`` fragments, keeping params in slot order."""
+    params = []
+
+    def substitute(match):
+        sql, fragment_params = fragments[match.group(1)]
+        params.extend(fragment_params)
+        return sql
+
+    return re.sub(r"\{(\w+)\}", substitute, template), params
+
+def _param(value, cast):
+    return f"%s::{cast}", [value]
+
+def _record_sql(record, keep, deny):
+    """Cleaned copy of the jsonb object ``record``."""
+    if keep is not None:
+        return _compose(
+            "(SELECT coalesce(jsonb_object_agg(kv.key, kv.value), jsonb_build_object()) "
+            "FROM jsonb_each({record}) AS kv WHERE kv.key = ANY({keep}))",
+            record=record, keep=_param(sorted(set(keep) - set(deny)), "text[]"),
+        )
+    return _compose("({record} - {deny})", record=record, deny=_param(list(deny), "text[]"))
+
+def _records_sql(doc, keep, deny, objects=True):
+    """Cleaned copy of ``doc`` when it is an array of records (or, with ``objects``, one record)."""
+    template = (
+        "CASE jsonb_typeof({doc}) WHEN 'array' THEN ("
+        "SELECT coalesce(jsonb_agg(CASE WHEN jsonb_typeof(e.value) = 'object' THEN {element} "
+        "ELSE e.value END ORDER BY e.ordinality), jsonb_build_array()) "
+        "FROM jsonb_array_elements({doc}) WITH ORDINALITY AS e(value, ordinality))"
+    )
+    fragments = {"doc": doc, "element": _record_sql(("e.value", []), keep, deny)}
+    if objects:
+        template += " WHEN 'object' THEN {record}"
+        fragments["record"] = _record_sql(doc, keep, deny)
+    return _compose(template + " ELSE {doc} END", **fragments)
+
+def compile_rule_sql(rule, content=("i.content", [])):
+    """SQL expression cleaning ``content`` the way ``rules.compile_rule(rule)`` does in Python."""
+    rule_type = rule.get("type")
+    if rule_type not in RULE_TYPES:
+        raise InvalidCleaningRule(f"Unknown cleaning rule type: {rule_type!r}")
+    prefix = "feed_" if rule_type == "dict_with_feed" else ""
+    keep = rule.get(f"{prefix}keys_to_keep")
+    deny = rule.get(f"{prefix}keys_to_remove") or ()
+    path = rule["path"].split(".") if rule.get("path") else list(RULE_TYPES[rule_type])
+    flatten = rule.get("flatten", False)
+    identity = keep is None and not deny
+
+    if identity and not flatten:
+        return content
+    if not path:
+        return content if identity else _records_sql(content, keep, deny, objects=False)
+
+    # Python only descends through objects that hold the next key.
+    fragments = {"content": content}
+    conditions = []
+    for depth, key in enumerate(path):
+        parent = _compose("({content} #> {prefix})", content=content, prefix=_param(path[:depth], "text[]"))
+        fragments[f"c{depth}"] = _compose(
+            "(jsonb_typeof({parent}) = 'object' AND {parent} ? {key})", parent=parent, key=_param(key, "text")
+        )
+        conditions.append(f"{{c{depth}}}")
+    node = _compose("({content} #> {path})", content=content, path=_param(path, "text[]"))
+    records = node if identity else _records_sql(node, keep, deny)
+    if flatten:
+        fragments["projected"] = records
+    else:
+        fragments["projected"] = _compose(
+            "jsonb_set({content}, {path}, {records})", content=content, path=_param(path, "text[]"), records=records
+        )
+    return _compose(f"CASE WHEN {' AND '.join(conditions)} THEN {{projected}} ELSE {{content}} END", **fragments)
+
+def compile_rules_sql(rules):
+    return {source_path: compile_rule_sql(rule) for source_path, rule in rules.items()}
+
+RULES_SQL = compile_rules_sql(SOURCE_SERVICES_CLEAN)
+
+UPSERT_SQL = """
+INSERT INTO tb_cleaning_data (id, source, content, "sourceHash", "batchId", "createdAt", "updatedAt")
+SELECT gen_random_uuid(), i.source, cleaned.content, i."contentHash", %s, %s, %s
+FROM unnest(%s::bigint[], %s::int[]) AS r(id, rule)
+JOIN tb_ingestion_data i ON i.id = r.id
+CROSS JOIN LATERAL (SELECT {cleaned} AS content) AS cleaned
+WHERE jsonb_typeof(cleaned.content) IN ('array', 'object')
+ON CONFLICT (source) DO UPDATE SET
+    content = EXCLUDED.content,
+    "sourceHash" = EXCLUDED."sourceHash",
+    "batchId" = EXCLUDED."batchId",
+    "updatedAt" = EXCLUDED."updatedAt"
+RETURNING source, (xmax = 0) AS inserted
+"""
+
+def upsert_cleaned_sql(refs, source_paths, batch_id, current_time):
+    """Clean and upsert the IngestionData rows ``refs`` in one statement.
+
+    ``source_paths`` gives the rule path of each ref. Returns the list of
+    ``(source, inserted)`` pairs of the rows written.
+    """
+    if not refs:
+        return []
+    rule_paths = sorted({path for path in source_paths if path in RULES_SQL})
+    cases = []
+    case_params = []
+    for index, path in enumerate(rule_paths):
+        expression, params = RULES_SQL[path]
+        cases.append(f"WHEN {index} THEN {expression}")
+        case_params.extend(params)
+    rule_index = {path: index for index, path in enumerate(rule_paths)}
+    cleaned = f"CASE r.rule {' '.join(cases)} ELSE i.content END" if cases else "i.content"
+    params = [
+        str(batch_id) if batch_id else None, current_time, current_time,
+        [ref.id for ref in refs], [rule_index.get(path, -1) for path in source_paths],
+    ]
+    # The rule CASE follows the unnest() arguments in the statement text.
+    sql = UPSERT_SQL.replace("{cleaned}", cleaned)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params + case_params)
+        return cursor.fetchall()
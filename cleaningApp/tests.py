@@ -0,0 +1,68 @@
+import copy
+from unittest import skipUnless
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from cleaningApp.models import CleaningData
+from cleaningApp.pipeline import run_cleaning
+from cleaningApp.rules import InvalidCleaningRule, clean_content, compile_rule
+from cleaningApp.sql import RULES_SQL, compile_rule_sql
+from configs.endpoint import SOURCE_SERVICES_CLEAN
+from ingestionApp.models import IngestionData
+
+
+class CompiledRuleTests(SimpleTestCase):
+    def test_configured_rules_drop_denied_keys(self):
+        stocks = [{"symbol": "A", "name": "a", "type": "stock", "exchangeShortName": "X"}, "not a record"]
+        self.assertEqual(clean_content(stocks, "/services/v1/finance/stocks"), [{"name": "a"}, "not a record"])
+
+        macro = {"items": "1", "feed": [{"title": "t", "url": "u", "authors": []}]}
+        self.assertEqual(clean_content(macro, "/services/v1/economy/macro"), {"items": "1", "feed": [{"title": "t"}]})
+        self.assertEqual(clean_content({"feed": "x"}, "/unknown"), {"feed": "x"})
+
+    def test_allow_list_nested_path_and_flatten(self):
+        payload = {"data": {"items": [{"a": 1, "b": 2, "c": 3}]}, "meta": 1}
+        project = compile_rule({"type": "dict_with_feed", "path": "data.items", "feed_keys_to_keep": ["a", "b"], "feed_keys_to_remove": ["b"]})
+        self.assertEqual(project(payload), {"data": {"items": [{"a": 1}]}, "meta": 1})
+
+        project = compile_rule({"type": "dict_with_feed", "flatten": True, "feed_keys_to_remove": ["url"]})
+        self.assertEqual(project({"feed": [{"title": "t", "url": "u"}]}), [{"title": "t"}])
+        self.assertEqual(project({"items": "0"}), {"items": "0"})
+
+    def test_unknown_rule_type_is_rejected(self):
+        with self.assertRaises(InvalidCleaningRule):
+            compile_rule({"type": "csv"})
+
+
+PAYLOADS = {
+    "list_of_dicts": [{"symbol": "A", "name": "a", "type": "stock", "exchangeShortName": "X", "stockExchange": "Y"}, 3, "x"],
+    "dict_with_feed": {"items": "2", "feed": [{"title": "t", "url": "u", "authors": ["a"], "source": "s"}, "raw"]},
+}
+
+
+class SqlRuleTests(SimpleTestCase):
+    def test_every_placeholder_has_a_param(self):
+        rules = [
+            {"type": "dict_with_feed", "path": "data.items", "feed_keys_to_keep": ["a"], "flatten": True},
+            {"type": "list_of_dicts", "keys_to_keep": ["a"], "keys_to_remove": ["b"]},
+            {"type": "list_of_dicts"},
+        ]
+        for sql, params in [*RULES_SQL.values(), *map(compile_rule_sql, rules)]:
+            self.assertEqual(sql.count("%s"), len(params))
+
+
+@skipUnless(connection.vendor == "postgresql", "jsonb cleaning needs PostgreSQL")
+class SqlBackendParityTests(TestCase):
+    def _clean_all(self):
+        run_cleaning(force=True)
+        return dict(CleaningData.objects.values_list("source", "content"))
+
+    def test_sql_backend_matches_python_engine(self):
+        for path, rule in SOURCE_SERVICES_CLEAN.items():
+            IngestionData.objects.create(source=f"http://testserver{path}", content=copy.deepcopy(PAYLOADS[rule["type"]]))
+        IngestionData.objects.create(source="http://testserver/services/v1/economy/fiscal", content={"feed": {"url": "u", "t": 1}})
+
+        with override_settings(PIPELINE_CLEANING_BACKEND="python"):
+            expected = self._clean_all()
+        CleaningData.objects.all().delete()
+        with override_settings(PIPELINE_CLEANING_BACKEND="postgres"):
+            self.assertEqual(self._clean_all(), expected)
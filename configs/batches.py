@@ -0,0 +1,19 @@
+"""Pipeline batch ids.
+
+Every run of the pipeline gets one ``batchId`` that ingestion stamps on the
+rows it writes and every later stage copies onto its own output. A stage
+given a batch id reads only that batch; a stage started on its own continues
+the newest batch found in its input table.
+"""
+import uuid
+
+def new_batch_id():
+    return uuid.uuid4()
+
+def latest_batch_id(model, ordering):
+    """``batchId`` of the newest ``model`` row by ``ordering``, or None for an empty/legacy table."""
+    return model.objects.order_by(ordering).values_list('batchId', flat=True).first()
+
+def parse_batch_id(value):
+    """UUID from a ``?batch=`` query value; raises ValueError when malformed."""
+    return uuid.UUID(str(value))
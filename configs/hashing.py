@@ -0,0 +1,11 @@
+import hashlib
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+
+def canonical_json(value):
+    """Key-sorted, whitespace-free JSON, so equal payloads always serialize to the same text."""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, cls=DjangoJSONEncoder)
+
+def content_hash(value):
+    """SHA-256 hex digest of ``canonical_json(value)``."""
+    return hashlib.sha256(canonical_json(value).encode("utf-8")).hexdigest()
@@ -0,0 +1,83 @@
+"""Incremental decoder for a top-level JSON array arriving in text chunks."""
+import json
+
+WHITESPACE = " \t\n\r"
+VALUE_DELIMITERS = WHITESPACE + ",]"
+
+class NotAJSONArray(ValueError):
+    """The payload does not start with ``[``; callers should fall back to a full parse."""
+
+class JSONArrayStream:
+    """Feed text chunks, get back every array element that is complete so far.
+
+    Only the unparsed tail of the body is kept in memory, so a caller that
+    stops after N elements never holds more than one partial element.
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._started = False
+        self._expect_value = True
+        self._at_first_value = True
+        self.done = False
+
+    def _skip_whitespace(self):
+        buffer, pos = self._buffer, self._pos
+        while pos < len(buffer) and buffer[pos] in WHITESPACE:
+            pos += 1
+        self._pos = pos
+
+    def feed(self, chunk, final=False):
+        if self.done:
+            return []
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        elements = []
+        while True:
+            self._skip_whitespace()
+            if self._pos >= len(self._buffer):
+                break
+            char = self._buffer[self._pos]
+            if not self._started:
+                if char != "[":
+                    raise NotAJSONArray(f"Expected a JSON array, got {char!r}")
+                self._started = True
+                self._pos += 1
+                continue
+            if not self._expect_value:
+                if char == ",":
+                    self._expect_value = True
+                    self._pos += 1
+                    continue
+                if char == "]":
+                    self.done = True
+                    self._pos += 1
+                    break
+                raise ValueError(f"Expected ',' or ']' at offset {self._pos}, got {char!r}")
+            if char == "]" and self._at_first_value:
+                self.done = True
+                self._pos += 1
+                break
+            try:
+                element, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if final:
+                    raise
+                break
+            # A number may still be growing until a delimiter follows it ("2" of "2.5").
+            if not final and (end >= len(self._buffer) or self._buffer[end] not in VALUE_DELIMITERS):
+                break
+            elements.append(element)
+            self._pos = end
+            self._expect_value = False
+            self._at_first_value = False
+        return elements
+
+    def close(self):
+        """Flush the tail of the body; raises ``ValueError`` when the array was truncated."""
+        elements = self.feed("", final=True)
+        if not self.done:
+            raise ValueError("Truncated JSON array")
+        return elements
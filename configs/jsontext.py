@@ -0,0 +1,63 @@
+"""String extraction from nested JSON content, shared by transformation and visualization.
+
+``iter_strings`` walks the payload with an explicit stack of iterators, so
+deeply nested payloads never reach the recursion limit and no intermediate
+lists are built; strings come out in document order. ``keys`` restricts the
+walk to strings under the given object keys (e.g. ``{"title", "summary"}``),
+at any depth below them. ``extract_strings`` does the same for a batch of
+payloads.
+"""
+
+def _iter_all(content):
+    stack = [iter(content.values() if isinstance(content, dict) else content)]
+    while stack:
+        for value in stack[-1]:
+            if isinstance(value, str):
+                yield value
+            elif isinstance(value, dict):
+                stack.append(iter(value.values()))
+                break
+            elif isinstance(value, list):
+                stack.append(iter(value))
+                break
+        else:
+            stack.pop()
+
+def _frame(container):
+    if isinstance(container, dict):
+        return iter(container.items()), True
+    return iter(container), False
+
+def _iter_under_keys(content, keys):
+    # Frames are (iterator, is_dict): dicts are walked by items to see the keys, lists by value.
+    stack = [_frame(content)]
+    while stack:
+        entries, is_dict = stack[-1]
+        for entry in entries:
+            if is_dict:
+                key, value = entry
+                if key in keys:
+                    if isinstance(value, str):
+                        yield value
+                    elif isinstance(value, (dict, list)):
+                        yield from _iter_all(value)
+                    continue
+            else:
+                value = entry
+            if isinstance(value, (dict, list)):
+                stack.append(_frame(value))
+                break
+        else:
+            stack.pop()
+
+def iter_strings(content, keys=None):
+    """Yield every string nested in ``content`` (a dict or list), in document order."""
+    if not isinstance(content, (dict, list)):
+        return iter(())
+    if keys is None:
+        return _iter_all(content)
+    return _iter_under_keys(content, frozenset(keys))
+
+def extract_strings(contents, keys=None):
+    """One list of strings per payload of ``contents``."""
+    return [list(iter_strings(content, keys)) for content in contents]
@@ -0,0 +1,137 @@
+"""Keyset (cursor) pagination shared by the ``/collect`` endpoints.
+
+Pages are addressed by the ``(ordering field, id)`` of the row they start
+after, so every page is one indexed range scan of ``page_size + 1`` rows, at
+any depth. The cursor is an opaque url-safe base64 token. Responses carry
+the total ``count`` like DRF's paginators; clients that do not need it pass
+``?count=false`` to skip the ``COUNT(*)``. ``?since=`` and
+``?until=`` (ISO 8601) bound the same indexed column: rows strictly after
+``since`` and at or before ``until``.
+"""
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+from configs.timewindow import parse_timestamp
+
+class PageQueryError(ValueError):
+    """A pagination query parameter is malformed; views answer 400."""
+
+class InvalidCursor(PageQueryError):
+    """The ``cursor`` query parameter was not produced by this paginator."""
+
+class InvalidTimeFilter(PageQueryError):
+    """``since``/``until`` is not an ISO 8601 timestamp."""
+
+class KeysetPagination(BasePagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    since_query_param = 'since'
+    until_query_param = 'until'
+    # Newest first by default; subclasses pick the indexed timestamp they list by.
+    ordering = '-createdAt'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(size, self.max_page_size) if size > 0 else self.page_size
+
+    def encode_cursor(self, row, reverse):
+        payload = {"v": self._field.value_to_string(row), "id": str(row.pk), "r": int(reverse)}
+        token = base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode()
+        return token.rstrip("=")
+
+    def decode_cursor(self, request, model):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+            value = self._field.to_python(payload["v"])
+            pk = model._meta.pk.to_python(payload["id"])
+            return value, pk, bool(payload.get("r"))
+        except (binascii.Error, ValueError, TypeError, KeyError, ValidationError) as e:
+            raise InvalidCursor("Invalid cursor.") from e
+
+    def filter_time_window(self, queryset, request, field_name):
+        for param, lookup in ((self.since_query_param, 'gt'), (self.until_query_param, 'lte')):
+            raw = request.query_params.get(param)
+            if not raw:
+                continue
+            try:
+                value = parse_timestamp(raw)
+            except ValueError as e:
+                raise InvalidTimeFilter(f"Invalid {param} timestamp.") from e
+            queryset = queryset.filter(**{f'{field_name}__{lookup}': value})
+        return queryset
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size_value = self.get_page_size(request)
+        field_name = self.ordering.lstrip('-')
+        descending = self.ordering.startswith('-')
+        model = queryset.model
+        self._field = model._meta.get_field(field_name)
+
+        cursor = self.decode_cursor(request, model)
+        queryset = self.filter_time_window(queryset, request, field_name)
+        include_count = request.query_params.get(self.count_query_param, '').lower() not in ('0', 'false', 'no')
+        self.count = queryset.count() if include_count else None
+
+        reverse = cursor[2] if cursor else False
+        scan_descending = descending != reverse
+        if scan_descending:
+            queryset = queryset.order_by(f'-{field_name}', '-pk')
+        else:
+            queryset = queryset.order_by(field_name, 'pk')
+        if cursor:
+            value, pk, _ = cursor
+            op = 'lt' if scan_descending else 'gt'
+            queryset = queryset.filter(Q(**{f'{field_name}__{op}': value}) | Q(**{field_name: value, f'pk__{op}': pk}))
+
+        rows = list(queryset[:self.page_size_value + 1])
+        has_more = len(rows) > self.page_size_value
+        rows = rows[:self.page_size_value]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        self.page = rows
+        return rows
+
+    def _link(self, cursor_token):
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor_token)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._link(self.encode_cursor(self.page[-1], reverse=False))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self._link(self.encode_cursor(self.page[0], reverse=True))
+
+    def get_paginated_response(self, data):
+        body = OrderedDict()
+        if self.count is not None:
+            body['count'] = self.count
+        body['next'] = self.get_next_link()
+        body['previous'] = self.get_previous_link()
+        body['results'] = data
+        return Response(body)
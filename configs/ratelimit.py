@@ -0,0 +1,164 @@
+"""Per-API-key call quotas for FMP and Alpha Vantage.
+
+Each key gets a token bucket per window (``PER_MINUTE``, ``PER_DAY``). A bucket
+is stored as the time at which it will be full again (GCRA), so a call only
+has to read and bump one float per window. State lives in one small file per
+key under ``UPSTREAM_QUOTA["LOCATION"]`` and is updated under an exclusive
+``fcntl`` lock, so every thread and every gunicorn worker on the host draws
+from the same buckets. ``acquire`` takes that lock in a worker thread, so a
+contended lock never stalls the other fetches on the event loop. Where
+``fcntl`` is unavailable the buckets are only shared between the threads of
+one process.
+
+Callers either wait for a token up to a deadline or fail fast with
+``QuotaExceeded``. With ``spread=True`` (used by ingestion) the per-minute
+bucket grants no burst, so a batch of calls is paced evenly across the window
+instead of spending the whole minute's allowance at once.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX hosts
+    fcntl = None
+
+WINDOWS = (("PER_MINUTE", 60), ("PER_DAY", 86400))
+SPREAD_WINDOWS = ("PER_MINUTE",)
+
+DEFAULT_UPSTREAM_QUOTA = {
+    "LOCATION": os.path.join(tempfile.gettempdir(), "economic-analysis-upstream-quota"),
+    # Seconds a request may queue for a token before failing; 0 fails fast.
+    "WAIT_TIMEOUT": 10.0,
+    "INGESTION_WAIT_TIMEOUT": 120.0,
+    # Provider -> {"PER_MINUTE": n, "PER_DAY": n}; a missing or 0 limit is not enforced.
+    "LIMITS": {},
+}
+
+def quota_setting(name):
+    return getattr(settings, "UPSTREAM_QUOTA", {}).get(name, DEFAULT_UPSTREAM_QUOTA[name])
+
+class QuotaExceeded(Exception):
+    """No token became available before the caller's deadline."""
+
+    def __init__(self, bucket, retry_after):
+        super().__init__(f"Upstream quota for {bucket} exhausted; retry in {retry_after:.1f}s")
+        self.bucket = bucket
+        self.retry_after = retry_after
+
+class QuotaBucket:
+    """Token buckets for one provider key, shared through a lock file."""
+
+    def __init__(self, provider, api_key, limits, location):
+        self.provider = provider
+        digest = hashlib.sha256((api_key or "").encode()).hexdigest()[:12]
+        self.name = f"{provider}:{digest}"
+        self.windows = [
+            (window, limits[window], period)
+            for window, period in WINDOWS if limits.get(window)
+        ]
+        self.path = os.path.join(location, f"{provider}-{digest}.json")
+        self._lock = threading.Lock()
+        self.stats = {"granted": 0, "waited": 0, "rejected": 0, "wait_seconds": 0.0}
+        os.makedirs(location, exist_ok=True)
+
+    def _read(self, f):
+        f.seek(0)
+        try:
+            return json.loads(f.read() or "{}")
+        except ValueError:
+            return {}
+
+    def _write(self, f, state):
+        f.seek(0)
+        f.truncate()
+        f.write(json.dumps(state))
+        f.flush()
+
+    def try_acquire(self, spread=False):
+        """Take a token from every window now, or return the seconds until that is possible."""
+        if not self.windows:
+            return 0.0
+        with self._lock, open(self.path, "a+") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                state = self._read(f)
+                now = time.time()
+                wait = 0.0
+                for window, limit, period in self.windows:
+                    interval = period / limit
+                    burst = 0.0 if spread and window in SPREAD_WINDOWS else (limit - 1) * interval
+                    full_at = max(state.get(window, now), now)
+                    wait = max(wait, full_at - burst - now)
+                if wait > 0:
+                    return wait
+                for window, limit, period in self.windows:
+                    state[window] = max(state.get(window, now), now) + period / limit
+                self._write(f, state)
+                return 0.0
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    async def acquire(self, max_wait=None, spread=False):
+        """Wait for a token, at most ``max_wait`` seconds (``WAIT_TIMEOUT`` by default).
+
+        Raises ``QuotaExceeded`` as soon as it is clear the deadline cannot be met.
+        """
+        max_wait = quota_setting("WAIT_TIMEOUT") if max_wait is None else max_wait
+        deadline = time.monotonic() + max_wait
+        started = time.monotonic()
+        while True:
+            # The state file lock can block; keep it off the shared event loop.
+            wait = await asyncio.to_thread(self.try_acquire, spread) if self.windows else 0.0
+            if wait <= 0:
+                break
+            remaining = deadline - time.monotonic()
+            if wait > remaining:
+                self.stats["rejected"] += 1
+                raise QuotaExceeded(self.name, wait)
+            await asyncio.sleep(wait)
+        waited = time.monotonic() - started
+        self.stats["granted"] += 1
+        if waited > 0.001:
+            self.stats["waited"] += 1
+            self.stats["wait_seconds"] = round(self.stats["wait_seconds"] + waited, 3)
+
+    def snapshot(self):
+        return {
+            "limits": {window: limit for window, limit, _ in self.windows},
+            **self.stats,
+        }
+
+class QuotaRegistry:
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, provider, api_key):
+        limits = quota_setting("LIMITS").get(provider, {})
+        location = quota_setting("LOCATION")
+        key = (provider, api_key, tuple(sorted(limits.items())), location)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    bucket = self._buckets[key] = QuotaBucket(provider, api_key, limits, location)
+        return bucket
+
+    def snapshot(self):
+        return {bucket.name: bucket.snapshot() for bucket in list(self._buckets.values()) if bucket.windows}
+
+quotas = QuotaRegistry()
+
+async def acquire_quota(provider, api_key, max_wait=None, spread=False):
+    await quotas.bucket(provider, api_key).acquire(max_wait=max_wait, spread=spread)
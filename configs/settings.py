@@ -24,6 +24,7 @@ INSTALLED_APPS = [
     'transformationApp',
     'visualizationApp',
     'restoreApp',
+    'pipelineApp',
 ]
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
@@ -41,6 +42,49 @@ SPECTACULAR_SETTINGS = {
         "url": "https://www.gnu.org/licenses/gpl-3.0.html",
     },
 }
+UPSTREAM_HTTP = {
+    'TIMEOUT': float(os.getenv('UPSTREAM_TIMEOUT', '15')),
+    'CONNECT_TIMEOUT': float(os.getenv('UPSTREAM_CONNECT_TIMEOUT', '5')),
+    'MAX_CONNECTIONS_PER_HOST': int(os.getenv('UPSTREAM_MAX_CONNECTIONS_PER_HOST', '5')),
+    'MAX_KEEPALIVE_PER_HOST': int(os.getenv('UPSTREAM_MAX_KEEPALIVE_PER_HOST', '5')),
+    'RETRIES': int(os.getenv('UPSTREAM_RETRIES', '3')),
+    'BACKOFF_BASE': float(os.getenv('UPSTREAM_BACKOFF_BASE', '0.5')),
+    'BACKOFF_MAX': float(os.getenv('UPSTREAM_BACKOFF_MAX', '8')),
+    'HOSTS': {},
+}
+UPSTREAM_CACHE = {
+    'BACKEND': os.getenv('UPSTREAM_CACHE_BACKEND', 'locmem'),
+    'MAX_ENTRIES': int(os.getenv('UPSTREAM_CACHE_MAX_ENTRIES', '256')),
+    'LOCATION': os.getenv('UPSTREAM_CACHE_LOCATION', os.path.join(BASE_DIR, 'cache', 'upstream')),
+    'CACHE_ALIAS': 'default',
+    'DEFAULT_TTL': 300,
+    'TTL': {
+        'fmp:stock/list': 86400,
+        'fmp:symbol/available-cryptocurrencies': 86400,
+        'fmp:stock_market/actives': 60,
+        'fmp:stock_market/losers': 60,
+        'fmp:sector-performance': 300,
+        'alpha:economy_fiscal': 1800,
+        'alpha:economy_monetary': 1800,
+        'alpha:economy_macro': 1800,
+    },
+}
+# Calls per API key; 0 disables a window. Defaults follow the free FMP / Alpha Vantage plans.
+UPSTREAM_QUOTA = {
+    'LOCATION': os.getenv('UPSTREAM_QUOTA_LOCATION', os.path.join(BASE_DIR, 'cache', 'quota')),
+    'WAIT_TIMEOUT': float(os.getenv('UPSTREAM_QUOTA_WAIT_TIMEOUT', '10')),
+    'INGESTION_WAIT_TIMEOUT': float(os.getenv('UPSTREAM_QUOTA_INGESTION_WAIT_TIMEOUT', '120')),
+    'LIMITS': {
+        'fmp': {
+            'PER_MINUTE': int(os.getenv('FMP_CALLS_PER_MINUTE', '300')),
+            'PER_DAY': int(os.getenv('FMP_CALLS_PER_DAY', '250')),
+        },
+        'alpha': {
+            'PER_MINUTE': int(os.getenv('ALPHA_CALLS_PER_MINUTE', '5')),
+            'PER_DAY': int(os.getenv('ALPHA_CALLS_PER_DAY', '25')),
+        },
+    },
+}
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -102,3 +146,33 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 STATIC_URL = '/static/'
 MEDIA_URL = '/media/'
+# Host prefix stored in `source` by pipeline runs started outside an HTTP request.
+PIPELINE_BASE_URL = os.getenv('PIPELINE_BASE_URL', '')
+# Seconds each stage re-reads below its watermark, so rows committed late by a concurrent run are not skipped.
+PIPELINE_WATERMARK_OVERLAP = int(os.getenv('PIPELINE_WATERMARK_OVERLAP', '600'))
+# A running job not updated for this many seconds is handed to another worker.
+PIPELINE_JOB_STALE_AFTER = int(os.getenv('PIPELINE_JOB_STALE_AFTER', '3600'))
+PIPELINE_JOB_MAX_ATTEMPTS = int(os.getenv('PIPELINE_JOB_MAX_ATTEMPTS', '3'))
+# Seconds between the updatedAt heartbeats of a running job; keep well below PIPELINE_JOB_STALE_AFTER.
+PIPELINE_JOB_HEARTBEAT = int(os.getenv('PIPELINE_JOB_HEARTBEAT', '60'))
+# Rows the pipeline stages stream, clean and write per round trip.
+PIPELINE_CHUNK_SIZE = int(os.getenv('PIPELINE_CHUNK_SIZE', '500'))
+# Rows per INSERT ... ON CONFLICT statement when stages upsert their output.
+PIPELINE_UPSERT_BATCH_SIZE = int(os.getenv('PIPELINE_UPSERT_BATCH_SIZE', '500'))
+# "postgres" cleans payloads in SQL (jsonb operators) instead of in Python; PostgreSQL 13+ only.
+PIPELINE_CLEANING_BACKEND = os.getenv('PIPELINE_CLEANING_BACKEND', 'python')
+# "auto" scores with scikit-learn when installed and the built-in numpy engine otherwise; "native" or "sklearn" pin one.
+TRANSFORMATION_TFIDF_ENGINE = os.getenv('TRANSFORMATION_TFIDF_ENGINE', 'auto')
+# "incremental" scores only new documents against persisted corpus state; "refit" refits on every cleaned document each run.
+TRANSFORMATION_TFIDF_MODE = os.getenv('TRANSFORMATION_TFIDF_MODE', 'incremental')
+# "vocabulary" learns a column per token; "hashing" hashes tokens into a fixed number of buckets.
+TRANSFORMATION_TFIDF_FEATURES = os.getenv('TRANSFORMATION_TFIDF_FEATURES', 'vocabulary')
+TRANSFORMATION_HASHING_BUCKETS = int(os.getenv('TRANSFORMATION_HASHING_BUCKETS', str(2 ** 20)))
+TRANSFORMATION_HASHING_SIGNED = os.getenv('TRANSFORMATION_HASHING_SIGNED', 'true').lower() in ('1', 'true', 'yes')
+# Heaviest TF-IDF terms stored per transformed document (TransformationTerm rows); 0 stores none.
+TRANSFORMATION_TOP_TERMS = int(os.getenv('TRANSFORMATION_TOP_TERMS', '10'))
+# Comma-separated JSON keys (e.g. "title,summary,name") whose strings are scored / counted as phrases; unset takes every string.
+TRANSFORMATION_TEXT_KEYS = [key.strip() for key in os.getenv('TRANSFORMATION_TEXT_KEYS', '').split(',') if key.strip()] or None
+# "content" counts the strings of each transformed payload as phrases; "terms" reads the stored top TF-IDF terms instead.
+VISUALIZATION_PHRASE_SOURCE = os.getenv('VISUALIZATION_PHRASE_SOURCE', 'content')
+VISUALIZATION_PHRASE_KEYS = [key.strip() for key in os.getenv('VISUALIZATION_PHRASE_KEYS', '').split(',') if key.strip()] or None
@@ -0,0 +1,239 @@
+import asyncio
+import fcntl
+import json
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+import httpx
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.utils.timezone import now
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from configs.pagination import InvalidCursor, KeysetPagination
+from configs.jsonstream import JSONArrayStream
+from configs.jsontext import extract_strings, iter_strings
+from configs.ratelimit import QuotaBucket, QuotaExceeded
+from configs.upstream import engine
+from configs.upstream_cache import DjangoCacheBackend, FileBackend, LocMemBackend
+from ingestionApp.models import IngestionData
+
+class UpstreamCacheBackendTests(SimpleTestCase):
+    def test_locmem_evicts_least_recently_used(self):
+        backend = LocMemBackend(max_entries=2)
+        backend.set("a", 1, ttl=60)
+        backend.set("b", 2, ttl=60)
+        backend.get("a")
+        backend.set("c", 3, ttl=60)
+
+        self.assertEqual(backend.get("a"), 1)
+        self.assertIsNone(backend.get("b"))
+        self.assertEqual(backend.get("c"), 3)
+
+    def test_locmem_expires_after_ttl(self):
+        backend = LocMemBackend(max_entries=2)
+        with patch("configs.upstream_cache.time.time", return_value=1000.0):
+            backend.set("a", [1, 2], ttl=10)
+        with patch("configs.upstream_cache.time.time", return_value=1009.0):
+            self.assertEqual(backend.get("a"), [1, 2])
+        with patch("configs.upstream_cache.time.time", return_value=1010.0):
+            self.assertIsNone(backend.get("a"))
+
+    def test_file_backend_round_trips_and_bounds_entries(self):
+        with tempfile.TemporaryDirectory() as location:
+            backend = FileBackend(location, max_entries=1)
+            backend.set("fmp:stock/list", [{"symbol": "AAA"}], ttl=60)
+            self.assertEqual(backend.get("fmp:stock/list"), [{"symbol": "AAA"}])
+
+            backend.set("fmp:sector-performance", [{"sector": "Energy"}], ttl=60)
+            self.assertEqual(backend.get("fmp:sector-performance"), [{"sector": "Energy"}])
+            self.assertIsNone(backend.get("fmp:stock/list"))
+
+    def test_file_backend_entry_removed_during_lookup_is_a_miss(self):
+        with tempfile.TemporaryDirectory() as location:
+            backend = FileBackend(location, max_entries=2)
+            backend.set("fmp:stock/list", [{"symbol": "AAA"}], ttl=60)
+            with patch("configs.upstream_cache.os.utime", side_effect=FileNotFoundError):
+                self.assertIsNone(backend.get("fmp:stock/list"))
+
+    def test_django_backend_clear_keeps_other_keys_in_the_alias(self):
+        backend = DjangoCacheBackend("default")
+        cache.set("session:abc", "keep", timeout=60)
+        backend.set("fmp:stock/list", [{"symbol": "AAA"}], ttl=60)
+        self.assertEqual(backend.get("fmp:stock/list"), [{"symbol": "AAA"}])
+
+        backend.clear()
+
+        self.assertIsNone(backend.get("fmp:stock/list"))
+        self.assertEqual(cache.get("session:abc"), "keep")
+        backend.set("fmp:stock/list", [{"symbol": "BBB"}], ttl=60)
+        self.assertEqual(backend.get("fmp:stock/list"), [{"symbol": "BBB"}])
+        cache.delete("session:abc")
+
+class JSONArrayStreamTests(SimpleTestCase):
+    def test_elements_split_across_chunks(self):
+        payload = [{"symbol": "A", "name": "x, ]\"["}, 12.5, -3e2, None, [1, [2]], {}]
+        text = json.dumps(payload)
+        parser = JSONArrayStream()
+        elements = []
+        for i in range(0, len(text), 3):
+            elements.extend(parser.feed(text[i:i + 3]))
+        elements.extend(parser.close())
+        self.assertEqual(elements, payload)
+
+    def test_truncated_array_is_rejected(self):
+        parser = JSONArrayStream()
+        parser.feed('[{"a": 1}, {"b"')
+        with self.assertRaises(ValueError):
+            parser.close()
+
+class JSONTextTests(SimpleTestCase):
+    PAYLOAD = {"feed": [{"title": "Fed holds", "meta": {"tags": ["rates", "fomc"]}, "score": 1}, "loose"], "name": "feed"}
+
+    def test_strings_come_out_in_document_order(self):
+        self.assertEqual(list(iter_strings(self.PAYLOAD)), ["Fed holds", "rates", "fomc", "loose", "feed"])
+
+    def test_key_allow_list_takes_strings_below_listed_keys(self):
+        self.assertEqual(list(iter_strings(self.PAYLOAD, keys={"title", "meta"})), ["Fed holds", "rates", "fomc"])
+
+    def test_deep_payload_does_not_recurse(self):
+        content = "bottom"
+        for _ in range(20000):
+            content = {"child": [content]}
+        self.assertEqual(list(iter_strings(content)), ["bottom"])
+
+    def test_batch_extraction_keeps_one_list_per_payload(self):
+        contents = iter([self.PAYLOAD, [], {"title": "x"}, "not a container"])
+        self.assertEqual(extract_strings(contents, keys={"title"}), [["Fed holds"], [], ["x"], []])
+
+class StreamingFetchTests(SimpleTestCase):
+    def tearDown(self):
+        engine.configure(transport=None)
+
+    def test_stops_reading_once_limit_is_reached(self):
+        rows = [{"symbol": f"S{i}", "name": f"Stock {i}"} for i in range(10000)]
+        body = json.dumps(rows).encode()
+        chunk_size = 4096
+        chunks_sent = []
+
+        async def stream_body():
+            for offset in range(0, len(body), chunk_size):
+                chunks_sent.append(offset)
+                yield body[offset:offset + chunk_size]
+
+        engine.configure(transport=httpx.MockTransport(lambda request: httpx.Response(200, content=stream_body())))
+        elements = engine.run(engine.aget_json_array("http://fmp.test/stock/list", limit=100))
+
+        self.assertEqual(elements, rows[:100])
+        self.assertLess(len(chunks_sent), 5)
+        self.assertEqual(engine.pool_stats()["fmp.test"]["in_use"], 0)
+
+    def test_non_array_body_is_returned_whole(self):
+        engine.configure(transport=httpx.MockTransport(
+            lambda request: httpx.Response(200, json={"Error Message": "Invalid API KEY."})
+        ))
+        payload = engine.run(engine.aget_json_array("http://fmp.test/stock/list", limit=100))
+        self.assertEqual(payload, {"Error Message": "Invalid API KEY."})
+
+class QuotaBucketTests(SimpleTestCase):
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+
+    def _bucket(self, **limits):
+        return QuotaBucket("fmp", "secret-key", limits, self.location)
+
+    def test_burst_up_to_limit_then_wait(self):
+        bucket = self._bucket(PER_MINUTE=2)
+        self.assertEqual(bucket.try_acquire(), 0)
+        self.assertEqual(bucket.try_acquire(), 0)
+        self.assertAlmostEqual(bucket.try_acquire(), 30, delta=1)
+
+    def test_buckets_are_shared_through_the_state_file(self):
+        self._bucket(PER_DAY=1).try_acquire()
+        self.assertGreater(self._bucket(PER_DAY=1).try_acquire(), 86000)
+        self.assertEqual(QuotaBucket("fmp", "other-key", {"PER_DAY": 1}, self.location).try_acquire(), 0)
+
+    def test_fail_fast_and_spread(self):
+        bucket = self._bucket(PER_MINUTE=2)
+        asyncio.run(bucket.acquire(max_wait=0, spread=True))
+        with self.assertRaises(QuotaExceeded) as ctx:
+            asyncio.run(bucket.acquire(max_wait=0, spread=True))
+        self.assertAlmostEqual(ctx.exception.retry_after, 30, delta=1)
+        self.assertEqual(bucket.stats["rejected"], 1)
+
+    def test_waits_for_token_within_deadline(self):
+        bucket = self._bucket(PER_MINUTE=600)
+        started = time.monotonic()
+
+        async def acquire_three():
+            for _ in range(3):
+                await bucket.acquire(max_wait=1, spread=True)
+
+        asyncio.run(acquire_three())
+        self.assertGreaterEqual(time.monotonic() - started, 0.19)
+        self.assertEqual(bucket.stats["granted"], 3)
+
+    def test_contended_lock_does_not_block_the_event_loop(self):
+        bucket = self._bucket(PER_MINUTE=600)
+        other = self._bucket(PER_MINUTE=600)
+        ticks = []
+
+        async def ticker():
+            for _ in range(10):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.02)
+
+        def hold_lock(locked):
+            # Another worker holds the state file lock for 0.3s.
+            with open(bucket.path, "a+") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                locked.set()
+                time.sleep(0.3)
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+        async def main():
+            locked = threading.Event()
+            holder = threading.Thread(target=hold_lock, args=(locked,))
+            holder.start()
+            locked.wait()
+            await asyncio.gather(ticker(), bucket.acquire(max_wait=5), other.acquire(max_wait=5))
+            holder.join()
+
+        asyncio.run(main())
+        self.assertEqual(bucket.stats["granted"] + other.stats["granted"], 2)
+        self.assertEqual(len(ticks), 10)
+        self.assertLess(max(b - a for a, b in zip(ticks, ticks[1:])), 0.2)
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        IngestionData.objects.bulk_create([IngestionData(source=f"s{i}", content={}) for i in range(7)])
+        # Ties on the ordering column must be broken by id.
+        IngestionData.objects.update(createdAt=now())
+
+    def _page(self, url):
+        paginator = KeysetPagination()
+        rows = paginator.paginate_queryset(IngestionData.objects.all(), Request(APIRequestFactory().get(url)))
+        return [row.source for row in rows], paginator.get_paginated_response([]).data
+
+    def test_walks_forward_and_back_without_gaps(self):
+        seen = []
+        url = "/collect?page_size=3"
+        while url:
+            sources, body = self._page(url)
+            seen.extend(sources)
+            url = body["next"]
+        self.assertEqual(sorted(seen), sorted(f"s{i}" for i in range(7)))
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(body["count"], 7)
+
+        first, first_body = self._page("/collect?page_size=3&count=false")
+        second, second_body = self._page(first_body["next"])
+        back, _ = self._page(second_body["previous"])
+        self.assertEqual(back, first)
+        self.assertNotIn("count", first_body)
+        self.assertNotIn("count", second_body)
+
+    def test_rejects_tampered_cursor(self):
+        with self.assertRaises(InvalidCursor):
+            self._page("/collect?cursor=bm90LWEtY3Vyc29y")
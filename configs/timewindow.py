@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.timezone import get_current_timezone, is_naive, make_aware
+
+def parse_timestamp(value):
+    """Aware datetime from an ISO 8601 datetime or date string; raises ValueError otherwise.
+
+    Naive values are read in the project time zone; a bare date means its midnight.
+    """
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Not an ISO 8601 timestamp: {value!r}")
+        parsed = parse_datetime(f"{day.isoformat()}T00:00:00")
+    if settings.USE_TZ and is_naive(parsed):
+        parsed = make_aware(parsed, get_current_timezone())
+    return parsed
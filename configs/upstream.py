@@ -0,0 +1,288 @@
+"""Shared asyncio fetch engine for the paid upstream APIs (FMP, Alpha Vantage).
+
+Each upstream host gets its own keep-alive ``httpx.AsyncClient`` pool on a
+private event loop running in a daemon thread, so sync gunicorn workers can
+use it through ``run``/``get_json`` while ingestion fans out with ``gather``.
+Requests answered with 429/5xx or failing at the transport level are retried
+with jittered exponential backoff. The loop is started lazily and re-created
+after a fork. ``engine.aget_json_array`` parses the body as it streams in and
+drops the connection once enough elements have arrived. Coroutines from
+``engine.aget``/``engine.aget_json``/``engine.aget_json_array`` must be
+scheduled through ``engine.run`` or ``engine.gather``.
+"""
+import asyncio
+import atexit
+import json
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import httpx
+from django.conf import settings
+from configs.jsonstream import JSONArrayStream, NotAJSONArray
+
+DEFAULT_UPSTREAM_HTTP = {
+    "TIMEOUT": 15.0,
+    "CONNECT_TIMEOUT": 5.0,
+    "MAX_CONNECTIONS_PER_HOST": 5,
+    "MAX_KEEPALIVE_PER_HOST": 5,
+    "KEEPALIVE_EXPIRY": 30.0,
+    "RETRIES": 3,
+    "BACKOFF_BASE": 0.5,
+    "BACKOFF_MAX": 8.0,
+    "RETRY_STATUSES": (429, 500, 502, 503, 504),
+    # Per-host overrides of MAX_CONNECTIONS_PER_HOST / MAX_KEEPALIVE_PER_HOST, keyed by netloc.
+    "HOSTS": {},
+}
+
+def upstream_setting(name, host=None):
+    configured = getattr(settings, "UPSTREAM_HTTP", {})
+    if host is not None and name in configured.get("HOSTS", {}).get(host, {}):
+        return configured["HOSTS"][host][name]
+    return configured.get(name, DEFAULT_UPSTREAM_HTTP[name])
+
+def backoff_delay(attempt, retry_after=None):
+    """Full-jitter exponential backoff, never shorter than an upstream ``Retry-After``."""
+    cap = min(upstream_setting("BACKOFF_MAX"), upstream_setting("BACKOFF_BASE") * (2 ** attempt))
+    delay = random.uniform(0, cap)
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, upstream_setting("BACKOFF_MAX")))
+    return delay
+
+def parse_retry_after(response):
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+class HostPool:
+    """Keep-alive client plus slot accounting for one upstream host."""
+
+    def __init__(self, host, transport=None):
+        self.host = host
+        self.size = upstream_setting("MAX_CONNECTIONS_PER_HOST", host)
+        timeout = httpx.Timeout(upstream_setting("TIMEOUT"), connect=upstream_setting("CONNECT_TIMEOUT"))
+        limits = httpx.Limits(
+            max_connections=self.size,
+            max_keepalive_connections=min(self.size, upstream_setting("MAX_KEEPALIVE_PER_HOST", host)),
+            keepalive_expiry=upstream_setting("KEEPALIVE_EXPIRY"),
+        )
+        self.client = httpx.AsyncClient(timeout=timeout, limits=limits, transport=transport)
+        self.slots = asyncio.Semaphore(self.size)
+        self.in_use = 0
+        self.waiting = 0
+        self.stats = {
+            "requests": 0,
+            "retries": 0,
+            "errors": 0,
+            "peak_in_use": 0,
+            "peak_waiting": 0,
+            "exhausted": 0,
+            "wait_seconds": 0.0,
+        }
+
+    async def acquire(self):
+        if self.slots.locked():
+            self.stats["exhausted"] += 1
+        self.waiting += 1
+        self.stats["peak_waiting"] = max(self.stats["peak_waiting"], self.waiting)
+        started = time.monotonic()
+        try:
+            await self.slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.stats["wait_seconds"] += time.monotonic() - started
+        self.in_use += 1
+        self.stats["peak_in_use"] = max(self.stats["peak_in_use"], self.in_use)
+
+    def release(self):
+        self.in_use -= 1
+        self.slots.release()
+
+    def snapshot(self):
+        return {
+            "size": self.size,
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            **self.stats,
+            "wait_seconds": round(self.stats["wait_seconds"], 4),
+        }
+
+class UpstreamEngine:
+    def __init__(self, transport=None):
+        self._transport = transport
+        self._lock = threading.Lock()
+        self._pid = None
+        self._loop = None
+        self._thread = None
+        self._pools = {}
+
+    def configure(self, transport=None):
+        """Replace the client transport (e.g. ``httpx.MockTransport`` in tests) and restart lazily."""
+        self.close()
+        self._transport = transport
+
+    def _start(self):
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, name="upstream-http", daemon=True)
+        thread.start()
+        self._loop = loop
+        self._thread = thread
+        self._pools = {}
+        self._pid = os.getpid()
+
+    def _ensure_loop(self):
+        if self._loop is None or self._pid != os.getpid():
+            with self._lock:
+                if self._loop is None or self._pid != os.getpid():
+                    self._start()
+        return self._loop
+
+    def _get_pool(self, url):
+        # Only ever called from the engine loop, so no locking is needed here.
+        host = urlsplit(url).netloc
+        pool = self._pools.get(host)
+        if pool is None:
+            pool = HostPool(host, transport=self._transport)
+            self._pools[host] = pool
+        return pool
+
+    async def _send(self, pool, url, timeout=None, stream=False):
+        """Send a GET, retrying 429/5xx and transport errors with backoff.
+
+        With ``stream=True`` the returned response still holds its pool slot; the
+        caller must ``aclose`` it and call ``pool.release()``.
+        """
+        kwargs = {} if timeout is None else {"timeout": timeout}
+        retries = upstream_setting("RETRIES")
+        retry_statuses = upstream_setting("RETRY_STATUSES")
+        attempt = 0
+        while True:
+            pool.stats["requests"] += 1
+            await pool.acquire()
+            keep_slot = False
+            try:
+                request = pool.client.build_request("GET", url, **kwargs)
+                response = await pool.client.send(request, stream=stream)
+            except httpx.TransportError:
+                pool.stats["errors"] += 1
+                if attempt >= retries:
+                    raise
+                retry_after = None
+            else:
+                if response.status_code not in retry_statuses or attempt >= retries:
+                    if response.is_error:
+                        pool.stats["errors"] += 1
+                        if stream:
+                            await response.aclose()
+                        response.raise_for_status()
+                    keep_slot = stream
+                    return response
+                pool.stats["errors"] += 1
+                retry_after = parse_retry_after(response)
+                if stream:
+                    await response.aclose()
+            finally:
+                if not keep_slot:
+                    pool.release()
+            pool.stats["retries"] += 1
+            await asyncio.sleep(backoff_delay(attempt, retry_after))
+            attempt += 1
+
+    async def aget(self, url, timeout=None):
+        """GET ``url`` on the host's pooled client, retrying 429/5xx and transport errors with backoff."""
+        return await self._send(self._get_pool(url), url, timeout=timeout)
+
+    async def aiter_json_array(self, url, timeout=None):
+        """Yield the elements of a JSON array body as they arrive over the wire.
+
+        Closing the generator early closes the response, so the rest of the body
+        is never downloaded. A body that is not an array raises ``NotAJSONArray``
+        with the fully parsed body attached as ``payload``.
+        """
+        pool = self._get_pool(url)
+        response = await self._send(pool, url, timeout=timeout, stream=True)
+        try:
+            parser = JSONArrayStream()
+            chunks = response.aiter_text()
+            async for chunk in chunks:
+                try:
+                    elements = parser.feed(chunk)
+                except NotAJSONArray as e:
+                    body = chunk + "".join([rest async for rest in chunks])
+                    e.payload = json.loads(body)
+                    raise
+                for element in elements:
+                    yield element
+                if parser.done:
+                    return
+            for element in parser.close():
+                yield element
+        finally:
+            await response.aclose()
+            pool.release()
+
+    async def aget_json_array(self, url, limit, timeout=None):
+        """First ``limit`` elements of a JSON array body, stopping the download once they are parsed.
+
+        A non-array body (e.g. an upstream error object) is returned as parsed.
+        """
+        elements = []
+        stream = self.aiter_json_array(url, timeout=timeout)
+        try:
+            async for element in stream:
+                elements.append(element)
+                if len(elements) >= limit:
+                    break
+        except NotAJSONArray as e:
+            return e.payload
+        finally:
+            await stream.aclose()
+        return elements
+
+    async def aget_json(self, url, timeout=None):
+        response = await self.aget(url, timeout=timeout)
+        return response.json()
+
+    def run(self, coro):
+        """Run ``coro`` on the engine loop and block the calling thread until it finishes."""
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    def gather(self, coros):
+        """Run ``coros`` concurrently; failures come back as exception instances in their slot."""
+        async def _gather():
+            return await asyncio.gather(*coros, return_exceptions=True)
+        return self.run(_gather())
+
+    def pool_stats(self):
+        """Per-host pool counters; ``exhausted``/``peak_waiting`` show requests queued for a free slot."""
+        if self._loop is None or self._pid != os.getpid():
+            return {}
+        async def _snapshot():
+            return {host: pool.snapshot() for host, pool in self._pools.items()}
+        return self.run(_snapshot())
+
+    def close(self):
+        with self._lock:
+            loop, pools = self._loop, list(self._pools.values())
+            if loop is not None and self._pid == os.getpid():
+                for pool in pools:
+                    asyncio.run_coroutine_threadsafe(pool.client.aclose(), loop).result()
+                loop.call_soon_threadsafe(loop.stop)
+            self._loop = None
+            self._thread = None
+            self._pools = {}
+            self._pid = None
+
+engine = UpstreamEngine()
+atexit.register(engine.close)
+
+def pool_stats():
+    return engine.pool_stats()
+
+def get_json(url, timeout=None):
+    """Blocking bridge for sync views: GET ``url`` through the shared async client."""
+    return engine.run(engine.aget_json(url, timeout=timeout))
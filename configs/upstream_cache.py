@@ -0,0 +1,247 @@
+"""TTL + LRU cache for raw upstream payloads (FMP ``api_path``, Alpha Vantage ``topics``).
+
+The backend is chosen by ``UPSTREAM_CACHE["BACKEND"]``: ``locmem`` (per process),
+``file`` (shared by every worker on the host), ``django`` (any configured
+``CACHES`` alias) or ``none``. Lookups happen on the upstream engine loop;
+concurrent misses for the same key share a single upstream call.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+DEFAULT_UPSTREAM_CACHE = {
+    "BACKEND": "locmem",
+    "MAX_ENTRIES": 256,
+    "LOCATION": os.path.join(tempfile.gettempdir(), "economic-analysis-upstream-cache"),
+    "CACHE_ALIAS": "default",
+    "DEFAULT_TTL": 300,
+    "TTL": {},
+}
+
+def cache_setting(name):
+    return getattr(settings, "UPSTREAM_CACHE", {}).get(name, DEFAULT_UPSTREAM_CACHE[name])
+
+class LocMemBackend:
+    blocking = False
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class FileBackend:
+    """One JSON file per key; file mtime doubles as the LRU clock."""
+    blocking = True
+
+    def __init__(self, location, max_entries):
+        self.location = location
+        self.max_entries = max_entries
+        os.makedirs(location, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.location, hashlib.sha256(key.encode()).hexdigest() + ".json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry["expires_at"] <= time.time():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            # Removed by a concurrent clear/eviction since it was read.
+            return None
+        return entry["value"]
+
+    def set(self, key, value, ttl):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"expires_at": time.time() + ttl, "value": value}, f)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.location):
+            if name.endswith(".json"):
+                path = os.path.join(self.location, name)
+                try:
+                    entries.append((os.path.getmtime(path), path))
+                except OSError:
+                    continue
+        for _, path in sorted(entries)[:max(0, len(entries) - self.max_entries)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def clear(self):
+        for name in os.listdir(self.location):
+            if name.endswith(".json"):
+                os.remove(os.path.join(self.location, name))
+
+class DjangoCacheBackend:
+    """Delegates storage and eviction (``OPTIONS["MAX_ENTRIES"]``) to a Django cache alias.
+
+    The alias is usually shared with the rest of the project, so ``clear``
+    never flushes it: entries are stored under a generation number kept in the
+    alias, and ``clear`` bumps it. Older entries become unreachable and are
+    left to expire or be evicted; every other key in the alias is untouched.
+    """
+    blocking = True
+    key_prefix = "upstream:"
+
+    def __init__(self, alias):
+        from django.core.cache import caches
+        self.cache = caches[alias]
+
+    @property
+    def generation_key(self):
+        return self.key_prefix + "generation"
+
+    def _key(self, key):
+        generation = self.cache.get(self.generation_key)
+        if generation is None:
+            self.cache.add(self.generation_key, 1, timeout=None)
+            generation = self.cache.get(self.generation_key, 1)
+        return f"{self.key_prefix}{generation}:{key}"
+
+    def get(self, key):
+        return self.cache.get(self._key(key))
+
+    def set(self, key, value, ttl):
+        self.cache.set(self._key(key), value, timeout=ttl)
+
+    def clear(self):
+        try:
+            self.cache.incr(self.generation_key)
+        except ValueError:
+            self.cache.add(self.generation_key, 2, timeout=None)
+
+def build_backend():
+    backend = cache_setting("BACKEND")
+    if backend == "none":
+        return None
+    if backend == "locmem":
+        return LocMemBackend(cache_setting("MAX_ENTRIES"))
+    if backend == "file":
+        return FileBackend(cache_setting("LOCATION"), cache_setting("MAX_ENTRIES"))
+    if backend == "django":
+        return DjangoCacheBackend(cache_setting("CACHE_ALIAS"))
+    raise ValueError(f"Unknown UPSTREAM_CACHE backend: {backend}")
+
+class ResponseCache:
+    def __init__(self):
+        self._backend = None
+        self._backend_name = None
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "coalesced": 0}
+
+    @property
+    def backend(self):
+        name = cache_setting("BACKEND")
+        if self._backend_name != name:
+            with self._lock:
+                if self._backend_name != name:
+                    self._backend = build_backend()
+                    self._backend_name = name
+        return self._backend
+
+    def ttl_for(self, key):
+        return cache_setting("TTL").get(key, cache_setting("DEFAULT_TTL"))
+
+    async def _call(self, backend, method, *args):
+        if backend.blocking:
+            return await asyncio.to_thread(getattr(backend, method), *args)
+        return getattr(backend, method)(*args)
+
+    async def aget_or_fetch(self, key, fetch, ttl_key=None, cacheable=None):
+        """Return the cached payload for ``key`` or await ``fetch()`` and store it.
+
+        The TTL is looked up under ``ttl_key`` when given, so variants of one
+        endpoint (e.g. a truncated stock list) share the endpoint's TTL. When
+        ``cacheable`` is given, payloads it rejects (upstream error bodies sent
+        with a 200) are returned but not stored.
+        """
+        backend = self.backend
+        ttl = self.ttl_for(ttl_key or key)
+        if backend is None or ttl <= 0:
+            return await fetch()
+
+        cached = await self._call(backend, "get", key)
+        if cached is not None:
+            self.stats["hits"] += 1
+            return cached
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(pending)
+
+        self.stats["misses"] += 1
+        pending = asyncio.ensure_future(fetch())
+        self._inflight[key] = pending
+        try:
+            value = await pending
+        finally:
+            self._inflight.pop(key, None)
+        if cacheable is None or cacheable(value):
+            await self._call(backend, "set", key, value, ttl)
+            self.stats["stores"] += 1
+        return value
+
+    def snapshot(self):
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            "backend": cache_setting("BACKEND"),
+            **self.stats,
+            "hit_ratio": round(self.stats["hits"] / lookups, 4) if lookups else None,
+        }
+
+    def clear(self):
+        backend = self.backend
+        if backend is not None:
+            backend.clear()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "coalesced": 0}
+
+response_cache = ResponseCache()
@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
-from configs.views import HomePage, ErrorPage
+from configs.views import HomePage, ErrorPage, UpstreamViewSet
 from financeApp.urls import financeApp_urlpatterns
 from economyApp.urls import economyApp_urlpatterns
 from trendApp.urls import trendApp_urlpatterns
@@ -11,6 +11,7 @@ from cleaningApp.urls import cleaningApp_urlpatterns
 from transformationApp.urls import transformationApp_urlpatterns
 from visualizationApp.urls import visualizationApp_urlpatterns
 from restoreApp.urls import restoreApp_urlpatterns
+from pipelineApp.urls import pipelineApp_urlpatterns
 
 handler400 = lambda request, exception: ErrorPage(request, exception, 400)
 handler403 = lambda request, exception: ErrorPage(request, exception, 403)
@@ -18,6 +19,7 @@ handler404 = lambda request, exception: ErrorPage(request, exception, 404)
 handler500 = lambda request: ErrorPage(request, None, 500)
 
 router = DefaultRouter(trailing_slash=False)
+router.register(r'upstream', UpstreamViewSet, basename='upstream')
 
 ingestionUrl_urlpatterns = [
     path('', include(router.urls)),
@@ -35,6 +37,7 @@ urlpatterns = [
     path("services/v1/", include((transformationApp_urlpatterns, "transformationApp"), namespace="transformationApp")),
     path("services/v1/", include((visualizationApp_urlpatterns, "visualizationApp"), namespace="visualizationApp")),
     path("services/v1/", include((restoreApp_urlpatterns, "restoreApp"), namespace="restoreApp")),
+    path("services/v1/", include((pipelineApp_urlpatterns, "pipelineApp"), namespace="pipelineApp")),
     path("services/schema/", SpectacularAPIView.as_view(), name="schema"),
     path("services/docs/", SpectacularSwaggerView.as_view(url_name="schema"), name="swagger-ui"),
     path("services/redoc/", SpectacularRedocView.as_view(url_name="schema"), name="redoc"),
@@ -18,6 +18,18 @@ def error_response(message="Request failed", code=400, data=None):
         "messages": message
     }, status=code)
 
+class StageError(Exception):
+    """Raised by an in-process pipeline stage; ``code`` is the HTTP status the view should return."""
+
+    def __init__(self, message, code=status.HTTP_500_INTERNAL_SERVER_ERROR, data=None):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+        self.data = data
+
+def stage_error_response(exc):
+    return error_response(message=exc.message, code=exc.code, data=exc.data)
+
 def custom_exception_handler(exc, context):
     response = exception_handler(exc, context)
 
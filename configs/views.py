@@ -1,4 +1,11 @@
 from django.shortcuts import render
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from drf_spectacular.utils import extend_schema, OpenApiResponse
+from configs.ratelimit import quotas
+from configs.upstream import pool_stats
+from configs.upstream_cache import response_cache
+from configs.utils import success_response
 
 
 def HomePage(request):
@@ -8,4 +15,19 @@ def HomePage(request):
 def ErrorPage(request, exception=None, status_code=500):
     error_message = str(exception) if exception else "Something went wrong"
     context = {"status_code": status_code, "error_message": error_message}
-    return render(request, "error.html", context, status=status_code)
\ No newline at end of file
+    return render(request, "error.html", context, status=status_code)
+
+
+class UpstreamViewSet(viewsets.ViewSet):
+    @extend_schema(
+        summary="Upstream connection pool, cache and quota statistics",
+        description="Per-host pool size, slots in use, queued requests, retries and errors, response cache hit/miss counters and API key quota usage for this worker process",
+        tags=["Upstream"],
+        responses={200: OpenApiResponse(description="Pool statistics fetched successfully")},
+    )
+    @action(detail=False, methods=["get"], url_path="stats")
+    def pool_stats(self, request):
+        return success_response(
+            data={"pools": pool_stats(), "cache": response_cache.snapshot(), "quotas": quotas.snapshot()},
+            message="Upstream statistics fetched successfully"
+        )
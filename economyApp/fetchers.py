@@ -0,0 +1,49 @@
+import os
+from dotenv import load_dotenv
+from configs.ratelimit import acquire_quota
+from configs.upstream import engine
+from configs.upstream_cache import response_cache
+
+load_dotenv()
+
+ALPHA_API_KEY = os.getenv("ALPHA_API_KEY")
+ALPHA_BASE_URL = os.getenv("ALPHA_BASE_URL")
+
+# Keyed by the url_path of the matching AnalyticSentimentViewSet action.
+ALPHA_TOPICS = {
+    "fiscal": "economy_fiscal",
+    "monetary": "economy_monetary",
+    "macro": "economy_macro",
+}
+
+def alpha_vantage_url(topics: str):
+    return f"{ALPHA_BASE_URL}/query?function=NEWS_SENTIMENT&apikey={ALPHA_API_KEY}&topics={topics}"
+
+def alpha_vantage_cache_key(topics: str):
+    return f"alpha:{topics}"
+
+# Alpha Vantage answers errors and rate-limit notices with a 200 and one of these keys.
+ALPHA_ERROR_KEYS = ("Error Message", "Note", "Information")
+
+def is_alpha_vantage_feed(payload):
+    return isinstance(payload, dict) and not any(key in payload for key in ALPHA_ERROR_KEYS)
+
+async def afetch_alpha_vantage_data(topics: str, quota_wait: float = None, spread: bool = False):
+    """Fetch the Alpha Vantage news sentiment feed for ``topics`` on the shared upstream engine.
+
+    Served from the upstream response cache while its TTL holds; a miss first takes a
+    token from the ``ALPHA_API_KEY`` quota (see ``configs.ratelimit``). Raises
+    ``httpx.HTTPError`` on transport or HTTP errors, ``ValueError`` when the body is not
+    JSON and ``QuotaExceeded`` when no token is available within ``quota_wait`` seconds.
+    """
+    async def fetch():
+        await acquire_quota("alpha", ALPHA_API_KEY, max_wait=quota_wait, spread=spread)
+        return await engine.aget_json(alpha_vantage_url(topics))
+
+    return await response_cache.aget_or_fetch(alpha_vantage_cache_key(topics), fetch, cacheable=is_alpha_vantage_feed)
+
+def afetch_alpha_vantage_endpoint(name: str, **quota_options):
+    return afetch_alpha_vantage_data(ALPHA_TOPICS[name], **quota_options)
+
+def fetch_alpha_vantage_data(topics: str):
+    return engine.run(afetch_alpha_vantage_data(topics))
@@ -1,29 +1,50 @@
 import os
+import httpx
 from django.urls import reverse
+from django.test import override_settings
 from rest_framework.test import APITestCase
 from rest_framework import status
-from unittest.mock import patch, MagicMock
-import requests # Required for requests.exceptions.RequestException
+from configs.upstream import engine
+from configs.upstream_cache import response_cache
 
 # Ensure .env is loaded for tests if not already handled by manage.py test
 from dotenv import load_dotenv
 load_dotenv()
 
 
+# API key quotas are covered in configs.tests; keep these calls from sharing the on-disk buckets.
+@override_settings(UPSTREAM_QUOTA={"LIMITS": {}})
 class AnalyticSentimentViewSetTests(APITestCase):
-    @patch('economyApp.views.requests.get')
-    def test_get_economy_fiscal_sentiment_success(self, mock_get):
-        # Configure the mock_get object for a successful response
+    def setUp(self):
+        self.requested_urls = []
+        response_cache.clear()
+
+    def tearDown(self):
+        engine.configure(transport=None)
+
+    def _mock_upstream(self, handler):
+        # Route the shared upstream client through an in-memory transport and record every call
+        def recording_handler(request):
+            self.requested_urls.append(str(request.url))
+            return handler(request)
+        engine.configure(transport=httpx.MockTransport(recording_handler))
+
+    def _expected_url(self):
+        ALPHA_API_KEY = os.getenv("ALPHA_API_KEY")
+        ALPHA_BASE_URL = os.getenv("ALPHA_BASE_URL")
+        # Ensure these are not None for the test to be meaningful
+        self.assertIsNotNone(ALPHA_API_KEY, "ALPHA_API_KEY should be set in environment for this test")
+        self.assertIsNotNone(ALPHA_BASE_URL, "ALPHA_BASE_URL should be set in environment for this test")
+        return f"{ALPHA_BASE_URL}/query?function=NEWS_SENTIMENT&apikey={ALPHA_API_KEY}&topics=economy_fiscal"
+
+    def test_get_economy_fiscal_sentiment_success(self):
+        # Configure the upstream for a successful response
         mock_response_data = {'some': 'data', 'feed': [{'title': 'Fiscal News'}]}
-        mock_api_response = MagicMock()
-        mock_api_response.status_code = 200
-        mock_api_response.json.return_value = mock_response_data
-        # mock_api_response.raise_for_status = MagicMock() # Not strictly needed if status_code is 200
-        mock_get.return_value = mock_api_response
+        self._mock_upstream(lambda request: httpx.Response(200, json=mock_response_data))
 
         # Define expected values
         expected_success_message = "Fiscal economy data fetched successfully"
-        url = reverse('economyApp:economy-fiscal') # as derived
+        url = reverse('economyApp:economy-get-economy-fiscal-sentiment')
 
         # Make the GET request
         response = self.client.get(url)
@@ -36,26 +57,20 @@ class AnalyticSentimentViewSetTests(APITestCase):
         self.assertEqual(response.data['messages'], expected_success_message)
         self.assertEqual(response.data['data'], mock_response_data)
 
-        # Assert that requests.get was called correctly
-        ALPHA_API_KEY = os.getenv("ALPHA_API_KEY")
-        ALPHA_BASE_URL = os.getenv("ALPHA_BASE_URL")
-        # Ensure these are not None for the test to be meaningful
-        self.assertIsNotNone(ALPHA_API_KEY, "ALPHA_API_KEY should be set in environment for this test")
-        self.assertIsNotNone(ALPHA_BASE_URL, "ALPHA_BASE_URL should be set in environment for this test")
-        
-        expected_url = f"{ALPHA_BASE_URL}/query?function=NEWS_SENTIMENT&apikey={ALPHA_API_KEY}&topics=economy_fiscal"
-        mock_get.assert_called_once_with(expected_url)
-        mock_api_response.raise_for_status.assert_called_once()
+        # Assert that the upstream was called once with the expected URL
+        self.assertEqual(self.requested_urls, [self._expected_url()])
 
-
-    @patch('economyApp.views.requests.get')
-    def test_get_economy_fiscal_sentiment_api_error(self, mock_get):
-        # Configure the mock_get to raise a requests.exceptions.RequestException
+    @override_settings(UPSTREAM_HTTP={"RETRIES": 0})
+    def test_get_economy_fiscal_sentiment_api_error(self):
+        # Configure the upstream to fail at the transport level
         api_error_message = "API connection error"
-        mock_get.side_effect = requests.exceptions.RequestException(api_error_message)
+
+        def failing_handler(request):
+            raise httpx.ConnectError(api_error_message, request=request)
+        self._mock_upstream(failing_handler)
 
         # Define the URL
-        url = reverse('economyApp:economy-fiscal')
+        url = reverse('economyApp:economy-get-economy-fiscal-sentiment')
 
         # Make the GET request
         response = self.client.get(url)
@@ -67,43 +82,79 @@ class AnalyticSentimentViewSetTests(APITestCase):
         self.assertEqual(response.data['status'], 'error')
         self.assertEqual(response.data['messages'], api_error_message)
         self.assertIsNone(response.data['data'])
-        
-        # Assert that requests.get was called (even though it failed)
-        ALPHA_API_KEY = os.getenv("ALPHA_API_KEY")
-        ALPHA_BASE_URL = os.getenv("ALPHA_BASE_URL")
-        # Ensure these are not None for the test to be meaningful
-        self.assertIsNotNone(ALPHA_API_KEY, "ALPHA_API_KEY should be set in environment for this test")
-        self.assertIsNotNone(ALPHA_BASE_URL, "ALPHA_BASE_URL should be set in environment for this test")
 
-        expected_url = f"{ALPHA_BASE_URL}/query?function=NEWS_SENTIMENT&apikey={ALPHA_API_KEY}&topics=economy_fiscal"
-        mock_get.assert_called_once_with(expected_url)
-
-    @patch('economyApp.views.requests.get')
-    def test_get_economy_fiscal_sentiment_http_error(self, mock_get):
-        # Configure the mock_get object for a failed HTTP response (e.g., 401, 403, 429)
-        mock_api_response = MagicMock()
-        mock_api_response.status_code = 401 # Example: Unauthorized
-        mock_api_response.reason = "Unauthorized"
-        mock_api_response.json.return_value = {'error': 'Invalid API Key'}
-        # Configure raise_for_status to simulate an HTTPError
-        mock_api_response.raise_for_status.side_effect = requests.exceptions.HTTPError(
-            f"{mock_api_response.status_code} Client Error: {mock_api_response.reason} for url: FAKE_URL", 
-            response=mock_api_response
-        )
-        mock_get.return_value = mock_api_response
-
-        url = reverse('economyApp:economy-fiscal')
+        # Assert that the upstream was called (even though it failed)
+        self.assertEqual(self.requested_urls, [self._expected_url()])
+
+    def test_get_economy_fiscal_sentiment_http_error(self):
+        # Configure the upstream for a failed HTTP response (e.g., 401, 403, 429)
+        self._mock_upstream(lambda request: httpx.Response(401, json={'error': 'Invalid API Key'}))
+
+        url = reverse('economyApp:economy-get-economy-fiscal-sentiment')
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
         self.assertEqual(response.data['status'], 'error')
-        # The message in error_response comes from str(e), where e is RequestException.
-        # For HTTPError, this string representation includes the status code, reason, and URL.
-        self.assertTrue(f"{mock_api_response.status_code} Client Error: {mock_api_response.reason}" in response.data['messages'])
+        # The message in error_response comes from str(e), where e is httpx.HTTPStatusError,
+        # whose string representation includes the status code, reason, and URL.
+        self.assertTrue("401 Unauthorized" in response.data['messages'])
         self.assertIsNone(response.data['data'])
 
-        ALPHA_API_KEY = os.getenv("ALPHA_API_KEY")
-        ALPHA_BASE_URL = os.getenv("ALPHA_BASE_URL")
-        expected_url = f"{ALPHA_BASE_URL}/query?function=NEWS_SENTIMENT&apikey={ALPHA_API_KEY}&topics=economy_fiscal"
-        mock_get.assert_called_once_with(expected_url)
-        mock_api_response.raise_for_status.assert_called_once()
+        self.assertEqual(self.requested_urls, [self._expected_url()])
+
+    def test_get_economy_fiscal_sentiment_non_json_body(self):
+        # A maintenance page served with a 200 must surface as an upstream error, not an unhandled 500
+        self._mock_upstream(lambda request: httpx.Response(200, text='<html>Down for maintenance</html>'))
+
+        response = self.client.get(reverse('economyApp:economy-get-economy-fiscal-sentiment'))
+
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertEqual(response.data['status'], 'error')
+        self.assertTrue(response.data['messages'].startswith("Invalid upstream response"))
+        self.assertIsNone(response.data['data'])
+
+    @override_settings(UPSTREAM_HTTP={"RETRIES": 2, "BACKOFF_BASE": 0})
+    def test_get_economy_fiscal_sentiment_retries_transient_errors(self):
+        # Two 503s followed by a success should be retried transparently on the pooled client
+        responses = [httpx.Response(503), httpx.Response(503), httpx.Response(200, json={'feed': []})]
+        self._mock_upstream(lambda request: responses.pop(0))
+
+        response = self.client.get(reverse('economyApp:economy-get-economy-fiscal-sentiment'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.requested_urls, [self._expected_url()] * 3)
+        host_stats = engine.pool_stats()[httpx.URL(self._expected_url()).netloc.decode()]
+        self.assertEqual(host_stats["retries"], 2)
+        self.assertEqual(host_stats["in_use"], 0)
+
+    def test_get_economy_fiscal_sentiment_served_from_cache(self):
+        # A repeated dashboard load inside the TTL must not reach the upstream again
+        mock_response_data = {'feed': [{'title': 'Cached News'}]}
+        self._mock_upstream(lambda request: httpx.Response(200, json=mock_response_data))
+        url = reverse('economyApp:economy-get-economy-fiscal-sentiment')
+
+        first = self.client.get(url)
+        second = self.client.get(url)
+
+        self.assertEqual(first.data['data'], mock_response_data)
+        self.assertEqual(second.data['data'], mock_response_data)
+        self.assertEqual(self.requested_urls, [self._expected_url()])
+        self.assertEqual(response_cache.snapshot()['hits'], 1)
+        self.assertEqual(response_cache.snapshot()['misses'], 1)
+
+    def test_get_economy_fiscal_sentiment_error_payload_is_not_cached(self):
+        # Alpha Vantage reports rate limits with a 200; the notice must not be served from cache
+        responses = [
+            httpx.Response(200, json={'Information': 'API rate limit reached.'}),
+            httpx.Response(200, json={'feed': [{'title': 'Fresh News'}]}),
+        ]
+        self._mock_upstream(lambda request: responses.pop(0))
+        url = reverse('economyApp:economy-get-economy-fiscal-sentiment')
+
+        first = self.client.get(url)
+        second = self.client.get(url)
+
+        self.assertEqual(first.data['data'], {'Information': 'API rate limit reached.'})
+        self.assertEqual(second.data['data'], {'feed': [{'title': 'Fresh News'}]})
+        self.assertEqual(len(self.requested_urls), 2)
+        self.assertEqual(response_cache.snapshot()['stores'], 1)
@@ -0,0 +1,107 @@
+import os
+from dotenv import load_dotenv
+from configs.ratelimit import acquire_quota
+from configs.upstream import engine
+from configs.upstream_cache import response_cache
+from financeApp.projection import project_rows
+from financeApp.serializers import (
+    StockDataSerializer,
+    MarketActiveStockSerializer,
+    SectorPerformanceSerializer,
+    CryptoDataSerializer,
+    DowntrendStockSerializer,
+)
+
+load_dotenv()
+
+FMP_API_KEY = os.getenv("FMP_API_KEY")
+FMP_BASE_URL = os.getenv("FMP_BASE_URL")
+
+# Keyed by the url_path of the matching FinancialDataViewSet action, so the
+# views and the in-process ingestion stage resolve the same upstream call.
+FMP_ENDPOINTS = {
+    "stocks": {
+        "api_path": "stock/list",
+        "serializer_class": StockDataSerializer,
+        "success_message": "Stock list fetched successfully.",
+        "data_limit": 100,
+    },
+    "volume": {
+        "api_path": "stock_market/actives",
+        "serializer_class": MarketActiveStockSerializer,
+        "success_message": "High volume stocks fetched successfully.",
+        "data_limit": None,
+    },
+    "sector": {
+        "api_path": "sector-performance",
+        "serializer_class": SectorPerformanceSerializer,
+        "success_message": "Sector performance data retrieved.",
+        "data_limit": None,
+    },
+    "crypto": {
+        "api_path": "symbol/available-cryptocurrencies",
+        "serializer_class": CryptoDataSerializer,
+        "success_message": "Cryptocurrency data fetched.",
+        "data_limit": 100,
+    },
+    "downtrend": {
+        "api_path": "stock_market/losers",
+        "serializer_class": DowntrendStockSerializer,
+        "success_message": "Top downtrend stocks retrieved.",
+        "data_limit": 100,
+    },
+}
+
+def fmp_url(api_path: str):
+    return f"{FMP_BASE_URL}/{api_path}?apikey={FMP_API_KEY}"
+
+def fmp_cache_key(api_path: str, data_limit: int = None):
+    key = f"fmp:{api_path}"
+    return key if data_limit is None else f"{key}[:{data_limit}]"
+
+async def afetch_fmp_data(api_path: str, serializer_class, data_limit: int = None, quota_wait: float = None, spread: bool = False):
+    """Fetch an FMP endpoint on the shared upstream engine and return the validated rows.
+
+    With ``data_limit`` the body is parsed as a stream and the connection is
+    closed once that many rows have arrived, so long symbol lists are never
+    downloaded in full. The raw payload is served from the upstream response
+    cache while its TTL holds; a miss first takes a token from the
+    ``FMP_API_KEY`` quota (see ``configs.ratelimit``).
+
+    Rows are checked against ``serializer_class`` by the compiled projection in
+    ``financeApp.projection``. Raises ``httpx.HTTPError`` on transport or HTTP
+    errors, ``ValueError`` when the body is not JSON, DRF's
+    ``ValidationError`` when the upstream payload does not
+    match the serializer and ``QuotaExceeded`` when no quota token is
+    available within ``quota_wait`` seconds.
+    """
+    url = fmp_url(api_path)
+
+    async def fetch():
+        await acquire_quota("fmp", FMP_API_KEY, max_wait=quota_wait, spread=spread)
+        if data_limit is None:
+            return await engine.aget_json(url)
+        return await engine.aget_json_array(url, data_limit)
+
+    # FMP reports errors as a JSON object with a 200; only row lists are cached.
+    raw_data = await response_cache.aget_or_fetch(
+        fmp_cache_key(api_path, data_limit), fetch, ttl_key=fmp_cache_key(api_path),
+        cacheable=lambda payload: isinstance(payload, list),
+    )
+
+    if data_limit is not None and isinstance(raw_data, list):
+        raw_data = raw_data[:data_limit]
+
+    return project_rows(serializer_class, raw_data)
+
+def afetch_fmp_endpoint(name: str, **quota_options):
+    endpoint = FMP_ENDPOINTS[name]
+    return afetch_fmp_data(
+        api_path=endpoint["api_path"],
+        serializer_class=endpoint["serializer_class"],
+        data_limit=endpoint["data_limit"],
+        **quota_options,
+    )
+
+def fetch_fmp_data(api_path: str, serializer_class, data_limit: int = None):
+    return engine.run(afetch_fmp_data(api_path, serializer_class, data_limit=data_limit))
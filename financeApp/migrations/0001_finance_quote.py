@@ -0,0 +1,34 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FinanceQuote',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('batchId', models.UUIDField()),
+                ('source', models.CharField(max_length=255)),
+                ('symbol', models.CharField(max_length=64)),
+                ('name', models.CharField(blank=True, default='', max_length=255)),
+                ('sector', models.CharField(blank=True, default='', max_length=128)),
+                ('price', models.FloatField(blank=True, null=True)),
+                ('change', models.FloatField(blank=True, null=True)),
+                ('changesPercentage', models.FloatField(blank=True, null=True)),
+                ('createdAt', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'tb_finance_quote',
+                'indexes': [models.Index(fields=['symbol', '-createdAt', '-id'], name='tb_finance_quote_symbol_idx')],
+                'constraints': [models.UniqueConstraint(fields=('batchId', 'source', 'symbol'), name='tb_finance_quote_run_symbol_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import models
+
+class FinanceQuote(models.Model):
+    """One typed row per symbol of an ingested FMP snapshot, for per-symbol history queries.
+
+    Sector performance rows use the sector name as ``symbol``.
+    """
+    batchId = models.UUIDField()
+    source = models.CharField(max_length=255)
+    symbol = models.CharField(max_length=64)
+    name = models.CharField(max_length=255, blank=True, default='')
+    sector = models.CharField(max_length=128, blank=True, default='')
+    price = models.FloatField(null=True, blank=True)
+    change = models.FloatField(null=True, blank=True)
+    changesPercentage = models.FloatField(null=True, blank=True)
+    createdAt = models.DateTimeField()
+
+    class Meta:
+        db_table = 'tb_finance_quote'
+        constraints = [
+            models.UniqueConstraint(fields=['batchId', 'source', 'symbol'], name='tb_finance_quote_run_symbol_uniq'),
+        ]
+        indexes = [models.Index(fields=['symbol', '-createdAt', '-id'], name='tb_finance_quote_symbol_idx')]
+
+    def __str__(self):
+        return f"{self.symbol} @ {self.createdAt}"
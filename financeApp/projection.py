@@ -0,0 +1,129 @@
+"""Fast-path projection of FMP rows, compiled from the serializers in ``financeApp.serializers``.
+
+``project_rows(serializer_class, rows)`` returns what
+``serializer_class(data=rows, many=True)`` would return from ``.data`` after
+``is_valid(raise_exception=True)``. The plain ``CharField``/``FloatField``
+columns these serializers use are coerced in one loop per row. A row holding
+anything the loop cannot decide on its own (missing key, null, blank,
+non-ASCII text, booleans, nested values) goes through the DRF child
+serializer, so error messages and edge cases are DRF's own. Invalid rows are
+reported with the same ``ValidationError`` detail as the DRF path.
+"""
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+CHAR = "char"
+FLOAT = "float"
+
+class NeedsSlowPath(Exception):
+    """Raised inside the fast loop when a row must be validated by DRF."""
+
+def _field_kind(field):
+    """Return CHAR/FLOAT for fields whose DRF behaviour the fast loop reproduces exactly."""
+    if field.source != field.field_name or field.read_only or not field.required or field.allow_null:
+        return None
+    if type(field) is serializers.CharField:
+        plain = (
+            not field.allow_blank and field.trim_whitespace
+            and field.max_length is None and field.min_length is None
+            and len(field.validators) == 2
+        )
+        return CHAR if plain else None
+    if type(field) is serializers.FloatField:
+        plain = field.max_value is None and field.min_value is None and not field.validators
+        return FLOAT if plain else None
+    return None
+
+def _coerce_char(value):
+    value_type = type(value)
+    if value_type is str:
+        value = value.strip()
+        # Blank, NUL and surrogate checks stay with DRF.
+        if not value or "\x00" in value or not value.isascii():
+            raise NeedsSlowPath
+        return value
+    if value_type is int or value_type is float:
+        return str(value)
+    raise NeedsSlowPath
+
+def _coerce_float(value):
+    value_type = type(value)
+    if value_type is float:
+        return value
+    if value_type is int or (value_type is str and len(value) <= serializers.FloatField.MAX_STRING_LENGTH):
+        try:
+            return float(value)
+        except (ValueError, OverflowError):
+            raise NeedsSlowPath
+    raise NeedsSlowPath
+
+COERCERS = {CHAR: _coerce_char, FLOAT: _coerce_float}
+
+class RowProjection:
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self.child = serializer_class()
+        self.fields = None
+        fields = self.child.fields
+        kinds = [_field_kind(field) for field in fields.values()]
+        has_hooks = (
+            serializer_class.validate is not serializers.Serializer.validate
+            or self.child.validators
+            or any(hasattr(serializer_class, f"validate_{name}") for name in fields)
+        )
+        if None not in kinds and not has_hooks:
+            self.fields = tuple((name, COERCERS[kind]) for name, kind in zip(fields, kinds))
+
+    def _project_row(self, row):
+        if type(row) is not dict:
+            raise NeedsSlowPath
+        projected = {}
+        for name, coerce in self.fields:
+            if name not in row:
+                raise NeedsSlowPath
+            projected[name] = coerce(row[name])
+        return projected
+
+    def _validate_row(self, row):
+        """DRF path for one row: returns ``(data, errors)``."""
+        try:
+            validated = self.child.run_validation(row)
+        except ValidationError as exc:
+            return None, exc.detail
+        return dict(self.child.to_representation(validated)), {}
+
+    def __call__(self, rows):
+        if self.fields is None or type(rows) is not list:
+            serializer = self.serializer_class(data=rows, many=True)
+            serializer.is_valid(raise_exception=True)
+            return serializer.data
+
+        project_row = self._project_row
+        projected = []
+        invalid = {}
+        for index, row in enumerate(rows):
+            try:
+                projected.append(project_row(row))
+                continue
+            except NeedsSlowPath:
+                pass
+            data, row_errors = self._validate_row(row)
+            if row_errors:
+                invalid[index] = row_errors
+            else:
+                projected.append(data)
+
+        if invalid:
+            raise ValidationError([invalid.get(index, {}) for index in range(len(rows))])
+        return projected
+
+_projections = {}
+
+def get_projection(serializer_class):
+    projection = _projections.get(serializer_class)
+    if projection is None:
+        projection = _projections[serializer_class] = RowProjection(serializer_class)
+    return projection
+
+def project_rows(serializer_class, rows):
+    return get_projection(serializer_class)(rows)
@@ -0,0 +1,12 @@
+"""Serializers for stored FinanceQuote rows.
+
+Kept apart from ``financeApp.serializers`` so the upstream row serializers can
+be imported without the app registry (e.g. by ``benchmarks/fmp_projection.py``).
+"""
+from rest_framework import serializers
+from financeApp.models import FinanceQuote
+
+class FinanceQuoteSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = FinanceQuote
+        fields = ['symbol', 'name', 'sector', 'price', 'change', 'changesPercentage', 'source', 'batchId', 'createdAt']
@@ -0,0 +1,104 @@
+"""Typed FinanceQuote rows extracted from ingested FMP snapshots.
+
+``load_quotes`` writes the rows of one ingestion batch next to the JSON
+blobs. On PostgreSQL they are streamed with ``COPY`` into a temporary table
+and moved with one ``INSERT ... ON CONFLICT DO NOTHING``, so a retried batch
+does not fail on rows it already wrote. Other databases use ``bulk_create``.
+"""
+import io
+from datetime import datetime
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.db import connection
+
+from financeApp.models import FinanceQuote
+
+FINANCE_SERVICES_PREFIX = "/services/v1/finance/"
+QUOTE_COLUMNS = ('batchId', 'source', 'symbol', 'name', 'sector', 'price', 'change', 'changesPercentage', 'createdAt')
+
+def _float(value):
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        value = value.strip().rstrip('%')
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def _text(value, max_length):
+    return str(value)[:max_length] if value is not None else ''
+
+def quote_rows(source, content, batch_id, created_at):
+    """FinanceQuote instances for the records of one FMP snapshot; [] for other sources.
+
+    Records without a symbol (or sector) are skipped, and only the first
+    record of a symbol is kept, so ``(batchId, source, symbol)`` stays unique.
+    """
+    if not urlparse(source).path.startswith(FINANCE_SERVICES_PREFIX) or not isinstance(content, list):
+        return []
+    quotes = {}
+    for record in content:
+        if not isinstance(record, dict):
+            continue
+        symbol = _text(record.get('symbol') or record.get('sector'), 64)
+        if not symbol or symbol in quotes:
+            continue
+        quotes[symbol] = FinanceQuote(
+            batchId=batch_id,
+            source=source,
+            symbol=symbol,
+            name=_text(record.get('name'), 255),
+            sector=_text(record.get('sector'), 128),
+            price=_float(record.get('price')),
+            change=_float(record.get('change')),
+            changesPercentage=_float(record.get('changesPercentage')),
+            createdAt=created_at,
+        )
+    return list(quotes.values())
+
+def _csv_field(value):
+    # COPY ... (FORMAT csv) reads an unquoted empty field as NULL and "" as an empty string.
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        return '"' + value.replace('"', '""') + '"'
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+def _copy_quotes(quotes):
+    buffer = io.StringIO()
+    for quote in quotes:
+        buffer.write(','.join(_csv_field(getattr(quote, column)) for column in QUOTE_COLUMNS))
+        buffer.write('\n')
+    buffer.seek(0)
+    columns = ', '.join(f'"{column}"' for column in QUOTE_COLUMNS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'CREATE TEMPORARY TABLE tmp_finance_quote ON COMMIT DROP AS '
+            f'SELECT {columns} FROM tb_finance_quote WITH NO DATA'
+        )
+        cursor.cursor.copy_expert(f'COPY tmp_finance_quote ({columns}) FROM STDIN WITH (FORMAT csv)', buffer)
+        cursor.execute(
+            f'INSERT INTO tb_finance_quote ({columns}) SELECT {columns} FROM tmp_finance_quote '
+            'ON CONFLICT ("batchId", source, symbol) DO NOTHING'
+        )
+        cursor.execute('DROP TABLE tmp_finance_quote')
+
+def load_quotes(snapshots, batch_id, created_at):
+    """Write the quotes of ``snapshots`` (``(source, content)`` pairs); returns the number of rows offered.
+
+    Must run inside a transaction, like the ingestion write it accompanies.
+    """
+    quotes = [quote for source, content in snapshots for quote in quote_rows(source, content, batch_id, created_at)]
+    if not quotes:
+        return 0
+    if connection.vendor == 'postgresql':
+        _copy_quotes(quotes)
+    else:
+        FinanceQuote.objects.bulk_create(
+            quotes, batch_size=getattr(settings, 'PIPELINE_UPSERT_BATCH_SIZE', 500), ignore_conflicts=True
+        )
+    return len(quotes)
@@ -0,0 +1,130 @@
+import uuid
+from datetime import timedelta
+import httpx
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils.timezone import now
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from configs.upstream import engine
+from configs.upstream_cache import response_cache
+from financeApp.models import FinanceQuote
+from financeApp.projection import get_projection, project_rows
+from financeApp.quotes import load_quotes
+from financeApp.serializers import (
+    StockDataSerializer,
+    MarketActiveStockSerializer,
+    SectorPerformanceSerializer,
+)
+
+
+class RowProjectionTests(SimpleTestCase):
+    def _drf(self, serializer_class, rows):
+        serializer = serializer_class(data=rows, many=True)
+        serializer.is_valid(raise_exception=True)
+        return serializer.data
+
+    def _assert_same_as_drf(self, serializer_class, rows):
+        try:
+            expected = self._drf(serializer_class, rows)
+        except ValidationError as exc:
+            with self.assertRaises(ValidationError) as ctx:
+                project_rows(serializer_class, rows)
+            self.assertEqual(ctx.exception.detail, exc.detail)
+            return
+        self.assertEqual(project_rows(serializer_class, rows), expected)
+
+    def test_valid_rows_match_drf_output(self):
+        rows = [
+            {"symbol": " AAPL ", "name": "Apple Inc.", "price": 189, "exchange": "NASDAQ",
+             "exchangeShortName": "NASDAQ", "type": "stock", "extra": [1, 2]},
+            {"symbol": 7203, "name": "Société Générale", "price": "12.5", "exchange": "EURONEXT",
+             "exchangeShortName": "PAR", "type": "stock"},
+        ]
+        self._assert_same_as_drf(StockDataSerializer, rows)
+        self._assert_same_as_drf(SectorPerformanceSerializer, [{"sector": "Energy", "changesPercentage": 1.25}])
+
+    def test_invalid_rows_match_drf_errors(self):
+        rows = [
+            {"symbol": "A", "name": "A", "change": 1.0, "price": 2.0, "changesPercentage": 0.5},
+            {"symbol": "", "name": None, "change": "abc", "price": True, "changesPercentage": "1" * 1001},
+            {"symbol": "B\x00", "name": ["x"], "change": 10 ** 400, "price": 1},
+            "not a row",
+        ]
+        self._assert_same_as_drf(MarketActiveStockSerializer, rows)
+        self._assert_same_as_drf(MarketActiveStockSerializer, {"Error Message": "Invalid API KEY."})
+
+    def test_serializers_with_custom_validation_use_drf(self):
+        class BoundedSerializer(serializers.Serializer):
+            symbol = serializers.CharField(max_length=3)
+
+        self.assertIsNone(get_projection(BoundedSerializer).fields)
+        self._assert_same_as_drf(BoundedSerializer, [{"symbol": "ABCD"}, {"symbol": "ABC"}])
+
+
+class FinanceQuoteTests(TestCase):
+    volume = "http://testserver/services/v1/finance/volume"
+
+    def _load(self, price, created_at):
+        snapshots = [
+            (self.volume, [{"symbol": "AAA", "name": "A", "price": price, "change": "-1.5", "changesPercentage": None}, {"symbol": "AAA"}, "x"]),
+            ("http://testserver/services/v1/finance/sector", [{"sector": "Energy", "changesPercentage": "1.25%"}]),
+            ("http://testserver/services/v1/economy/macro", {"feed": []}),
+        ]
+        batch_id = uuid.uuid4()
+        self.assertEqual(load_quotes(snapshots, batch_id, created_at), 2)
+        self.assertEqual(load_quotes(snapshots, batch_id, created_at), 2)
+        return batch_id
+
+    def test_quotes_are_typed_and_unique_per_run(self):
+        self._load(10, now())
+        self.assertEqual(FinanceQuote.objects.count(), 2)
+        quote = FinanceQuote.objects.get(symbol="AAA")
+        self.assertEqual((quote.price, quote.change, quote.changesPercentage), (10.0, -1.5, None))
+        self.assertEqual(FinanceQuote.objects.get(symbol="Energy").changesPercentage, 1.25)
+
+    def test_history_endpoint_pages_newest_first(self):
+        self._load(10, now() - timedelta(days=1))
+        self._load(12, now())
+        url = reverse('financeApp:finance-quotes-history', kwargs={"symbol": "AAA"})
+
+        response = self.client.get(url, {"page_size": 1, "source": "/services/v1/finance/volume"})
+        self.assertEqual([row["price"] for row in response.data["results"]], [12.0])
+        response = self.client.get(response.data["next"])
+        self.assertEqual([row["price"] for row in response.data["results"]], [10.0])
+        self.assertEqual(self.client.get(url, {"since": "nope"}).status_code, 400)
+
+
+@override_settings(UPSTREAM_QUOTA={"LIMITS": {}})
+class FinancialDataViewSetTests(SimpleTestCase):
+    def setUp(self):
+        response_cache.clear()
+
+    def tearDown(self):
+        engine.configure(transport=None)
+
+    def test_error_payload_is_not_cached(self):
+        # FMP reports a bad key or plan limit as a JSON object with a 200
+        responses = [
+            httpx.Response(200, json={"Error Message": "Limit Reach."}),
+            httpx.Response(200, json=[{"sector": "Energy", "changesPercentage": "1.25%"}]),
+        ]
+        engine.configure(transport=httpx.MockTransport(lambda request: responses.pop(0)))
+        url = reverse('financeApp:finance-get-sector-performance')
+
+        self.assertEqual(self.client.get(url).status_code, 400)
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["data"], [{"sector": "Energy", "changesPercentage": "1.25%"}])
+        self.assertEqual(responses, [])
+        self.assertEqual(response_cache.snapshot()["stores"], 1)
+
+    def test_non_json_body_is_an_upstream_error(self):
+        engine.configure(transport=httpx.MockTransport(lambda request: httpx.Response(200, text="<html>Bad Gateway</html>")))
+
+        # Both the full-body and the streamed (``data_limit``) parse paths.
+        for url_name in ("finance-get-sector-performance", "finance-get-stock-list"):
+            response = self.client.get(reverse(f"financeApp:{url_name}"))
+            self.assertEqual(response.status_code, 500)
+            self.assertTrue(response.data["messages"].startswith("Invalid upstream response"))
@@ -1,9 +1,10 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from financeApp.views import FinancialDataViewSet
+from financeApp.views import FinancialDataViewSet, FinanceQuoteViewSet
 
 router = DefaultRouter(trailing_slash=False)
 
+router.register(r'finance/quotes', FinanceQuoteViewSet, basename='finance-quotes')
 router.register(r'finance', FinancialDataViewSet, basename='finance')
 
 financeApp_urlpatterns = [
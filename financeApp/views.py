@@ -1,7 +1,11 @@
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
-from drf_spectacular.utils import extend_schema, OpenApiResponse
+from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiParameter
+from drf_spectacular.types import OpenApiTypes
+from configs.pagination import KeysetPagination, PageQueryError
 from configs.utils import success_response, error_response
+from configs.ratelimit import QuotaExceeded
+from financeApp.models import FinanceQuote
 from financeApp.serializers import (
     StockDataSerializer,
     MarketActiveStockSerializer,
@@ -9,32 +13,25 @@ from financeApp.serializers import (
     CryptoDataSerializer,
     DowntrendStockSerializer,
 )
-import os
-import requests
-from dotenv import load_dotenv
-
-load_dotenv()
-
-FMP_API_KEY = os.getenv("FMP_API_KEY")
-FMP_BASE_URL = os.getenv("FMP_BASE_URL")
+from financeApp.quote_serializers import FinanceQuoteSerializer
+from financeApp.fetchers import FMP_ENDPOINTS, fetch_fmp_data
+import httpx
 
 class FinancialDataViewSet(viewsets.ViewSet):
     def _fetch_fmp_data(self, api_path: str, serializer_class, success_message: str, data_limit: int = None):
-        url = f"{FMP_BASE_URL}/{api_path}?apikey={FMP_API_KEY}"
         try:
-            response = requests.get(url)
-            response.raise_for_status()
-            raw_data = response.json()
-
-            if data_limit is not None:
-                raw_data = raw_data[:data_limit]
-
-            serializer = serializer_class(data=raw_data, many=True)
-            serializer.is_valid(raise_exception=True)
-
-            return success_response(data=serializer.data, message=success_message)
-        except requests.RequestException as e:
+            data = fetch_fmp_data(api_path, serializer_class, data_limit=data_limit)
+            return success_response(data=data, message=success_message)
+        except QuotaExceeded as e:
+            return error_response(message=str(e), code=status.HTTP_429_TOO_MANY_REQUESTS)
+        except httpx.HTTPError as e:
             return error_response(message=str(e), code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        except ValueError as e:
+            # A 200 whose body is not JSON (e.g. a proxy or maintenance page).
+            return error_response(message=f"Invalid upstream response: {e}", code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def _fetch_fmp_endpoint(self, name: str):
+        return self._fetch_fmp_data(**FMP_ENDPOINTS[name])
 
     @extend_schema(
         summary="Most searched stocks",
@@ -42,17 +39,13 @@ class FinancialDataViewSet(viewsets.ViewSet):
         tags=["Finance Raw Data"],
         responses={
             200: OpenApiResponse(response=StockDataSerializer(many=True)),
+            429: OpenApiResponse(description="Upstream API quota exhausted"),
             500: OpenApiResponse(description="Internal server error"),
         },
     )
     @action(detail=False, methods=["get"], url_path="stocks")
     def get_stock_list(self, request):
-        return self._fetch_fmp_data(
-            api_path="stock/list",
-            serializer_class=StockDataSerializer,
-            success_message="Stock list fetched successfully.",
-            data_limit=100
-        )
+        return self._fetch_fmp_endpoint("stocks")
 
     @extend_schema(
         summary="Market highest volume",
@@ -60,16 +53,13 @@ class FinancialDataViewSet(viewsets.ViewSet):
         tags=["Finance Raw Data"],
         responses={
             200: OpenApiResponse(response=MarketActiveStockSerializer(many=True)),
+            429: OpenApiResponse(description="Upstream API quota exhausted"),
             500: OpenApiResponse(description="Internal server error"),
         },
     )
     @action(detail=False, methods=["get"], url_path="volume")
     def get_market_highest_volume(self, request):
-        return self._fetch_fmp_data(
-            api_path="stock_market/actives",
-            serializer_class=MarketActiveStockSerializer,
-            success_message="High volume stocks fetched successfully."
-        )
+        return self._fetch_fmp_endpoint("volume")
 
     @extend_schema(
         summary="Most sector performance",
@@ -77,16 +67,13 @@ class FinancialDataViewSet(viewsets.ViewSet):
         tags=["Finance Raw Data"],
         responses={
             200: OpenApiResponse(response=SectorPerformanceSerializer(many=True)),
+            429: OpenApiResponse(description="Upstream API quota exhausted"),
             500: OpenApiResponse(description="Internal server error"),
         },
     )
     @action(detail=False, methods=["get"], url_path="sector")
     def get_sector_performance(self, request):
-        return self._fetch_fmp_data(
-            api_path="sector-performance",
-            serializer_class=SectorPerformanceSerializer,
-            success_message="Sector performance data retrieved."
-        )
+        return self._fetch_fmp_endpoint("sector")
 
     @extend_schema(
         summary="Most traded cryptocurrencies",
@@ -94,17 +81,13 @@ class FinancialDataViewSet(viewsets.ViewSet):
         tags=["Finance Raw Data"],
         responses={
             200: OpenApiResponse(response=CryptoDataSerializer(many=True)),
+            429: OpenApiResponse(description="Upstream API quota exhausted"),
             500: OpenApiResponse(description="Internal server error"),
         },
     )
     @action(detail=False, methods=["get"], url_path="crypto")
     def get_crypto_symbols(self, request):
-        return self._fetch_fmp_data(
-            api_path="symbol/available-cryptocurrencies",
-            serializer_class=CryptoDataSerializer,
-            success_message="Cryptocurrency data fetched.",
-            data_limit=100
-        )
+        return self._fetch_fmp_endpoint("crypto")
 
     @extend_schema(
         summary="Most stocks downtrend",
@@ -112,14 +95,48 @@ class FinancialDataViewSet(viewsets.ViewSet):
         tags=["Finance Raw Data"],
         responses={
             200: OpenApiResponse(response=DowntrendStockSerializer(many=True)),
+            429: OpenApiResponse(description="Upstream API quota exhausted"),
             500: OpenApiResponse(description="Internal Server Error"),
         },
     )
     @action(detail=False, methods=["get"], url_path="downtrend")
     def get_top_losers(self, request):
-        return self._fetch_fmp_data(
-            api_path="stock_market/losers",
-            serializer_class=DowntrendStockSerializer,
-            success_message="Top downtrend stocks retrieved.",
-            data_limit=100
-        )
+        return self._fetch_fmp_endpoint("downtrend")
+
+
+class QuotePagination(KeysetPagination):
+    ordering = '-createdAt'
+
+class FinanceQuoteViewSet(viewsets.ViewSet):
+    lookup_field = 'symbol'
+    lookup_value_regex = '[^/]+'
+
+    @extend_schema(
+        summary="Quote history of one symbol",
+        description="Price and change of a symbol in every ingested FMP snapshot, newest first, read from the indexed quote table",
+        tags=["Finance Quotes"],
+        parameters=[
+            OpenApiParameter(name='symbol', type=OpenApiTypes.STR, location=OpenApiParameter.PATH, description='Ticker symbol, or sector name for sector performance rows.'),
+            OpenApiParameter(name='source', type=OpenApiTypes.STR, description='Only rows of sources whose URL ends with this path, e.g. /services/v1/finance/volume.'),
+            OpenApiParameter(name='since', type=OpenApiTypes.DATETIME, description='Only rows with createdAt after this time.'),
+            OpenApiParameter(name='until', type=OpenApiTypes.DATETIME, description='Only rows with createdAt at or before this time.'),
+            OpenApiParameter(name='cursor', type=OpenApiTypes.STR, description='Opaque cursor taken from the next/previous link.'),
+            OpenApiParameter(name='page_size', type=OpenApiTypes.INT, description='Number of items per page.', default=50),
+            OpenApiParameter(name='count', type=OpenApiTypes.BOOL, description='Set false to skip the total row count.', default=True),
+        ],
+        responses={
+            200: OpenApiResponse(response=FinanceQuoteSerializer(many=True)),
+            400: OpenApiResponse(description="Invalid cursor or time filter"),
+        },
+    )
+    @action(detail=True, methods=["get"], url_path="history")
+    def history(self, request, symbol=None):
+        queryset = FinanceQuote.objects.filter(symbol=symbol)
+        if request.query_params.get('source'):
+            queryset = queryset.filter(source__endswith=request.query_params['source'])
+        paginator = QuotePagination()
+        try:
+            page = paginator.paginate_queryset(queryset, request)
+        except PageQueryError as e:
+            return error_response(message=str(e), data=[], code=status.HTTP_400_BAD_REQUEST)
+        return paginator.get_paginated_response(FinanceQuoteSerializer(page, many=True).data)
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:36
+
+from django.db import migrations, models
+
+
+def backfill_content_hash(apps, schema_editor):
+    from configs.hashing import content_hash
+
+    IngestionData = apps.get_model('ingestionApp', 'IngestionData')
+    batch = []
+    for row in IngestionData.objects.only('id', 'content').iterator(chunk_size=500):
+        row.contentHash = content_hash(row.content)
+        batch.append(row)
+        if len(batch) >= 500:
+            IngestionData.objects.bulk_update(batch, ['contentHash'])
+            batch = []
+    if batch:
+        IngestionData.objects.bulk_update(batch, ['contentHash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ingestionApp', '0002_alter_ingestiondata_createdat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingestiondata',
+            name='contentHash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='ingestiondata',
+            index=models.Index(fields=['source', 'contentHash'], name='tb_ingestion_source_hash_idx'),
+        ),
+        migrations.RunPython(backfill_content_hash, migrations.RunPython.noop),
+    ]
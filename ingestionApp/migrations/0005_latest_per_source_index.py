@@ -0,0 +1,21 @@
+# Generated by Django 5.2.1 on 2026-10-17 07:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ingestionApp', '0004_batch_id'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='ingestiondata',
+            name='tb_ingestion_source_hash_idx',
+        ),
+        migrations.AddIndex(
+            model_name='ingestiondata',
+            index=models.Index(fields=['source', '-createdAt'], name='tb_ingest_source_created_idx'),
+        ),
+    ]
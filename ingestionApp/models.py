@@ -3,11 +3,16 @@ from django.db import models
 class IngestionData(models.Model):
     content = models.JSONField()
     source = models.CharField(max_length=255)
+    # SHA-256 of the canonical JSON content; unchanged snapshots are not stored again.
+    contentHash = models.CharField(max_length=64, blank=True, default='')
+    batchId = models.UUIDField(null=True, blank=True, db_index=True)
     createdAt = models.DateTimeField(auto_now_add=True, db_index=True)
     updatedAt = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'tb_ingestion_data'
+        # Serves the newest-snapshot-per-source lookup of ``latest_content_hashes``.
+        indexes = [models.Index(fields=['source', '-createdAt'], name='tb_ingest_source_created_idx')]
 
     def __str__(self):
         return f"Ingestion from {self.source} at {self.createdAt}"
\ No newline at end of file
@@ -0,0 +1,125 @@
+import httpx
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.utils.timezone import now
+from configs.batches import new_batch_id
+from configs.endpoint import SERVICES_URL
+from configs.hashing import content_hash
+from configs.ratelimit import QuotaExceeded, quota_setting
+from configs.upstream import engine
+from economyApp.fetchers import afetch_alpha_vantage_endpoint
+from financeApp.fetchers import afetch_fmp_endpoint
+from financeApp.quotes import load_quotes
+from ingestionApp.models import IngestionData
+
+ECONOMY_SERVICES_PREFIX = "/services/v1/economy/"
+FINANCE_SERVICES_PREFIX = "/services/v1/finance/"
+
+def resolve_source_fetcher(endpoint_path):
+    """Coroutine that produces the ``data`` payload of a SERVICES_URL path in-process.
+
+    Ingestion calls are paced across the per-minute quota window and may queue
+    for ``INGESTION_WAIT_TIMEOUT`` seconds, longer than an interactive request.
+    """
+    quota_options = {"quota_wait": quota_setting("INGESTION_WAIT_TIMEOUT"), "spread": True}
+    if endpoint_path.startswith(ECONOMY_SERVICES_PREFIX):
+        return afetch_alpha_vantage_endpoint(endpoint_path[len(ECONOMY_SERVICES_PREFIX):], **quota_options)
+    if endpoint_path.startswith(FINANCE_SERVICES_PREFIX):
+        return afetch_fmp_endpoint(endpoint_path[len(FINANCE_SERVICES_PREFIX):], **quota_options)
+    raise KeyError(f"No in-process fetcher registered for {endpoint_path}")
+
+async def afetch_source(endpoint_path, base_url=""):
+    source_url = f"{base_url}{endpoint_path}"
+    try:
+        content = await resolve_source_fetcher(endpoint_path)
+        return {"type": "success", "url": source_url, "content": content}
+    except QuotaExceeded as e:
+        return {"type": "fail", "url": source_url, "error": f"QuotaExceeded: {str(e)}"}
+    except httpx.TimeoutException:
+        return {"type": "fail", "url": source_url, "error": "Request timed out"}
+    except httpx.HTTPError as e:
+        return {"type": "fail", "url": source_url, "error": f"RequestException: {str(e)}"}
+    except ValueError as e:
+        return {"type": "fail", "url": source_url, "error": f"ValueError/DataError: {str(e)}"}
+    except Exception as e:
+        return {"type": "fail", "url": source_url, "error": f"Unexpected error: {str(e)}"}
+
+def latest_content_hashes(sources):
+    """``{source: (id, contentHash)}`` of the newest stored snapshot of each source, in one query."""
+    newest = IngestionData.objects.filter(source=OuterRef('source')).order_by('-createdAt', '-id').values('id')[:1]
+    rows = (
+        IngestionData.objects.filter(source__in=list(sources), id=Subquery(newest))
+        .values_list('source', 'id', 'contentHash')
+    )
+    return {source: (row_id, row_hash) for source, row_id, row_hash in rows}
+
+def run_ingestion(base_url="", endpoints=None, batch_id=None):
+    """Fetch every configured source in-process and store one IngestionData row per changed payload.
+
+    ``base_url`` only prefixes the stored ``source`` so rows written by the HTTP
+    view and by the pipeline runner stay comparable. A payload whose content
+    hash matches the newest stored snapshot of its source is not stored again;
+    that row's ``updatedAt`` is touched instead. New rows are stamped with
+    ``batch_id`` (a fresh one by default), and the records of new FMP
+    snapshots are also written as typed FinanceQuote rows. Returns a dict with
+    the ``batch_id``, the stored ``ingested`` instances, the ``deduplicated``
+    source URLs, the ``quote_count`` and the ``failed_logs`` entries.
+    """
+    endpoints = SERVICES_URL if endpoints is None else endpoints
+    batch_id = batch_id or new_batch_id()
+    successful_requests_data = []
+    fail_logs = []
+
+    # All sources are requested concurrently, so a full run takes about as long as the slowest upstream.
+    for result in engine.gather([afetch_source(endpoint, base_url) for endpoint in endpoints]):
+        if result["type"] == "success":
+            result["hash"] = content_hash(result["content"])
+            successful_requests_data.append(result)
+        else:
+            fail_logs.append({"url": result["url"], "error": result["error"]})
+
+    ingested_instances = []
+    deduplicated_sources = []
+    quote_count = 0
+    if successful_requests_data:
+        try:
+            with transaction.atomic():
+                current_time = now()
+                latest = latest_content_hashes([data_item["url"] for data_item in successful_requests_data])
+                unchanged_ids = []
+                for data_item in successful_requests_data:
+                    previous = latest.get(data_item["url"])
+                    if previous is not None and previous[1] == data_item["hash"]:
+                        unchanged_ids.append(previous[0])
+                        deduplicated_sources.append(data_item["url"])
+                        continue
+                    ingested_instances.append(
+                        IngestionData(
+                            content=data_item["content"],
+                            source=data_item["url"],
+                            contentHash=data_item["hash"],
+                            batchId=batch_id,
+                            createdAt=current_time,
+                            updatedAt=current_time
+                        )
+                    )
+                if unchanged_ids:
+                    IngestionData.objects.filter(id__in=unchanged_ids).update(updatedAt=current_time)
+                ingested_instances = IngestionData.objects.bulk_create(ingested_instances)
+                quote_count = load_quotes(
+                    [(instance.source, instance.content) for instance in ingested_instances], batch_id, current_time
+                )
+        except Exception as e:
+            for data_item in successful_requests_data:
+                fail_logs.append({"url": data_item["url"], "error": f"Failed to save to DB: {str(e)}"})
+            ingested_instances = []
+            deduplicated_sources = []
+            quote_count = 0
+
+    return {
+        "batch_id": batch_id,
+        "ingested": ingested_instances,
+        "deduplicated": deduplicated_sources,
+        "quote_count": quote_count,
+        "failed_logs": fail_logs,
+    }
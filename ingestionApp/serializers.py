@@ -4,7 +4,7 @@ from ingestionApp.models import IngestionData
 class IngestionDataSerializer(serializers.ModelSerializer):
     class Meta:
         model = IngestionData
-        fields = ['id', 'content', 'source', 'createdAt', 'updatedAt']
+        fields = ['id', 'content', 'source', 'contentHash', 'batchId', 'createdAt', 'updatedAt']
 
 class GetIngestionDataSerializer(serializers.ModelSerializer):
     result = serializers.JSONField(source='content')
@@ -12,4 +12,4 @@ class GetIngestionDataSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = IngestionData
-        fields = ['id', 'result', 'source', 'updatedAt']
\ No newline at end of file
+        fields = ['id', 'result', 'source', 'batchId', 'updatedAt']
\ No newline at end of file
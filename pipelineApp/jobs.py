@@ -0,0 +1,156 @@
+"""Database-backed queue for pipeline runs requested over HTTP.
+
+The POST endpoints only insert a ``PipelineJob`` row; ``manage.py run_worker``
+processes claim rows with ``SELECT ... FOR UPDATE SKIP LOCKED``, so any number
+of workers on any number of nodes can drain the queue without two of them
+running the same job. While a stage runs, a heartbeat thread touches the
+job's ``updatedAt`` every ``PIPELINE_JOB_HEARTBEAT`` seconds; a running job
+whose worker stopped updating it for ``PIPELINE_JOB_STALE_AFTER`` seconds is
+handed to the next worker, up to ``PIPELINE_JOB_MAX_ATTEMPTS`` tries.
+"""
+import os
+import socket
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils.timezone import now
+from configs.utils import StageError
+from pipelineApp.models import PipelineJob
+from pipelineApp.runner import PIPELINE_STAGES, run_stage
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def enqueue_job(stages, base_url=""):
+    unknown = [stage for stage in stages if stage not in PIPELINE_STAGES]
+    if unknown:
+        raise ValueError(f"Unknown pipeline stage: {', '.join(unknown)}")
+    return PipelineJob.objects.create(stages=list(stages), baseUrl=base_url)
+
+def claim_job(worker_id):
+    """Lock the oldest runnable job, mark it running for ``worker_id`` and return it (or None)."""
+    stale_before = now() - timedelta(seconds=settings.PIPELINE_JOB_STALE_AFTER)
+    runnable = Q(status=PipelineJob.QUEUED) | Q(
+        status=PipelineJob.RUNNING,
+        updatedAt__lt=stale_before,
+        attempts__lt=settings.PIPELINE_JOB_MAX_ATTEMPTS,
+    )
+    with transaction.atomic():
+        job = (
+            PipelineJob.objects.select_for_update(skip_locked=True)
+            .filter(runnable)
+            .order_by('createdAt')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = PipelineJob.RUNNING
+        job.workerId = worker_id
+        job.attempts += 1
+        job.startedAt = now()
+        job.finishedAt = None
+        job.error = None
+        job.save(update_fields=['status', 'workerId', 'attempts', 'startedAt', 'finishedAt', 'error', 'updatedAt'])
+    return job
+
+def fail_exhausted_jobs():
+    """Give up on running jobs that went stale on their last allowed attempt."""
+    stale_before = now() - timedelta(seconds=settings.PIPELINE_JOB_STALE_AFTER)
+    return PipelineJob.objects.filter(
+        status=PipelineJob.RUNNING,
+        updatedAt__lt=stale_before,
+        attempts__gte=settings.PIPELINE_JOB_MAX_ATTEMPTS,
+    ).update(
+        status=PipelineJob.FAILED,
+        finishedAt=now(),
+        updatedAt=now(),
+        error={"message": "Worker stopped responding; attempts exhausted.", "code": 500, "data": None},
+    )
+
+def owned(job):
+    """``job``'s row while this attempt still holds it; empty once another worker has reclaimed it."""
+    return PipelineJob.objects.filter(
+        pk=job.pk, status=PipelineJob.RUNNING, workerId=job.workerId, attempts=job.attempts
+    )
+
+def save_owned(job, fields):
+    """Write ``fields`` of ``job`` only if this attempt still holds it; returns whether it did."""
+    values = {field: getattr(job, field) for field in fields}
+    values['updatedAt'] = now()
+    return owned(job).update(**values) == 1
+
+def abandon(job):
+    """Stop working on a job another worker took over and return it as that worker left it."""
+    job.refresh_from_db()
+    return job
+
+@contextmanager
+def heartbeat(job):
+    """Keep ``job`` from going stale while the body runs, until another worker takes it over."""
+    stopped = threading.Event()
+
+    def beat():
+        try:
+            while not stopped.wait(settings.PIPELINE_JOB_HEARTBEAT):
+                if not owned(job).update(updatedAt=now()):
+                    return
+        finally:
+            # The thread has its own database connection; don't leave it open.
+            connections.close_all()
+
+    thread = threading.Thread(target=beat, name=f"pipeline-job-{job.pk}-heartbeat", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        thread.join()
+
+def run_job(job):
+    """Run the job's stages in order, saving each stage summary as soon as it finishes.
+
+    Every write is conditional on this attempt still holding the job: if it
+    went stale and another worker reclaimed it, the run stops without
+    touching that worker's progress or outcome.
+    """
+    # Stages already finished by a previous attempt are not repeated.
+    for stage in job.stages:
+        if stage in job.result:
+            continue
+        job.currentStage = stage
+        if not save_owned(job, ['currentStage']):
+            return abandon(job)
+        try:
+            with heartbeat(job):
+                job.result[stage] = run_stage(stage, base_url=job.baseUrl, batch_id=job.batchId)
+        except StageError as e:
+            job.error = {"message": e.message, "code": e.code, "data": e.data, "stage": stage}
+        except Exception as e:
+            job.error = {"message": f"An unexpected error occurred: {str(e)}", "code": 500, "data": None, "stage": stage}
+        if job.error:
+            job.status = PipelineJob.FAILED
+            job.finishedAt = now()
+            if not save_owned(job, ['status', 'error', 'finishedAt']):
+                return abandon(job)
+            return job
+        job.batchId = job.result[stage].get("batch_id")
+        if not save_owned(job, ['result', 'batchId']):
+            return abandon(job)
+
+    job.status = PipelineJob.SUCCEEDED
+    job.currentStage = ""
+    job.finishedAt = now()
+    if not save_owned(job, ['status', 'currentStage', 'finishedAt']):
+        return abandon(job)
+    return job
+
+def work_once(worker_id=None):
+    """Claim and run a single job; returns the finished job or None when the queue is empty."""
+    fail_exhausted_jobs()
+    job = claim_job(worker_id or default_worker_id())
+    if job is None:
+        return None
+    return run_job(job)
@@ -0,0 +1,47 @@
+import json
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from configs.timewindow import parse_timestamp
+from configs.utils import StageError
+from pipelineApp.runner import PIPELINE_STAGES, run_pipeline
+
+class Command(BaseCommand):
+    help = "Run the ingestion, cleaning, transformation and visualization stages in-process."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--stage", action="append", choices=PIPELINE_STAGES, dest="stages",
+            help="Stage to run; repeat to run several. Defaults to the full pipeline."
+        )
+        parser.add_argument(
+            "--base-url", default=None,
+            help="Host prefix for stored source URLs. Defaults to settings.PIPELINE_BASE_URL."
+        )
+        parser.add_argument(
+            "--force", action="store_true",
+            help="Clean and transform every source even when its input is unchanged since the last run."
+        )
+        parser.add_argument(
+            "--since", default=None,
+            help="ISO 8601 timestamp; read only input rows newer than this instead of the stage watermark."
+        )
+        parser.add_argument(
+            "--until", default=None,
+            help="ISO 8601 timestamp; read only input rows up to and including this."
+        )
+
+    def handle(self, *args, **options):
+        stages = options["stages"] or PIPELINE_STAGES
+        base_url = options["base_url"] if options["base_url"] is not None else settings.PIPELINE_BASE_URL
+        try:
+            since = parse_timestamp(options["since"]) if options["since"] else None
+            until = parse_timestamp(options["until"]) if options["until"] else None
+        except ValueError as e:
+            raise CommandError(f"Invalid --since/--until timestamp: {e}")
+        try:
+            summary = run_pipeline(
+                base_url=base_url.rstrip("/"), stages=stages, force=options["force"], since=since, until=until
+            )
+        except StageError as e:
+            raise CommandError(e.message)
+        self.stdout.write(json.dumps(summary, indent=2, default=str))
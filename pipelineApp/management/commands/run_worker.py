@@ -0,0 +1,46 @@
+import signal
+import time
+from django.core.management.base import BaseCommand
+from pipelineApp.jobs import default_worker_id, work_once
+
+class Command(BaseCommand):
+    help = "Process queued pipeline jobs. Safe to run in several processes or on several nodes at once."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--poll-interval", type=float, default=2.0,
+            help="Seconds to sleep when the queue is empty."
+        )
+        parser.add_argument(
+            "--burst", action="store_true",
+            help="Exit once the queue is empty instead of polling."
+        )
+        parser.add_argument(
+            "--max-jobs", type=int, default=None,
+            help="Exit after processing this many jobs."
+        )
+
+    def handle(self, *args, **options):
+        worker_id = default_worker_id()
+        self.stopping = False
+        # Finish the job in hand before exiting on SIGTERM/SIGINT.
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        processed = 0
+        self.stdout.write(f"Worker {worker_id} started.")
+        while not self.stopping:
+            job = work_once(worker_id)
+            if job is None:
+                if options["burst"]:
+                    break
+                time.sleep(options["poll_interval"])
+                continue
+            processed += 1
+            self.stdout.write(f"Job {job.id} ({', '.join(job.stages)}) {job.status}.")
+            if options["max_jobs"] is not None and processed >= options["max_jobs"]:
+                break
+        self.stdout.write(f"Worker {worker_id} stopped after {processed} job(s).")
+
+    def _stop(self, signum, frame):
+        self.stopping = True
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:34
+
+import django.core.serializers.json
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PipelineJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('stages', models.JSONField(default=list)),
+                ('baseUrl', models.CharField(blank=True, default='', max_length=255)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='queued', max_length=16)),
+                ('currentStage', models.CharField(blank=True, default='', max_length=32)),
+                ('result', models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('error', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('workerId', models.CharField(blank=True, default='', max_length=255)),
+                ('createdAt', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('updatedAt', models.DateTimeField(auto_now=True)),
+                ('startedAt', models.DateTimeField(blank=True, null=True)),
+                ('finishedAt', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'tb_pipeline_job',
+                'ordering': ['createdAt'],
+                'indexes': [models.Index(fields=['status', 'createdAt'], name='tb_pipeline_job_queue_idx')],
+            },
+        ),
+    ]
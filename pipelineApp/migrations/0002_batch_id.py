@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pipelineApp', '0001_pipeline_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pipelinejob',
+            name='batchId',
+            field=models.UUIDField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pipelineApp', '0002_batch_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StageWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stage', models.CharField(max_length=32, unique=True)),
+                ('value', models.DateTimeField()),
+                ('updatedAt', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'tb_stage_watermark',
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+import uuid
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+class PipelineJob(models.Model):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (SUCCEEDED, "Succeeded"),
+        (FAILED, "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    stages = models.JSONField(default=list)
+    baseUrl = models.CharField(max_length=255, blank=True, default="")
+    batchId = models.UUIDField(null=True, blank=True)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=QUEUED)
+    currentStage = models.CharField(max_length=32, blank=True, default="")
+    result = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    error = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    attempts = models.PositiveIntegerField(default=0)
+    workerId = models.CharField(max_length=255, blank=True, default="")
+    createdAt = models.DateTimeField(auto_now_add=True, db_index=True)
+    updatedAt = models.DateTimeField(auto_now=True)
+    startedAt = models.DateTimeField(null=True, blank=True)
+    finishedAt = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "tb_pipeline_job"
+        ordering = ['createdAt']
+        indexes = [models.Index(fields=['status', 'createdAt'], name='tb_pipeline_job_queue_idx')]
+
+    def __str__(self):
+        return f"Pipeline job {self.id} ({', '.join(self.stages)}) {self.status}"
+
+class StageWatermark(models.Model):
+    """Newest input timestamp a stage has processed; the next run reads only rows after it."""
+    stage = models.CharField(max_length=32, unique=True)
+    value = models.DateTimeField()
+    updatedAt = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "tb_stage_watermark"
+
+    def __str__(self):
+        return f"{self.stage} watermark at {self.value}"
@@ -0,0 +1,63 @@
+from ingestionApp.pipeline import run_ingestion
+from cleaningApp.pipeline import run_cleaning
+from transformationApp.pipeline import run_transformation
+from visualizationApp.pipeline import run_visualization
+from configs.utils import StageError
+
+PIPELINE_STAGES = ["ingestion", "cleaning", "transformation", "visualization"]
+
+def run_stage(stage, base_url="", force=False, batch_id=None, since=None, until=None):
+    """Run one pipeline stage in-process and return a JSON-serializable summary.
+
+    ``batch_id`` is the batch the stage reads (and, for ingestion, writes); the
+    summary's ``batch_id`` is the one the stage actually used, to be handed to
+    the next stage. ``force`` makes cleaning and transformation reprocess
+    sources whose input is unchanged and makes the downstream stages ignore
+    their watermark. ``since``/``until`` replace the watermark with an explicit
+    window on the stage's input rows; ingestion ignores them.
+    """
+    if stage == "ingestion":
+        result = run_ingestion(base_url=base_url, batch_id=batch_id)
+        if result["failed_logs"] and not result["ingested"] and not result["deduplicated"]:
+            raise StageError("All requests failed. See logs for details.", data={"failed_logs": result["failed_logs"]})
+        summary = {
+            "ingested_count": len(result["ingested"]),
+            "deduplicated_count": len(result["deduplicated"]),
+            "quote_count": result["quote_count"],
+            "failed_count": len(result["failed_logs"]),
+            "failed_logs": result["failed_logs"],
+        }
+    elif stage == "cleaning":
+        result = run_cleaning(force=force, batch_id=batch_id, since=since, until=until)
+        summary = {
+            "cleaned_sources": [obj.source for obj in result["cleaned"]],
+            "unchanged_sources": result["unchanged"],
+            "inserted_count": result["inserted"],
+            "updated_count": result["updated"],
+        }
+    elif stage == "transformation":
+        result = run_transformation(force=force, batch_id=batch_id, since=since, until=until)
+        summary = {"transformed_count": len(result["transformed"]), "unchanged_count": len(result["unchanged"])}
+    elif stage == "visualization":
+        result = run_visualization(base_url=base_url, batch_id=batch_id, force=force, since=since, until=until)
+        analysis = result["analysis"]
+        summary = {"analysis_id": str(analysis.id) if analysis else None, "item_count": result["item_count"]}
+    else:
+        raise ValueError(f"Unknown pipeline stage: {stage}")
+    summary["batch_id"] = str(result["batch_id"]) if result["batch_id"] else None
+    return summary
+
+def run_pipeline(base_url="", stages=None, force=False, since=None, until=None):
+    """Run the stages in order, each reading its input straight from the previous stage's table.
+
+    The batch id of the first stage is threaded through the rest, so every stage
+    touches only the rows of this run. Stops at the first StageError, which
+    propagates to the caller.
+    """
+    stages = PIPELINE_STAGES if stages is None else stages
+    summary = {}
+    batch_id = None
+    for stage in stages:
+        summary[stage] = run_stage(stage, base_url=base_url, force=force, batch_id=batch_id, since=since, until=until)
+        batch_id = summary[stage]["batch_id"]
+    return summary
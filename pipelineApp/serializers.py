@@ -0,0 +1,27 @@
+from rest_framework import serializers
+from pipelineApp.models import PipelineJob
+
+class PipelineJobSerializer(serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField()
+    durationSeconds = serializers.SerializerMethodField()
+
+    class Meta:
+        model = PipelineJob
+        fields = [
+            'id', 'stages', 'batchId', 'status', 'currentStage', 'progress', 'result', 'error', 'attempts',
+            'workerId', 'createdAt', 'startedAt', 'finishedAt', 'durationSeconds',
+        ]
+
+    def get_progress(self, obj) -> dict:
+        completed = [stage for stage in obj.stages if stage in obj.result]
+        return {
+            "completed_stages": completed,
+            "completed": len(completed),
+            "total": len(obj.stages),
+        }
+
+    def get_durationSeconds(self, obj) -> float:
+        if obj.startedAt is None:
+            return None
+        finished = obj.finishedAt or obj.updatedAt
+        return round((finished - obj.startedAt).total_seconds(), 3)
@@ -0,0 +1,290 @@
+import time
+from datetime import timedelta
+from unittest.mock import patch
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.timezone import now
+from rest_framework import status
+from rest_framework.test import APITestCase
+from configs.utils import StageError
+from cleaningApp.models import CleaningData
+from cleaningApp.pipeline import WATERMARK_STAGE, run_cleaning
+from ingestionApp.models import IngestionData
+from ingestionApp.pipeline import latest_content_hashes, run_ingestion
+from pipelineApp.jobs import claim_job, work_once
+from pipelineApp.models import PipelineJob
+from pipelineApp.runner import run_pipeline
+from pipelineApp.watermarks import get_watermark
+
+class InProcessStageTests(TestCase):
+    @patch('ingestionApp.pipeline.afetch_fmp_endpoint')
+    @patch('ingestionApp.pipeline.afetch_alpha_vantage_endpoint')
+    def test_ingestion_calls_fetchers_without_http_loopback(self, mock_alpha, mock_fmp):
+        async def alpha(name, **quota_options):
+            return {"feed": [{"title": f"{name} news", "url": "http://x"}]}
+
+        async def fmp(name, **quota_options):
+            return [{"symbol": "AAA", "name": name}]
+
+        mock_alpha.side_effect = alpha
+        mock_fmp.side_effect = fmp
+
+        result = run_ingestion(base_url="http://testserver")
+
+        self.assertEqual(result["failed_logs"], [])
+        self.assertEqual(len(result["ingested"]), 8)
+        self.assertEqual(IngestionData.objects.count(), 8)
+        self.assertTrue(IngestionData.objects.filter(source="http://testserver/services/v1/finance/stocks").exists())
+
+    @patch('ingestionApp.pipeline.afetch_fmp_endpoint')
+    @patch('ingestionApp.pipeline.afetch_alpha_vantage_endpoint')
+    def test_unchanged_payloads_are_deduplicated(self, mock_alpha, mock_fmp):
+        sector = {"value": [{"sector": "Energy", "changesPercentage": "1.2"}]}
+
+        async def alpha(name, **quota_options):
+            return {"feed": [], "items": "0"}
+
+        async def fmp(name, **quota_options):
+            return [dict(row) for row in sector["value"]]
+
+        mock_alpha.side_effect = alpha
+        mock_fmp.side_effect = fmp
+
+        run_ingestion(base_url="http://testserver")
+        sector["value"] = [{"changesPercentage": "1.2", "sector": "Energy"}]
+        result = run_ingestion(base_url="http://testserver")
+
+        self.assertEqual(result["ingested"], [])
+        self.assertEqual(len(result["deduplicated"]), 8)
+        self.assertEqual(IngestionData.objects.count(), 8)
+
+        sector["value"] = [{"sector": "Energy", "changesPercentage": "2.4"}]
+        result = run_ingestion(base_url="http://testserver", endpoints=["/services/v1/finance/sector"])
+        self.assertEqual(len(result["ingested"]), 1)
+        self.assertEqual(IngestionData.objects.count(), 9)
+
+    def test_latest_content_hashes_takes_newest_row_per_source_in_one_query(self):
+        rows = IngestionData.objects.bulk_create([
+            IngestionData(source=f"http://testserver/{i % 3}", content={}, contentHash=f"h{i}") for i in range(9)
+        ])
+        for i, row in enumerate(rows):
+            IngestionData.objects.filter(pk=row.pk).update(createdAt=now() - timedelta(minutes=10 - i))
+
+        with self.assertNumQueries(1):
+            latest = latest_content_hashes(f"http://testserver/{i}" for i in range(4))
+
+        self.assertEqual(latest, {f"http://testserver/{i}": (rows[6 + i].pk, f"h{6 + i}") for i in range(3)})
+
+    def test_cleaning_skips_unchanged_sources(self):
+        source = "http://testserver/services/v1/finance/volume"
+        IngestionData.objects.create(source=source, content=[{"symbol": "A", "name": "a"}], contentHash="h1")
+
+        self.assertEqual(run_cleaning()["unchanged"], [])
+        IngestionData.objects.create(source=source, content=[{"symbol": "A", "name": "a"}], contentHash="h1")
+        second = run_cleaning()
+        self.assertEqual(second["unchanged"], [source])
+        self.assertFalse(second["cleaned"].exists())
+        self.assertTrue(run_cleaning(force=True)["cleaned"].exists())
+
+    def test_cleaning_upserts_in_bulk_and_keeps_created_at(self):
+        volume = "http://testserver/services/v1/finance/volume"
+        sector = "http://testserver/services/v1/finance/sector"
+        IngestionData.objects.create(source=volume, content=[{"symbol": "A", "name": "a"}])
+        first = run_cleaning()
+        self.assertEqual((first["inserted"], first["updated"]), (1, 0))
+        created_at = CleaningData.objects.get(source=volume).createdAt
+
+        IngestionData.objects.create(source=volume, content=[{"symbol": "B", "name": "b"}])
+        IngestionData.objects.create(source=sector, content=[{"sector": "Energy"}])
+        with CaptureQueriesContext(connection) as queries:
+            second = run_cleaning(upsert_batch_size=10)
+
+        self.assertEqual((second["inserted"], second["updated"]), (1, 1))
+        self.assertEqual(len([q for q in queries if q['sql'].startswith('INSERT INTO "tb_cleaning_data"')]), 1)
+        row = CleaningData.objects.get(source=volume)
+        self.assertEqual((row.content, row.createdAt), ([{"name": "b"}], created_at))
+        self.assertGreater(row.updatedAt, created_at)
+
+    def test_cleaning_reads_only_rows_past_its_watermark(self):
+        source = "http://testserver/services/v1/finance/volume"
+        first = IngestionData.objects.create(source=source, content=[{"symbol": "A", "name": "a"}], contentHash="a")
+        self.assertEqual(len(run_cleaning()["cleaned"]), 1)
+        self.assertEqual(get_watermark(WATERMARK_STAGE), first.createdAt)
+
+        # The overlap below the watermark is re-read, but its already-cleaned rows are not written again.
+        with CaptureQueriesContext(connection) as queries:
+            nothing_new = run_cleaning()
+        self.assertEqual((nothing_new["unchanged"], list(nothing_new["cleaned"])), ([source], []))
+        self.assertFalse([q for q in queries if 'tb_cleaning_data' in q['sql'] and not q['sql'].startswith('SELECT')])
+
+        with self.settings(PIPELINE_WATERMARK_OVERLAP=0), self.assertNumQueries(2):
+            nothing_new = run_cleaning()
+        self.assertEqual((nothing_new["unchanged"], list(nothing_new["cleaned"])), ([], []))
+
+        IngestionData.objects.create(source=source, content=[{"symbol": "B", "name": "b"}], contentHash="b")
+        cleaned = run_cleaning()["cleaned"]
+        self.assertEqual([obj.content for obj in cleaned], [[{"name": "b"}]])
+        replayed = run_cleaning(since=first.createdAt - timedelta(seconds=1), force=True)["cleaned"]
+        self.assertEqual([obj.content for obj in replayed], [[{"name": "b"}]])
+
+    def test_cleaning_picks_up_rows_committed_below_its_watermark(self):
+        volume = IngestionData.objects.create(
+            source="http://testserver/services/v1/finance/volume", content=[{"symbol": "A", "name": "a"}], contentHash="a"
+        )
+        run_cleaning()
+        # Stamped before the first run's row but committed after that run moved the watermark.
+        late = IngestionData.objects.create(
+            source="http://testserver/services/v1/finance/sector", content=[{"sector": "Energy"}], contentHash="e"
+        )
+        IngestionData.objects.filter(pk=late.pk).update(createdAt=volume.createdAt - timedelta(seconds=1))
+
+        cleaned = run_cleaning()["cleaned"]
+
+        self.assertEqual([row.source for row in cleaned], [late.source])
+
+    def test_collect_filters_by_since_and_until(self):
+        old = IngestionData.objects.create(source="http://testserver/a", content=[])
+        new = IngestionData.objects.create(source="http://testserver/b", content=[])
+        IngestionData.objects.filter(pk=old.pk).update(createdAt=now() - timedelta(days=2))
+        url = reverse('ingestionApp:ingestion-list-simple-ingested-data')
+
+        since = (now() - timedelta(days=1)).isoformat()
+        response = self.client.get(url, {"since": since})
+        self.assertEqual([row["id"] for row in response.data["results"]], [new.pk])
+        response = self.client.get(url, {"until": since})
+        self.assertEqual([row["id"] for row in response.data["results"]], [old.pk])
+        self.assertEqual(self.client.get(url, {"since": "yesterday"}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch('ingestionApp.pipeline.afetch_fmp_endpoint')
+    @patch('ingestionApp.pipeline.afetch_alpha_vantage_endpoint')
+    def test_batch_id_is_threaded_from_ingestion_to_cleaning(self, mock_alpha, mock_fmp):
+        async def alpha(name, **quota_options):
+            return {"feed": [{"title": f"{name} news", "url": "http://x"}]}
+
+        async def fmp(name, **quota_options):
+            return [{"symbol": "AAA", "name": name}]
+
+        mock_alpha.side_effect = alpha
+        mock_fmp.side_effect = fmp
+        IngestionData.objects.create(source="http://old/services/v1/finance/volume", content=[{"name": "stale"}])
+
+        summary = run_pipeline(base_url="http://testserver", stages=["ingestion", "cleaning"])
+
+        batch_id = summary["ingestion"]["batch_id"]
+        self.assertEqual(summary["cleaning"]["batch_id"], batch_id)
+        self.assertEqual(len(summary["cleaning"]["cleaned_sources"]), 8)
+        self.assertEqual(IngestionData.objects.filter(batchId=batch_id).count(), 8)
+        self.assertEqual(CleaningData.objects.filter(batchId=batch_id).count(), 8)
+        self.assertFalse(CleaningData.objects.filter(source__startswith="http://old").exists())
+
+        response = self.client.get(reverse('ingestionApp:ingestion-list-simple-ingested-data'), {"batch": batch_id, "count": "true"})
+        self.assertEqual(response.data['count'], 8)
+        response = self.client.get(reverse('ingestionApp:ingestion-list-simple-ingested-data'), {"batch": "nope"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cleaning_reads_latest_ingestion_row_per_source(self):
+        IngestionData.objects.create(source="http://testserver/services/v1/finance/volume", content=[{"symbol": "OLD", "name": "old"}])
+        IngestionData.objects.create(source="http://testserver/services/v1/finance/volume", content=[{"symbol": "NEW", "name": "new"}])
+        IngestionData.objects.create(
+            source="http://testserver/services/v1/economy/macro",
+            content={"items": "1", "feed": [{"title": "Macro", "url": "http://x", "authors": ["a"]}]},
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            cleaned = {obj.source: obj.content for obj in run_cleaning(chunk_size=1)["cleaned"]}
+
+        content_reads = [q for q in queries if '"tb_ingestion_data"."content"' in q['sql']]
+        self.assertEqual(len(content_reads), 2)
+
+        self.assertEqual(cleaned["http://testserver/services/v1/finance/volume"], [{"name": "new"}])
+        self.assertEqual(cleaned["http://testserver/services/v1/economy/macro"], {"items": "1", "feed": [{"title": "Macro"}]})
+        self.assertEqual(CleaningData.objects.count(), 2)
+
+
+class PipelineJobQueueTests(APITestCase):
+    @patch('pipelineApp.jobs.run_stage')
+    def test_post_queues_job_and_worker_reports_result(self, mock_run_stage):
+        mock_run_stage.return_value = {"cleaned_sources": ["http://testserver/services/v1/finance/volume"]}
+
+        response = self.client.post(reverse('cleaningApp:cleaning-process-and-clean-data'))
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['data']['status'], PipelineJob.QUEUED)
+        mock_run_stage.assert_not_called()
+
+        job = work_once("worker-a")
+        self.assertEqual(str(job.id), response.data['data']['id'])
+        mock_run_stage.assert_called_once_with("cleaning", base_url="http://testserver", batch_id=None)
+        self.assertIsNone(work_once("worker-b"))
+
+        job_status = self.client.get(reverse('pipelineApp:pipeline-jobs-detail', args=[job.id]))
+        self.assertEqual(job_status.data['data']['status'], PipelineJob.SUCCEEDED)
+        self.assertEqual(job_status.data['data']['result'], {"cleaning": mock_run_stage.return_value})
+        self.assertEqual(job_status.data['data']['progress']['completed'], 1)
+        self.assertEqual(job_status.data['data']['workerId'], "worker-a")
+        self.assertIsNotNone(job_status.data['data']['durationSeconds'])
+
+    @patch('pipelineApp.jobs.run_stage')
+    def test_stage_error_fails_job(self, mock_run_stage):
+        mock_run_stage.side_effect = StageError("scikit-learn is not installed", code=501)
+        PipelineJob.objects.create(stages=["transformation"])
+
+        job = work_once("worker-a")
+
+        self.assertEqual(job.status, PipelineJob.FAILED)
+        self.assertEqual(job.error["code"], 501)
+        self.assertEqual(job.error["stage"], "transformation")
+
+    @override_settings(PIPELINE_JOB_STALE_AFTER=60, PIPELINE_JOB_MAX_ATTEMPTS=2)
+    def test_stale_running_job_is_reclaimed(self):
+        job = PipelineJob.objects.create(stages=["cleaning"])
+        self.assertEqual(claim_job("worker-a").id, job.id)
+        self.assertIsNone(claim_job("worker-b"))
+
+        PipelineJob.objects.filter(pk=job.pk).update(updatedAt=now() - timedelta(minutes=5))
+        reclaimed = claim_job("worker-b")
+        self.assertEqual(reclaimed.workerId, "worker-b")
+        self.assertEqual(reclaimed.attempts, 2)
+
+        PipelineJob.objects.filter(pk=job.pk).update(updatedAt=now() - timedelta(minutes=5))
+        self.assertIsNone(work_once("worker-c"))
+        self.assertEqual(PipelineJob.objects.get(pk=job.pk).status, PipelineJob.FAILED)
+
+
+    @patch('pipelineApp.jobs.run_stage')
+    def test_reclaimed_job_is_abandoned_without_overwriting(self, mock_run_stage):
+        PipelineJob.objects.create(stages=["cleaning", "transformation"])
+
+        def stage_outlived_by_takeover(stage, base_url, batch_id):
+            # The job went stale mid-stage and another worker claimed it.
+            PipelineJob.objects.update(updatedAt=now() - timedelta(hours=2))
+            self.assertEqual(claim_job("worker-b").workerId, "worker-b")
+            return {"batch_id": None}
+        mock_run_stage.side_effect = stage_outlived_by_takeover
+
+        job = work_once("worker-a")
+
+        mock_run_stage.assert_called_once()
+        self.assertEqual((job.workerId, job.status, job.result, job.attempts), ("worker-b", PipelineJob.RUNNING, {}, 2))
+
+class PipelineJobHeartbeatTests(TransactionTestCase):
+    # The heartbeat thread writes through its own connection, so the job row must be committed.
+    @override_settings(PIPELINE_JOB_STALE_AFTER=1, PIPELINE_JOB_HEARTBEAT=0.1)
+    @patch('pipelineApp.jobs.run_stage')
+    def test_long_stage_is_not_reclaimed(self, mock_run_stage):
+        claims = []
+
+        def long_stage(stage, base_url, batch_id):
+            time.sleep(1.5)
+            claims.append(claim_job("worker-b"))
+            return {"cleaned_sources": []}
+        mock_run_stage.side_effect = long_stage
+        PipelineJob.objects.create(stages=["cleaning"])
+
+        job = work_once("worker-a")
+
+        self.assertEqual(claims, [None])
+        self.assertEqual(job.status, PipelineJob.SUCCEEDED)
+        self.assertEqual(PipelineJob.objects.get(pk=job.pk).attempts, 1)
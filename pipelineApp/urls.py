@@ -0,0 +1,10 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from pipelineApp.views import PipelineJobViewSet
+
+router = DefaultRouter(trailing_slash=False)
+router.register(r'pipeline/jobs', PipelineJobViewSet, basename='pipeline-jobs')
+
+pipelineApp_urlpatterns = [
+    path('', include(router.urls)),
+]
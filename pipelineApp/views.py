@@ -0,0 +1,79 @@
+from rest_framework import status, viewsets, serializers as drf_serializers
+from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiParameter
+from drf_spectacular.types import OpenApiTypes
+from configs.utils import success_response, error_response
+from pipelineApp.jobs import enqueue_job
+from pipelineApp.models import PipelineJob
+from pipelineApp.serializers import PipelineJobSerializer
+from configs.pagination import KeysetPagination, PageQueryError
+
+class BaseCustomResponseWrapperSerializer(drf_serializers.Serializer):
+    status = drf_serializers.CharField()
+    code = drf_serializers.IntegerField()
+    messages = drf_serializers.CharField()
+
+class PipelineJobResponseWrapperSerializer(BaseCustomResponseWrapperSerializer):
+    data = PipelineJobSerializer()
+    status = drf_serializers.CharField(default="success")
+
+class PipelineJobErrorResponseWrapperSerializer(BaseCustomResponseWrapperSerializer):
+    data = drf_serializers.JSONField(required=False, allow_null=True)
+    status = drf_serializers.CharField(default="error")
+
+def job_accepted_response(stages, request, message):
+    """Queue ``stages`` for ``run_worker`` and answer 202 with the job to poll."""
+    job = enqueue_job(stages, base_url=request.build_absolute_uri('/')[:-1])
+    return success_response(
+        data=PipelineJobSerializer(job).data,
+        message=message,
+        code=status.HTTP_202_ACCEPTED
+    )
+
+class CustomPipelineJobPagination(KeysetPagination):
+    ordering = '-createdAt'
+
+class PipelineJobViewSet(viewsets.ViewSet):
+    serializer_class = PipelineJobSerializer
+
+    @extend_schema(
+        summary="Retrieve pipeline jobs",
+        description="List queued, running and finished pipeline jobs, newest first, with pagination",
+        tags=["Pipeline Jobs"],
+        parameters=[
+            OpenApiParameter(name='status', type=OpenApiTypes.STR, description='Only jobs in this status.', enum=[choice for choice, _ in PipelineJob.STATUS_CHOICES]),
+            OpenApiParameter(name='cursor', type=OpenApiTypes.STR, description='Opaque cursor taken from the next/previous link.'),
+            OpenApiParameter(name='page_size', type=OpenApiTypes.INT, description='Number of items per page.', default=50),
+            OpenApiParameter(name='count', type=OpenApiTypes.BOOL, description='Set false to skip the total row count.', default=True),
+        ],
+        responses={200: OpenApiResponse(response=PipelineJobSerializer(many=True), description="Jobs fetched successfully.")}
+    )
+    def list(self, request):
+        queryset = PipelineJob.objects.all().order_by('-createdAt')
+        job_status = request.query_params.get('status')
+        if job_status:
+            queryset = queryset.filter(status=job_status)
+
+        paginator = CustomPipelineJobPagination()
+        try:
+            paginated_queryset = paginator.paginate_queryset(queryset, request)
+        except PageQueryError as e:
+            return error_response(message=str(e), data=[], code=status.HTTP_400_BAD_REQUEST)
+        serializer = PipelineJobSerializer(paginated_queryset, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @extend_schema(
+        summary="Pipeline job status",
+        description="Status, per-stage progress, timings and results of one pipeline job",
+        tags=["Pipeline Jobs"],
+        parameters=[OpenApiParameter(name='id', type=OpenApiTypes.UUID, location=OpenApiParameter.PATH, description='Job id returned by the POST endpoint.')],
+        responses={
+            200: OpenApiResponse(response=PipelineJobResponseWrapperSerializer, description="Job fetched successfully."),
+            404: OpenApiResponse(response=PipelineJobErrorResponseWrapperSerializer, description="Job not found."),
+        }
+    )
+    def retrieve(self, request, pk=None):
+        try:
+            job = PipelineJob.objects.get(pk=pk)
+        except (PipelineJob.DoesNotExist, ValueError, TypeError):
+            return error_response(message="Pipeline job not found.", code=status.HTTP_404_NOT_FOUND)
+        return success_response(data=PipelineJobSerializer(job).data, message=f"Pipeline job is {job.status}.")
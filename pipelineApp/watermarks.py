@@ -0,0 +1,36 @@
+"""Per-stage watermarks: the newest input timestamp a stage has processed.
+
+Input timestamps (``createdAt``/``updatedAt``) are taken before the writing
+transaction commits, so a row committed late by a concurrent run can carry a
+timestamp below a watermark that has already moved past it. Stages therefore
+read from ``read_from`` - the watermark minus ``PIPELINE_WATERMARK_OVERLAP``
+seconds - and rely on their content hashes to skip the rows of the overlap
+they have already processed.
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from pipelineApp.models import StageWatermark
+
+def get_watermark(stage):
+    return StageWatermark.objects.filter(stage=stage).values_list('value', flat=True).first()
+
+def read_from(stage):
+    """Lower bound of the stage's next read (exclusive), or None when it never ran."""
+    value = get_watermark(stage)
+    if value is None:
+        return None
+    return value - timedelta(seconds=getattr(settings, 'PIPELINE_WATERMARK_OVERLAP', 600))
+
+def advance_watermark(stage, value):
+    """Move the stage's watermark forward to ``value``; never moves it back."""
+    if value is None:
+        return
+    with transaction.atomic():
+        mark, created = StageWatermark.objects.select_for_update().get_or_create(stage=stage, defaults={'value': value})
+        if not created and value > mark.value:
+            mark.value = value
+            mark.save(update_fields=['value', 'updatedAt'])
+
+def reset_watermark(stage):
+    StageWatermark.objects.filter(stage=stage).delete()
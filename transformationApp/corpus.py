@@ -0,0 +1,145 @@
+"""Persisted TF-IDF corpus state: document count and per-feature document frequencies.
+
+In ``incremental`` mode (``TRANSFORMATION_TFIDF_MODE``) new documents are
+scored against the accumulated state instead of refitting on the whole
+corpus: ``add_documents`` reads the frequencies of the features the new
+documents contain, adds the new counts, writes them back and scores the new
+documents with the updated IDF. Cost is proportional to the new documents and
+their distinct features, not to corpus history. ``rebuild_corpus`` recomputes
+the state from scratch (see the ``refit_tfidf`` command).
+
+The corpus is one document per source, like the CleaningData table a refit
+reads. The features of each source's document are kept in TfidfDocument, so
+re-scoring a source replaces its old document instead of adding a second
+one, and the incremental state stays equal to a rebuild over the current
+documents.
+
+Each feature mode keeps its own corpus: ``default`` for the vocabulary and
+``hashing-<buckets>[-signed]`` for hashed features, whose state never holds
+more rows than there are buckets.
+"""
+from collections import Counter
+from itertools import islice, repeat
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from transformationApp.models import TfidfCorpus, TfidfDocument, TfidfTerm
+from transformationApp.tfidf import feature_count_matrix, feature_mode, hashing_settings, smooth_idf, weigh
+
+TERM_QUERY_CHUNK = 900
+
+def tfidf_mode():
+    return getattr(settings, 'TRANSFORMATION_TFIDF_MODE', 'incremental')
+
+def corpus_name(features=None):
+    if (features or feature_mode()) == 'hashing':
+        n_buckets, signed = hashing_settings()
+        return f"hashing-{n_buckets}" + ("-signed" if signed else "")
+    return "default"
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def _stored_frequencies(name, terms):
+    stored = {}
+    for chunk in _chunks(terms, TERM_QUERY_CHUNK):
+        stored.update(TfidfTerm.objects.filter(corpus=name, term__in=chunk).values_list('term', 'documentFrequency'))
+    return np.array([stored.get(term, 0) for term in terms], dtype=np.int64)
+
+def _write_frequencies(name, terms, frequencies):
+    TfidfTerm.objects.bulk_create(
+        [TfidfTerm(corpus=name, term=term, documentFrequency=int(frequency)) for term, frequency in zip(terms, frequencies)],
+        batch_size=getattr(settings, 'PIPELINE_UPSERT_BATCH_SIZE', 500),
+        update_conflicts=True,
+        unique_fields=['corpus', 'term'],
+        update_fields=['documentFrequency'],
+    )
+
+def _document_terms(counts, terms):
+    """The distinct feature keys of each row of ``counts``."""
+    return [
+        [terms[column] for column in counts.indices[counts.indptr[row]:counts.indptr[row + 1]].tolist()]
+        for row in range(counts.shape[0])
+    ]
+
+def _write_documents(name, sources, document_terms):
+    TfidfDocument.objects.bulk_create(
+        [
+            TfidfDocument(corpus=name, source=source, terms=row_terms)
+            for source, row_terms in zip(sources, document_terms) if source is not None
+        ],
+        batch_size=getattr(settings, 'PIPELINE_UPSERT_BATCH_SIZE', 500),
+        update_conflicts=True,
+        unique_fields=['corpus', 'source'],
+        update_fields=['terms'],
+    )
+
+def _stored_documents(name, sources):
+    stored = {}
+    for chunk in _chunks(sources, TERM_QUERY_CHUNK):
+        stored.update(TfidfDocument.objects.filter(corpus=name, source__in=chunk).values_list('source', 'terms'))
+    return stored
+
+def add_documents(documents, features=None, sources=None):
+    """Add ``documents`` to the corpus state and return their ``TfidfScores`` under it.
+
+    ``sources`` (distinct, aligned with ``documents``) names the source of each
+    document; a source already in the corpus has its previous document's
+    features taken out first and does not add to the document count. Without
+    ``sources`` every document is new. The corpus row is locked for the
+    update, so concurrent runs add their documents one after the other.
+    """
+    name = corpus_name(features)
+    sources = [None] * len(documents) if sources is None else list(sources)
+    counts, terms, labels = feature_count_matrix(documents, features)
+    with transaction.atomic():
+        corpus, _ = TfidfCorpus.objects.select_for_update().get_or_create(name=name)
+        replaced = _stored_documents(name, [source for source in sources if source is not None])
+        removed = Counter(term for row_terms in replaced.values() for term in row_terms)
+        # Features only the replaced documents had are updated too (usually down to 0).
+        new_terms = set(terms)
+        keys = terms + [term for term in removed if term not in new_terms]
+        frequencies = _stored_frequencies(name, keys)
+        frequencies[:len(terms)] += np.bincount(counts.indices, minlength=len(terms))
+        frequencies -= np.array([removed.get(term, 0) for term in keys], dtype=np.int64)
+        corpus.documentCount += len(documents) - len(replaced)
+        corpus.save(update_fields=['documentCount', 'updatedAt'])
+        present = frequencies > 0
+        _write_frequencies(name, [key for key, keep in zip(keys, present) if keep], frequencies[present])
+        gone = [key for key, keep in zip(keys, present) if not keep]
+        for chunk in _chunks(gone, TERM_QUERY_CHUNK):
+            TfidfTerm.objects.filter(corpus=name, term__in=chunk).delete()
+        _write_documents(name, sources, _document_terms(counts, terms))
+    return weigh(counts, smooth_idf(frequencies[:len(terms)], corpus.documentCount), labels)
+
+def rebuild_corpus(documents, features=None, chunk_size=None, sources=None):
+    """Replace the corpus state with the frequencies of ``documents``.
+
+    Returns ``(document_count, feature_count)``.
+    ``documents`` may be any iterable, with ``sources`` an iterable aligned
+    with it (see ``add_documents``); they are consumed ``chunk_size``
+    documents at a time (``partial_fit`` style), so only the frequency table is
+    held in memory: one entry per token, or at most one per bucket when hashing.
+    """
+    name = corpus_name(features)
+    chunk_size = chunk_size or getattr(settings, 'PIPELINE_CHUNK_SIZE', 500)
+    frequencies = Counter()
+    document_count = 0
+    pairs = zip(repeat(None) if sources is None else sources, documents)
+    with transaction.atomic():
+        corpus, _ = TfidfCorpus.objects.select_for_update().get_or_create(name=name)
+        TfidfTerm.objects.filter(corpus=name).delete()
+        TfidfDocument.objects.filter(corpus=name).delete()
+        while chunk := list(islice(pairs, chunk_size)):
+            chunk_sources = [source for source, _ in chunk]
+            counts, terms, _ = feature_count_matrix([document for _, document in chunk], features)
+            frequencies.update(dict(zip(terms, np.bincount(counts.indices, minlength=len(terms)).tolist())))
+            _write_documents(name, chunk_sources, _document_terms(counts, terms))
+            document_count += len(chunk)
+        _write_frequencies(name, list(frequencies), list(frequencies.values()))
+        corpus.documentCount = document_count
+        corpus.save(update_fields=['documentCount', 'updatedAt'])
+    return document_count, len(frequencies)
@@ -0,0 +1,67 @@
+"""Latest TransformationData row per source, kept in ``tb_transformation_latest``.
+
+``run_transformation`` needs the previous hash and frequency of every source
+it scores. Instead of picking the newest row per source out of the whole
+history (``DISTINCT ON``, PostgreSQL only, slower with every run), it reads
+one pointer row per source by its unique ``source`` index and upserts the
+pointers of the rows it appends in the same transaction. ``rebuild_latest``
+recomputes the pointers from the history with a portable correlated
+subquery over the ``(source, -createdAt)`` index.
+"""
+from django.conf import settings
+from django.db.models import OuterRef, Subquery
+
+from transformationApp.models import TransformationData, TransformationLatest
+
+SOURCE_QUERY_CHUNK = 900
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def latest_rows(sources):
+    """``{source: TransformationLatest}`` for the given sources that have been scored before."""
+    latest = {}
+    for chunk in _chunks(list(sources), SOURCE_QUERY_CHUNK):
+        latest.update(
+            (row.source, row)
+            for row in TransformationLatest.objects.filter(source__in=chunk).only('source', 'sourceHash', 'frequency')
+        )
+    return latest
+
+def record_latest(rows, latest_model=TransformationLatest):
+    """Point each row's source at it; ``rows`` must be at most one TransformationData per source."""
+    latest_model.objects.bulk_create(
+        [
+            latest_model(
+                source=row.source,
+                transformation_id=row.pk,
+                sourceHash=row.sourceHash,
+                frequency=row.frequency,
+                createdAt=row.createdAt,
+            )
+            for row in rows
+        ],
+        batch_size=getattr(settings, 'PIPELINE_UPSERT_BATCH_SIZE', 500),
+        update_conflicts=True,
+        unique_fields=['source'],
+        update_fields=['transformation', 'sourceHash', 'frequency', 'createdAt'],
+    )
+
+def rebuild_latest(data_model=TransformationData, latest_model=TransformationLatest):
+    """Recompute every pointer from the history; returns the number of sources.
+
+    The model arguments let migrations pass their historical models.
+    """
+    newest = data_model.objects.filter(source=OuterRef('source')).order_by('-createdAt', '-pk').values('pk')[:1]
+    latest_ids = list(
+        data_model.objects.order_by().values('source').distinct()
+        .annotate(latest_id=Subquery(newest)).values_list('latest_id', flat=True)
+    )
+    latest_model.objects.all().delete()
+    for chunk in _chunks(latest_ids, SOURCE_QUERY_CHUNK):
+        record_latest(
+            data_model.objects.filter(pk__in=chunk).only('pk', 'source', 'sourceHash', 'frequency', 'createdAt'),
+            latest_model,
+        )
+    return len(latest_ids)
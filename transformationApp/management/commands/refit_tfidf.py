@@ -0,0 +1,32 @@
+import json
+from itertools import tee
+from django.core.management.base import BaseCommand, CommandError
+from cleaningApp.models import CleaningData
+from configs.utils import StageError
+from transformationApp.corpus import corpus_name, rebuild_corpus
+from transformationApp.pipeline import extract_text_from_json_content, run_transformation, text_keys
+
+class Command(BaseCommand):
+    help = "Rebuild the persisted TF-IDF corpus state from the current cleaned documents."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rescore", action="store_true",
+            help="Also append a fully refitted TransformationData row for every source."
+        )
+
+    def handle(self, *args, **options):
+        keys = text_keys()
+        # One pass over the table feeds both the sources and their documents.
+        for_sources, for_documents = tee(CleaningData.objects.values_list('source', 'content').iterator())
+        documents = (" ".join(extract_text_from_json_content(content, keys)) for _, content in for_documents)
+        document_count, term_count = rebuild_corpus(documents, sources=(source for source, _ in for_sources))
+        summary = {"corpus": corpus_name(), "document_count": document_count, "term_count": term_count}
+        if options["rescore"]:
+            try:
+                result = run_transformation(force=True, mode="refit")
+            except StageError as e:
+                raise CommandError(e.message)
+            summary["transformed_count"] = len(result["transformed"])
+            summary["batch_id"] = str(result["batch_id"])
+        self.stdout.write(json.dumps(summary, indent=2))
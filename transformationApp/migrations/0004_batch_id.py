@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transformationApp', '0003_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transformationdata',
+            name='batchId',
+            field=models.UUIDField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transformationApp', '0004_batch_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TfidfCorpus',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64, unique=True)),
+                ('documentCount', models.BigIntegerField(default=0)),
+                ('updatedAt', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'tb_tfidf_corpus',
+            },
+        ),
+        migrations.CreateModel(
+            name='TfidfTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.TextField(unique=True)),
+                ('documentFrequency', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'tb_tfidf_term',
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transformationApp', '0005_tfidf_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tfidfterm',
+            name='corpus',
+            field=models.CharField(default='default', max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='tfidfterm',
+            name='term',
+            field=models.TextField(),
+        ),
+        migrations.AddConstraint(
+            model_name='tfidfterm',
+            constraint=models.UniqueConstraint(fields=('corpus', 'term'), name='tb_tfidf_term_corpus_term_uniq'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.1 on 2026-10-17 07:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_latest(apps, schema_editor):
+    from transformationApp.latest import rebuild_latest
+
+    rebuild_latest(apps.get_model('transformationApp', 'TransformationData'), apps.get_model('transformationApp', 'TransformationLatest'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transformationApp', '0006_tfidf_term_corpus'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransformationLatest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.URLField(unique=True)),
+                ('sourceHash', models.CharField(blank=True, default='', max_length=64)),
+                ('frequency', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('createdAt', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'tb_transformation_latest',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='transformationdata',
+            index=models.Index(fields=['source', '-createdAt'], name='tb_trans_source_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='transformationlatest',
+            name='transformation',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='transformationApp.transformationdata'),
+        ),
+        migrations.RunPython(backfill_latest, migrations.RunPython.noop),
+    ]
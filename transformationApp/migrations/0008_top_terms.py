@@ -0,0 +1,31 @@
+# Generated by Django 5.2.1 on 2026-10-17 07:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transformationApp', '0007_latest_per_source'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransformationTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.URLField()),
+                ('batchId', models.UUIDField(blank=True, null=True)),
+                ('term', models.TextField()),
+                ('weight', models.FloatField()),
+                ('count', models.IntegerField()),
+                ('createdAt', models.DateTimeField()),
+                ('transformation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='transformationApp.transformationdata')),
+            ],
+            options={
+                'db_table': 'tb_transformation_term',
+                'indexes': [models.Index(fields=['term', '-createdAt'], name='tb_trans_term_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.1 on 2026-10-17 07:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transformationApp', '0008_top_terms'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TfidfDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('corpus', models.CharField(max_length=64)),
+                ('source', models.URLField()),
+                ('terms', models.JSONField(default=list)),
+            ],
+            options={
+                'db_table': 'tb_tfidf_document',
+                'constraints': [models.UniqueConstraint(fields=('corpus', 'source'), name='tb_tfidf_document_source_uniq')],
+            },
+        ),
+    ]
@@ -7,6 +7,9 @@ class TransformationData(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     content = models.JSONField()
     source = models.URLField(db_index=True)
+    # Hash of the cleaned content this row was scored from.
+    sourceHash = models.CharField(max_length=64, blank=True, default='')
+    batchId = models.UUIDField(null=True, blank=True, db_index=True)
     frequency = models.DecimalField(
         max_digits=10, decimal_places=2, null=True, blank=True, default=Decimal('0.00')
     )
@@ -17,4 +20,62 @@ class TransformationData(models.Model):
     updatedAt = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
-        db_table = "tb_transformation_data"
\ No newline at end of file
+        db_table = "tb_transformation_data"
+        indexes = [models.Index(fields=['source', '-createdAt'], name='tb_trans_source_created_idx')]
+
+class TransformationTerm(models.Model):
+    """One of the top-k TF-IDF terms of a TransformationData row (``TRANSFORMATION_TOP_TERMS``)."""
+    transformation = models.ForeignKey(TransformationData, on_delete=models.CASCADE, related_name='terms')
+    source = models.URLField()
+    batchId = models.UUIDField(null=True, blank=True)
+    term = models.TextField()
+    # L2-normalized TF-IDF weight of the term in its document, and its number of occurrences there.
+    weight = models.FloatField()
+    count = models.IntegerField()
+    createdAt = models.DateTimeField()
+
+    class Meta:
+        db_table = "tb_transformation_term"
+        indexes = [models.Index(fields=['term', '-createdAt'], name='tb_trans_term_created_idx')]
+
+class TransformationLatest(models.Model):
+    """Newest TransformationData row of each source, upserted with every run that appends rows."""
+    source = models.URLField(unique=True)
+    transformation = models.OneToOneField(TransformationData, on_delete=models.CASCADE, related_name='+')
+    sourceHash = models.CharField(max_length=64, blank=True, default='')
+    frequency = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    createdAt = models.DateTimeField()
+
+    class Meta:
+        db_table = "tb_transformation_latest"
+
+class TfidfCorpus(models.Model):
+    """Document count of the persisted TF-IDF corpus state (one row per corpus name)."""
+    name = models.CharField(max_length=64, unique=True)
+    documentCount = models.BigIntegerField(default=0)
+    updatedAt = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "tb_tfidf_corpus"
+
+
+class TfidfTerm(models.Model):
+    """Number of documents of ``corpus`` containing ``term`` (a token, or ``#<bucket>`` when hashing)."""
+    corpus = models.CharField(max_length=64, default="default")
+    term = models.TextField()
+    documentFrequency = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = "tb_tfidf_term"
+        constraints = [models.UniqueConstraint(fields=['corpus', 'term'], name='tb_tfidf_term_corpus_term_uniq')]
+
+
+class TfidfDocument(models.Model):
+    """Features ``source`` currently contributes to ``corpus``; replaced, not added to, when the source is re-scored."""
+    corpus = models.CharField(max_length=64)
+    source = models.URLField()
+    terms = models.JSONField(default=list)
+
+    class Meta:
+        db_table = "tb_tfidf_document"
+        constraints = [models.UniqueConstraint(fields=['corpus', 'source'], name='tb_tfidf_document_source_uniq')]
@@ -0,0 +1,157 @@
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils.timezone import now
+from rest_framework import status
+from cleaningApp.models import CleaningData
+from configs.batches import latest_batch_id, new_batch_id
+from configs.hashing import content_hash
+from configs.jsontext import extract_strings, iter_strings
+from configs.utils import StageError
+from pipelineApp.watermarks import advance_watermark, read_from
+from transformationApp.corpus import add_documents, tfidf_mode
+from transformationApp.latest import latest_rows, record_latest
+from transformationApp.models import TransformationData, TransformationTerm
+from transformationApp.scores import cents_to_decimals, percentage_change_cents, to_cents
+from transformationApp.tfidf import EngineUnavailable, TfidfScores, tfidf_engine, tfidf_scores
+
+WATERMARK_STAGE = "transformation"
+
+def text_keys():
+    return getattr(settings, 'TRANSFORMATION_TEXT_KEYS', None)
+
+def top_terms_count():
+    return getattr(settings, 'TRANSFORMATION_TOP_TERMS', 10)
+
+def extract_text_from_json_content(data_content, keys=None):
+    return list(iter_strings(data_content, keys))
+
+def run_transformation(force=False, batch_id=None, since=None, until=None, mode=None):
+    """Score cleaned documents with TF-IDF and append one TransformationData row per scored source.
+
+    Reads CleaningData directly instead of crawling ``/cleaning/collect``.
+    The run is skipped when no CleaningData row was updated after ``since``
+    (default: the stage watermark minus ``PIPELINE_WATERMARK_OVERLAP``) or
+    when every cleaned document hashes the same as the newest
+    TransformationData row of its source (unless ``force``). ``until`` caps the cleaned rows taken into the corpus.
+
+    ``mode`` (default: ``TRANSFORMATION_TFIDF_MODE``) picks how IDF weights
+    are obtained. In ``incremental`` mode only documents updated after ``since``
+    whose hash changed are scored, against the persisted corpus state of
+    ``transformationApp.corpus``, which they are added to; other sources keep
+    their last row. In ``refit`` mode every run refits on the current
+    CleaningData table (one row per source) and appends a row for every
+    source, with scores from ``transformationApp.tfidf`` (scikit-learn when
+    installed). New rows are stamped with ``batch_id``, by default the batch
+    of the newest cleaned row, and their ``TRANSFORMATION_TOP_TERMS``
+    heaviest terms are stored as TransformationTerm rows. Returns a dict with the ``batch_id``, the
+    ``transformed`` rows created by this run and the ``unchanged`` sources
+    that were not scored; raises StageError(501) when the configured TF-IDF
+    engine is not installed.
+    """
+    try:
+        tfidf_engine()
+    except EngineUnavailable as e:
+        raise StageError(str(e), code=status.HTTP_501_NOT_IMPLEMENTED)
+
+    batch_id = batch_id or latest_batch_id(CleaningData, '-updatedAt') or new_batch_id()
+    cleaning_qs = CleaningData.objects.all()
+    if until is not None:
+        cleaning_qs = cleaning_qs.filter(updatedAt__lte=until)
+
+    if since is None and not force:
+        since = read_from(WATERMARK_STAGE)
+    if since is not None and not force and not cleaning_qs.filter(updatedAt__gt=since).exists():
+        return {"batch_id": batch_id, "transformed": [], "unchanged": list(cleaning_qs.values_list('source', flat=True))}
+    incremental = (mode or tfidf_mode()) == 'incremental'
+    if incremental and since is not None and not force:
+        cleaning_qs = cleaning_qs.filter(updatedAt__gt=since)
+
+    cleaning_rows = list(cleaning_qs.order_by('-updatedAt').values_list('source', 'content', 'updatedAt'))
+    if not cleaning_rows:
+        return {"batch_id": batch_id, "transformed": [], "unchanged": []}
+    newest_cleaned_at = cleaning_rows[0][2]
+
+    source_urls = [source_url for source_url, _, _ in cleaning_rows]
+    source_hashes = [content_hash(content_json) for _, content_json, _ in cleaning_rows]
+
+    # Newest row of each source: its hash decides what changed, its frequency the percentage change.
+    existing_records = latest_rows(source_urls)
+
+    changed = [
+        force or source not in existing_records or existing_records[source].sourceHash != source_hash
+        for source, source_hash in zip(source_urls, source_hashes)
+    ]
+    if not any(changed):
+        advance_watermark(WATERMARK_STAGE, newest_cleaned_at)
+        return {"batch_id": batch_id, "transformed": [], "unchanged": source_urls}
+
+    unchanged_sources = []
+    if incremental:
+        # Only new or changed documents are scored; the others keep their last row.
+        unchanged_sources = [source for source, is_changed in zip(source_urls, changed) if not is_changed]
+        cleaning_rows = [row for row, is_changed in zip(cleaning_rows, changed) if is_changed]
+        source_urls = [row[0] for row in cleaning_rows]
+        source_hashes = [source_hash for source_hash, is_changed in zip(source_hashes, changed) if is_changed]
+
+    original_contents = [content_json for _, content_json, _ in cleaning_rows]
+    corpus_texts_for_tfidf = [" ".join(texts) for texts in extract_strings(original_contents, keys=text_keys())]
+
+    # The corpus state and the rows scored against it are committed together.
+    with transaction.atomic():
+        if incremental:
+            scores = add_documents(corpus_texts_for_tfidf, sources=source_urls)
+        elif any(corpus_texts_for_tfidf):
+            scores = tfidf_scores(corpus_texts_for_tfidf)
+        else:
+            scores = TfidfScores.empty(len(cleaning_rows))
+        frequency_cents = to_cents(scores.row_sums())
+
+        # Previous frequency of each source, aligned with the scored rows.
+        previous_frequencies = [
+            existing_records[source].frequency if source in existing_records else None for source in source_urls
+        ]
+        has_previous = np.array([frequency is not None for frequency in previous_frequencies], dtype=bool)
+        previous_cents = np.array(
+            [int(frequency * 100) if frequency is not None else 0 for frequency in previous_frequencies], dtype=np.int64
+        )
+        percentage_cents = percentage_change_cents(frequency_cents, previous_cents, has_previous)
+
+        current_time = now()
+        transformation_objects_to_create = [
+            TransformationData(
+                content=content_json,
+                source=source_url,
+                sourceHash=source_hash,
+                batchId=batch_id,
+                frequency=frequency,
+                percentage=percentage,
+                createdAt=current_time,
+                updatedAt=current_time
+            )
+            for content_json, source_url, source_hash, frequency, percentage in zip(
+                original_contents, source_urls, source_hashes,
+                cents_to_decimals(frequency_cents), cents_to_decimals(percentage_cents),
+            )
+        ]
+
+        transformed = TransformationData.objects.bulk_create(transformation_objects_to_create)
+        record_latest(transformed)
+        TransformationTerm.objects.bulk_create(
+            [
+                TransformationTerm(
+                    transformation=transformed[row],
+                    source=transformed[row].source,
+                    batchId=batch_id,
+                    term=term,
+                    weight=weight,
+                    count=count,
+                    createdAt=current_time,
+                )
+                for row, term, weight, count in scores.top_terms(top_terms_count())
+            ],
+            batch_size=getattr(settings, 'PIPELINE_UPSERT_BATCH_SIZE', 500),
+        )
+        advance_watermark(WATERMARK_STAGE, newest_cleaned_at)
+
+    return {"batch_id": batch_id, "transformed": transformed, "unchanged": unchanged_sources}
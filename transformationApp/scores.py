@@ -0,0 +1,54 @@
+"""Vectorized ``frequency`` / ``percentage`` columns of TransformationData rows.
+
+Both columns are worked out as int64 cents for the whole run at once:
+``to_cents`` rounds the TF-IDF row sums and ``percentage_change_cents`` the
+change against each source's previous frequency. Rounding is ROUND_HALF_UP,
+matching ``Decimal(str(value)).quantize(Decimal("0.01"), ROUND_HALF_UP)``
+exactly, so stored values are unchanged; ``Decimal`` objects are only built
+by ``cents_to_decimals`` at the ORM boundary.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+
+CENT = Decimal("0.01")
+# Row sums this close (in ulps of value * 100) to a half cent are settled through their decimal repr.
+TIE_ULPS = 8
+
+def to_cents(values):
+    """Round float ``values`` half-up to int64 cents, as ``Decimal(str(value))`` would be."""
+    values = np.asarray(values, dtype=np.float64)
+    scaled = np.abs(values) * 100.0
+    cents = np.floor(scaled + 0.5)
+    # The decimal repr of a value can sit exactly on a half cent while its binary value falls on
+    # either side of it; those few are rounded from the repr itself.
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) <= TIE_ULPS * np.spacing(scaled)
+    for i in np.flatnonzero(near_tie):
+        cents[i] = abs(Decimal(str(values[i])).quantize(CENT, rounding=ROUND_HALF_UP)) * 100
+    return np.copysign(cents, values).astype(np.int64)
+
+def percentage_change_cents(current, previous, has_previous):
+    """Half-up cents of ``(current - previous) / previous * 100`` for int64 cents arrays.
+
+    Rows without a previous frequency change by 0; a previous frequency of 0
+    gives 100.00 when the current one is positive and 0 otherwise. The
+    division is done on integers, so it is exact.
+    """
+    current = np.asarray(current, dtype=np.int64)
+    previous = np.asarray(previous, dtype=np.int64)
+    divisor = np.where(previous != 0, previous, 1)
+    numerator = (current - previous) * 10000
+    magnitude = (2 * np.abs(numerator) + np.abs(divisor)) // (2 * np.abs(divisor))
+    change = np.sign(numerator) * np.sign(divisor) * magnitude
+    from_zero = np.where(current > 0, 10000, 0)
+    return np.where(has_previous, np.where(previous != 0, change, from_zero), 0)
+
+def cents_to_decimals(cents):
+    """``Decimal`` values with two places (``Decimal("1.23")`` for 123) for the ORM.
+
+    Scores repeat a lot (row sums stay within a few units), so one Decimal is
+    built per distinct value and shared.
+    """
+    distinct, positions = np.unique(np.asarray(cents, dtype=np.int64), return_inverse=True)
+    table = [Decimal(value).scaleb(-2) for value in distinct.tolist()]
+    return [table[position] for position in positions.tolist()]
@@ -1,7 +1,12 @@
 from rest_framework import serializers
-from transformationApp.models import TransformationData
+from transformationApp.models import TransformationData, TransformationTerm
 
 class TransformationDataSerializer(serializers.ModelSerializer):
     class Meta:
         model = TransformationData
-        fields = ['id', 'content', 'source', 'frequency', 'percentage', 'createdAt', 'updatedAt']
\ No newline at end of file
+        fields = ['id', 'content', 'source', 'batchId', 'frequency', 'percentage', 'createdAt', 'updatedAt']
+
+class TransformationTermSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TransformationTerm
+        fields = ['term', 'weight', 'count', 'transformation', 'source', 'batchId', 'createdAt']
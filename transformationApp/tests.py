@@ -0,0 +1,226 @@
+import math
+import random
+from decimal import ROUND_HALF_UP, Decimal
+from io import StringIO
+from collections import Counter
+from unittest import skipUnless
+from django.core.management import call_command
+from django.urls import reverse
+from cleaningApp.models import CleaningData
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils.timezone import now
+from transformationApp.corpus import add_documents, rebuild_corpus
+from transformationApp.latest import rebuild_latest
+from transformationApp.models import TfidfCorpus, TfidfTerm, TransformationData, TransformationLatest, TransformationTerm
+from transformationApp.pipeline import run_transformation
+from visualizationApp.pipeline import run_visualization
+from transformationApp.scores import cents_to_decimals, percentage_change_cents, to_cents
+from transformationApp.tfidf import (
+    SKLEARN_AVAILABLE, EngineUnavailable, hashed_count_matrix, native_row_sums, native_scores, sklearn_row_sums,
+    tfidf_row_sums, tokenize,
+)
+
+CORPUS = [
+    "Fed holds rates; markets rally as the Fed signals cuts",
+    "Oil prices fall. OIL demand weakens in Q3",
+    "a b c",
+    "",
+    "Crypto rally: BTC and ETH rally on ETF news, ETF inflows",
+]
+
+
+def reference_row_sums(documents):
+    """TfidfVectorizer() defaults spelled out term by term."""
+    tokenized = [Counter(tokenize(document)) for document in documents]
+    document_frequency = Counter(term for counts in tokenized for term in counts)
+    n = len(documents)
+    sums = []
+    for counts in tokenized:
+        weights = [count * (math.log((1 + n) / (1 + document_frequency[term])) + 1) for term, count in counts.items()]
+        norm = math.sqrt(sum(weight * weight for weight in weights))
+        sums.append(sum(weights) / norm if norm else 0.0)
+    return sums
+
+
+class NativeTfidfTests(SimpleTestCase):
+    def test_row_sums_match_reference_formula(self):
+        for expected, actual in zip(reference_row_sums(CORPUS), native_row_sums(CORPUS)):
+            self.assertAlmostEqual(expected, actual, places=12)
+
+    def test_corpus_without_tokens_scores_zero(self):
+        self.assertEqual(list(native_row_sums(["", "a b"])), [0.0, 0.0])
+
+    @skipUnless(SKLEARN_AVAILABLE, "scikit-learn is not installed")
+    def test_row_sums_match_sklearn(self):
+        for expected, actual in zip(sklearn_row_sums(CORPUS), native_row_sums(CORPUS)):
+            self.assertAlmostEqual(expected, actual, places=12)
+
+    @override_settings(TRANSFORMATION_TFIDF_ENGINE="sklearn")
+    @skipUnless(not SKLEARN_AVAILABLE, "scikit-learn is installed")
+    def test_pinned_sklearn_engine_without_sklearn_is_unavailable(self):
+        with self.assertRaises(EngineUnavailable):
+            tfidf_row_sums(CORPUS)
+
+    @override_settings(TRANSFORMATION_HASHING_BUCKETS=2 ** 18, TRANSFORMATION_HASHING_SIGNED=True)
+    def test_hashing_without_collisions_matches_vocabulary_scores(self):
+        self.assertEqual(len(set(hashed_count_matrix(CORPUS, 2 ** 18).indices)), len(set(tokenize(" ".join(CORPUS)))))
+        for expected, actual in zip(native_row_sums(CORPUS), native_row_sums(CORPUS, features="hashing")):
+            self.assertAlmostEqual(expected, actual, places=12)
+
+    def test_hashed_columns_are_bounded_by_bucket_count(self):
+        counts = hashed_count_matrix(["fed fed oil rally", "fed"], 1, signed=True)
+        self.assertEqual(counts.shape, (2, 1))
+        self.assertTrue((counts.data > 0).all())
+
+    def test_top_terms_are_the_heaviest_of_each_row(self):
+        scores = native_scores(CORPUS)
+        top = scores.top_terms(2)
+
+        self.assertEqual([row for row, *_ in top], [0, 0, 1, 1, 4, 4])
+        self.assertEqual(top[0][1::2], ("fed", 2))
+        self.assertEqual(top[2][1::2], ("oil", 2))
+        self.assertGreaterEqual(top[0][2], top[1][2])
+        row_sums = scores.row_sums()
+        self.assertAlmostEqual(sum(weight for row, _, weight, _ in native_scores(CORPUS).top_terms(100) if row == 4), row_sums[4])
+        self.assertEqual(native_scores(["", "a"]).top_terms(5), [])
+
+
+class ScoreColumnTests(SimpleTestCase):
+    def test_cents_match_decimal_quantize(self):
+        rng = random.Random(3)
+        values = [1.005, 2.675, 0.125, -1.005, 0.0, 3.0000000000000004, 1e-9]
+        values += [rng.uniform(-50, 50) for _ in range(20000)] + [rng.randrange(-5000, 5000) / 1000 for _ in range(20000)]
+        expected = [Decimal(str(value)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP) for value in values]
+        self.assertEqual(cents_to_decimals(to_cents(values)), expected)
+
+    def test_percentage_change_matches_decimal_formula(self):
+        rng = random.Random(5)
+        current = [rng.randrange(0, 400) for _ in range(5000)]
+        previous = [rng.randrange(0, 400) for _ in range(5000)]
+        has_previous = [rng.random() < 0.9 for _ in range(5000)]
+
+        def reference(cur, prev, has_prev):
+            cur, prev = Decimal(cur).scaleb(-2), Decimal(prev).scaleb(-2)
+            if not has_prev:
+                return Decimal("0.00")
+            if prev != 0:
+                return ((cur - prev) / prev * Decimal("100.0")).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+            return Decimal("100.00") if cur > 0 else Decimal("0.00")
+
+        expected = [reference(*row) for row in zip(current, previous, has_previous)]
+        self.assertEqual(cents_to_decimals(percentage_change_cents(current, previous, has_previous)), expected)
+
+
+class CorpusStateTests(TestCase):
+    def test_new_documents_score_as_if_fitted_on_the_whole_history(self):
+        add_documents(CORPUS[:2])
+        latest = add_documents(CORPUS[2:]).row_sums()
+
+        expected = reference_row_sums(CORPUS)[2:]
+        for want, got in zip(expected, latest):
+            self.assertAlmostEqual(want, got, places=12)
+        self.assertEqual(TfidfCorpus.objects.get().documentCount, len(CORPUS))
+        self.assertEqual(TfidfTerm.objects.get(term="rally").documentFrequency, 2)
+
+    @override_settings(TRANSFORMATION_TFIDF_FEATURES="hashing", TRANSFORMATION_HASHING_BUCKETS=8)
+    def test_hashing_state_is_bounded_by_bucket_count(self):
+        add_documents(CORPUS)
+        add_documents([f"token{i} other{i}" for i in range(100)])
+        self.assertLessEqual(TfidfTerm.objects.filter(corpus="hashing-8-signed").count(), 8)
+        self.assertFalse(TfidfTerm.objects.filter(corpus="default").exists())
+
+    def test_rebuild_replaces_accumulated_state(self):
+        add_documents(CORPUS)
+        self.assertEqual(rebuild_corpus(iter(["oil oil fed"])), (1, 2))
+        self.assertEqual(TfidfCorpus.objects.get().documentCount, 1)
+        self.assertEqual(dict(TfidfTerm.objects.values_list("term", "documentFrequency")), {"oil": 1, "fed": 1})
+
+    def test_rescored_source_replaces_its_document(self):
+        add_documents(["oil prices fall", "fed holds rates"], sources=["http://testserver/a", "http://testserver/b"])
+        latest = add_documents(["fed cuts rates"], sources=["http://testserver/a"]).row_sums()
+        incremental = (TfidfCorpus.objects.get().documentCount, dict(TfidfTerm.objects.values_list("term", "documentFrequency")))
+
+        rebuild_corpus(["fed cuts rates", "fed holds rates"], sources=["http://testserver/a", "http://testserver/b"])
+        rebuilt = (TfidfCorpus.objects.get().documentCount, dict(TfidfTerm.objects.values_list("term", "documentFrequency")))
+
+        self.assertEqual(incremental, rebuilt)
+        self.assertEqual(rebuilt, (2, {"fed": 2, "cuts": 1, "rates": 2, "holds": 1}))
+        self.assertAlmostEqual(latest[0], reference_row_sums(["fed cuts rates", "fed holds rates"])[0], places=12)
+
+    def test_refit_command_rebuilds_from_cleaned_documents(self):
+        CleaningData.objects.create(source="http://testserver/a", content=[{"title": "Oil prices fall"}])
+        call_command("refit_tfidf", stdout=StringIO())
+        self.assertEqual(set(TfidfTerm.objects.values_list("term", flat=True)), {"oil", "prices", "fall"})
+
+
+class LatestPerSourceTests(TestCase):
+    def clean(self, source, title):
+        CleaningData.objects.update_or_create(source=source, defaults={"content": [{"title": title}], "updatedAt": now()})
+
+    def test_runs_compare_against_the_latest_row_of_each_source(self):
+        self.clean("http://testserver/a", "Oil prices fall")
+        self.clean("http://testserver/b", "Fed holds rates")
+        first = run_transformation(force=True, mode="refit")
+        self.assertEqual(len(first["transformed"]), 2)
+
+        self.clean("http://testserver/a", "Oil")
+        second = run_transformation(mode="incremental")
+
+        self.assertEqual([row.source for row in second["transformed"]], ["http://testserver/a"])
+        self.assertEqual(TransformationData.objects.filter(source="http://testserver/b").count(), 1)
+        latest = TransformationLatest.objects.get(source="http://testserver/a")
+        self.assertEqual(latest.transformation_id, second["transformed"][0].pk)
+        self.assertEqual(latest.frequency, second["transformed"][0].frequency)
+        self.assertNotEqual(second["transformed"][0].percentage, 0)
+        self.assertEqual(TransformationLatest.objects.count(), 2)
+
+    def test_incremental_corpus_matches_a_refit_after_a_source_changes(self):
+        self.clean("http://testserver/a", "Oil prices fall")
+        self.clean("http://testserver/b", "Fed holds rates")
+        run_transformation(mode="incremental")
+        self.clean("http://testserver/a", "Fed cuts rates")
+        run_transformation(mode="incremental")
+        incremental = (TfidfCorpus.objects.get().documentCount, dict(TfidfTerm.objects.values_list("term", "documentFrequency")))
+
+        call_command("refit_tfidf", stdout=StringIO())
+
+        self.assertEqual(incremental, (TfidfCorpus.objects.get().documentCount, dict(TfidfTerm.objects.values_list("term", "documentFrequency"))))
+        self.assertEqual(incremental[0], 2)
+
+    def test_rebuild_points_at_newest_rows(self):
+        self.clean("http://testserver/a", "Oil prices fall")
+        run_transformation(force=True, mode="refit")
+        newest = run_transformation(force=True, mode="refit")["transformed"][0]
+        TransformationLatest.objects.all().delete()
+
+        self.assertEqual(rebuild_latest(), 1)
+        self.assertEqual(TransformationLatest.objects.get().transformation_id, newest.pk)
+        self.assertEqual(TransformationData.objects.count(), 2)
+
+
+class TopTermTests(TestCase):
+    def setUp(self):
+        CleaningData.objects.create(source="http://testserver/a", content=[{"title": "Oil prices fall, oil demand"}])
+        CleaningData.objects.create(source="http://testserver/b", content=[{"title": "Fed holds rates"}])
+
+    @override_settings(TRANSFORMATION_TOP_TERMS=2)
+    def test_transformation_stores_top_terms_for_lookup(self):
+        transformed = run_transformation(force=True, mode="refit")["transformed"]
+
+        self.assertEqual(TransformationTerm.objects.count(), 4)
+        url = reverse('transformationApp:transformation-terms-documents', kwargs={"term": "OIL"})
+        response = self.client.get(url)
+        self.assertEqual([row["source"] for row in response.data["results"]], ["http://testserver/a"])
+        self.assertEqual(response.data["results"][0]["count"], 2)
+        oil_row = next(row for row in transformed if row.source == "http://testserver/a")
+        self.assertEqual(str(response.data["results"][0]["transformation"]), str(oil_row.pk))
+        self.assertEqual(self.client.get(url, {"batch": "nope"}).status_code, 400)
+
+    @override_settings(VISUALIZATION_PHRASE_SOURCE="terms")
+    def test_visualization_counts_stored_terms(self):
+        run_transformation(force=True, mode="refit")
+        analysis = run_visualization(force=True)["analysis"]
+
+        counts = {row["phrase"]: row["global_count"] for row in analysis.all_phrases_analysis}
+        self.assertEqual(counts["oil"], 2)
+        self.assertEqual(counts["fed"], 1)
@@ -0,0 +1,222 @@
+"""TF-IDF document scores on numpy and scipy.sparse.
+
+``tfidf_row_sums(documents)`` returns, per document, the sum of its
+L2-normalized TF-IDF row. It matches ``TfidfVectorizer()`` with default
+settings: lowercasing, ``(?u)\\b\\w\\w+\\b`` tokens, smooth IDF
+``ln((1 + n) / (1 + df)) + 1`` and ``l2`` norm. Tokens are mapped to ids in
+one pass, counts are built as a single CSR matrix and the IDF weighting,
+norms and sums are whole-array operations. No per-document vectors or
+feature-name arrays are kept, so the peak is one CSR matrix of the corpus.
+
+``tfidf_scores(documents)`` keeps the normalized rows themselves as a
+``TfidfScores``, so the stage can also store each document's top-k terms
+(``TfidfScores.top_terms``) from the same matrix.
+
+When scikit-learn is installed and ``TRANSFORMATION_TFIDF_ENGINE`` is
+``"auto"`` (the default) or ``"sklearn"``, its vectorizer is used instead.
+
+With ``TRANSFORMATION_TFIDF_FEATURES = "hashing"`` tokens are not given
+columns of a learned vocabulary but hashed into a fixed number of buckets
+(the hashing trick), so memory is bounded by the bucket count however many
+distinct tokens the news feeds bring; see ``benchmarks/tfidf_hashing.py``.
+"""
+import re
+import zlib
+
+import numpy as np
+from django.conf import settings
+from scipy import sparse
+
+try:
+    from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer
+    SKLEARN_AVAILABLE = True
+except ImportError:
+    CountVectorizer = TfidfTransformer = None
+    SKLEARN_AVAILABLE = False
+
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+
+class EngineUnavailable(RuntimeError):
+    """The configured TF-IDF engine cannot run in this environment."""
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+def count_matrix(documents, vocabulary=None):
+    """CSR term-count matrix of ``documents``; ``vocabulary`` (token -> column) grows as needed."""
+    vocabulary = {} if vocabulary is None else vocabulary
+    column_of = vocabulary.setdefault
+    indices = []
+    indptr = [0]
+    for document in documents:
+        indices.extend(column_of(token, len(vocabulary)) for token in tokenize(document))
+        indptr.append(len(indices))
+    indices = np.asarray(indices, dtype=np.int64)
+    counts = sparse.csr_matrix(
+        (np.ones(len(indices), dtype=np.float64), indices, np.asarray(indptr, dtype=np.int64)),
+        shape=(len(documents), len(vocabulary)),
+    )
+    counts.sum_duplicates()
+    return counts, vocabulary
+
+def bucket_of(token, n_buckets, signed):
+    """Stable ``(bucket, sign)`` of a token: CRC-32 of its UTF-8 bytes, top bit as the sign."""
+    digest = zlib.crc32(token.encode())
+    return digest % n_buckets, (-1.0 if signed and digest & 0x80000000 else 1.0)
+
+def hashed_count_matrix(documents, n_buckets, signed=True, tokens=None):
+    """CSR count matrix with one column per hash bucket, whatever the vocabulary size.
+
+    With ``signed`` hashing each token adds +1 or -1 to its bucket, so
+    colliding tokens tend to cancel instead of piling up; the absolute bucket
+    value is the term count the scores use. ``tokens``, when given, is filled
+    with the first token seen in each bucket.
+    """
+    # Bucket and sign packed in one int per token (bucket * 2 + negative) to keep a single list.
+    codes = {}
+    packed = []
+    indptr = [0]
+    for document in documents:
+        for token in tokenize(document):
+            code = codes.get(token)
+            if code is None:
+                bucket, sign = bucket_of(token, n_buckets, signed)
+                code = codes[token] = bucket * 2 + (sign < 0)
+                if tokens is not None:
+                    tokens.setdefault(bucket, token)
+            packed.append(code)
+        indptr.append(len(packed))
+    packed = np.asarray(packed, dtype=np.int64)
+    counts = sparse.csr_matrix(
+        (1.0 - 2.0 * (packed & 1), packed >> 1, np.asarray(indptr, dtype=np.int64)),
+        shape=(len(documents), n_buckets),
+    )
+    counts.sum_duplicates()
+    np.abs(counts.data, out=counts.data)
+    counts.eliminate_zeros()
+    return counts
+
+def feature_mode():
+    return getattr(settings, 'TRANSFORMATION_TFIDF_FEATURES', 'vocabulary')
+
+def hashing_settings():
+    return (
+        getattr(settings, 'TRANSFORMATION_HASHING_BUCKETS', 2 ** 20),
+        getattr(settings, 'TRANSFORMATION_HASHING_SIGNED', True),
+    )
+
+def feature_count_matrix(documents, features=None):
+    """Counts over the configured features, the key of each column and a readable label for it.
+
+    ``features`` is ``"vocabulary"`` (a column per token) or ``"hashing"``
+    (``TRANSFORMATION_HASHING_BUCKETS`` buckets); hashed columns are
+    compacted to the buckets the documents touch, keyed ``"#<bucket>"`` and
+    labelled with the first token that landed in the bucket.
+    """
+    features = features or feature_mode()
+    if features == 'vocabulary':
+        counts, vocabulary = count_matrix(documents)
+        keys = list(vocabulary)
+        return counts, keys, keys
+    if features != 'hashing':
+        raise ValueError(f"Unknown TF-IDF feature mode: {features!r}")
+    tokens = {}
+    counts = hashed_count_matrix(documents, *hashing_settings(), tokens=tokens)
+    touched, columns = np.unique(counts.indices, return_inverse=True)
+    counts = sparse.csr_matrix((counts.data, columns, counts.indptr), shape=(len(documents), len(touched)))
+    touched = touched.tolist()
+    return counts, [f"#{bucket}" for bucket in touched], [tokens[bucket] for bucket in touched]
+
+def smooth_idf(document_frequency, document_count):
+    return np.log((1.0 + document_count) / (1.0 + document_frequency)) + 1.0
+
+class TfidfScores:
+    """L2-normalized TF-IDF rows of a batch of documents.
+
+    ``weights`` is a CSR matrix, ``counts`` the raw term counts aligned with
+    ``weights.data`` and ``labels`` the term of each column.
+    """
+
+    def __init__(self, weights, counts, labels):
+        self.weights = weights
+        self.counts = counts
+        self.labels = labels
+
+    @classmethod
+    def empty(cls, document_count):
+        return cls(sparse.csr_matrix((document_count, 0)), np.zeros(0), [])
+
+    def row_sums(self):
+        return np.asarray(self.weights.sum(axis=1)).ravel()
+
+    def top_terms(self, k):
+        """``(row, term, weight, count)`` of the ``k`` heaviest terms of every row, heaviest first.
+
+        One sort over all non-zeros (by row, then weight), no per-row loop.
+        """
+        weights = self.weights
+        if k <= 0 or not weights.nnz:
+            return []
+        rows = np.repeat(np.arange(weights.shape[0]), np.diff(weights.indptr))
+        order = np.lexsort((weights.indices, -weights.data, rows))
+        keep = order[np.arange(len(order)) - weights.indptr[rows[order]] < k]
+        labels = self.labels
+        return [
+            (row, labels[column], weight, count)
+            for row, column, weight, count in zip(
+                rows[keep].tolist(), weights.indices[keep].tolist(),
+                weights.data[keep].tolist(), self.counts[keep].tolist(),
+            )
+        ]
+
+def weigh(counts, idf, labels):
+    """``TfidfScores`` of a count matrix under ``idf``; ``counts`` is reweighted in place."""
+    raw_counts = counts.data.copy()
+    counts.data *= idf[counts.indices]
+    norms = np.sqrt(np.asarray(counts.multiply(counts).sum(axis=1)).ravel())
+    inverse = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+    counts.data *= np.repeat(inverse, np.diff(counts.indptr))
+    return TfidfScores(counts, raw_counts, labels)
+
+def native_scores(documents, features=None):
+    counts, keys, labels = feature_count_matrix(documents, features)
+    if not keys:
+        return TfidfScores.empty(len(documents))
+    document_frequency = np.bincount(counts.indices, minlength=len(keys))
+    return weigh(counts, smooth_idf(document_frequency, len(documents)), labels)
+
+def native_row_sums(documents, features=None):
+    return native_scores(documents, features).row_sums()
+
+def sklearn_scores(documents):
+    vectorizer = CountVectorizer()
+    try:
+        counts = vectorizer.fit_transform(documents).astype(np.float64)
+    except ValueError:
+        # Empty vocabulary: every document is blank or has only 1-character tokens.
+        return TfidfScores.empty(len(documents))
+    counts.sort_indices()
+    weights = TfidfTransformer().fit_transform(counts)
+    weights.sort_indices()
+    return TfidfScores(weights, counts.data, vectorizer.get_feature_names_out().tolist())
+
+def sklearn_row_sums(documents):
+    return sklearn_scores(documents).row_sums()
+
+def tfidf_engine():
+    engine = getattr(settings, 'TRANSFORMATION_TFIDF_ENGINE', 'auto')
+    if engine == 'sklearn' and not SKLEARN_AVAILABLE:
+        raise EngineUnavailable("TRANSFORMATION_TFIDF_ENGINE is 'sklearn' but scikit-learn is not installed.")
+    if engine == 'native' or not SKLEARN_AVAILABLE:
+        return 'native'
+    return 'sklearn'
+
+def tfidf_scores(documents):
+    """``TfidfScores`` of ``documents``, fitted on ``documents``."""
+    if tfidf_engine() == 'sklearn' and feature_mode() == 'vocabulary':
+        return sklearn_scores(documents)
+    return native_scores(documents)
+
+def tfidf_row_sums(documents):
+    """Sum of each document's L2-normalized TF-IDF vector, fitted on ``documents``."""
+    return tfidf_scores(documents).row_sums()
@@ -1,8 +1,9 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from transformationApp.views import DataTransformationViewSet
+from transformationApp.views import DataTransformationViewSet, TransformationTermViewSet
 
 router = DefaultRouter(trailing_slash=False)
+router.register(r'transformation/terms', TransformationTermViewSet, basename='transformation-terms')
 router.register(r'transformation', DataTransformationViewSet, basename='transformation')
 
 transformationApp_urlpatterns = [
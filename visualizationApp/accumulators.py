@@ -0,0 +1,85 @@
+"""Mergeable accumulators for the visualization analysis.
+
+``run_visualization`` streams transformation rows in chunks and folds each
+chunk into these before dropping it, so memory is bounded by the chunk size
+plus the number of distinct values, phrases and sources, never by the number
+of rows. Two accumulators built over different chunks ``merge`` into the one
+built over both.
+"""
+import math
+from collections import Counter, defaultdict
+from decimal import Decimal
+from fractions import Fraction
+
+EMPTY_STATS = {"mean": None, "median": None, "std_dev": None, "variance": None, "count": 0, "min": None, "max": None, "sum": None}
+
+class ValueStats:
+    """Histogram of numeric values behind the ``calculate_descriptive_stats`` summary.
+
+    Frequencies and percentages have two decimal places, so the histogram
+    stays small. Moments are computed exactly from it (``Fraction``) and
+    rounded once, like ``calculate_descriptive_stats`` rounds numpy's results.
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+
+    def add(self, value):
+        if value is not None and isinstance(value, (int, float, Decimal)):
+            self.counts[value] += 1
+
+    def merge(self, other):
+        self.counts.update(other.counts)
+        return self
+
+    def _median(self, values, count):
+        middle = [(count - 1) // 2, count // 2]
+        seen = 0
+        picked = []
+        for value in values:
+            seen += self.counts[value]
+            while middle and middle[0] < seen:
+                picked.append(value)
+                middle.pop(0)
+        return (Fraction(picked[0]) + Fraction(picked[1])) / 2
+
+    def summary(self):
+        count = sum(self.counts.values())
+        if not count:
+            return dict(EMPTY_STATS)
+        values = sorted(self.counts)
+        total = sum(Fraction(value) * occurrences for value, occurrences in self.counts.items())
+        mean = total / count
+        variance = sum((Fraction(value) - mean) ** 2 * occurrences for value, occurrences in self.counts.items()) / count
+        return {
+            "mean": round(float(mean), 4),
+            "median": round(float(self._median(values, count)), 4),
+            "std_dev": round(math.sqrt(variance), 4),
+            "variance": round(float(variance), 4),
+            "count": count,
+            "min": round(float(values[0]), 4),
+            "max": round(float(values[-1]), 4),
+            "sum": round(float(total), 4),
+        }
+
+class PhraseCounts:
+    """Phrase counts overall and per source, with each source's phrase total."""
+
+    def __init__(self):
+        self.overall = Counter()
+        self.per_source = defaultdict(Counter)
+        self.source_totals = Counter()
+
+    def add(self, source, phrases):
+        """Fold one row's ``phrases`` (a Counter) in; rows without a source only count overall."""
+        self.overall.update(phrases)
+        if source:
+            self.per_source[source].update(phrases)
+            self.source_totals[source] += sum(phrases.values())
+
+    def merge(self, other):
+        self.overall.update(other.overall)
+        for source, phrases in other.per_source.items():
+            self.per_source[source].update(phrases)
+        self.source_totals.update(other.source_totals)
+        return self
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.1 on 2026-10-17 06:25
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('visualizationApp', '0002_alter_visualizationdata_all_phrases_analysis_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='visualizationdata',
+            name='all_phrases_analysis',
+            field=models.JSONField(blank=True, default=list, encoder=django.core.serializers.json.DjangoJSONEncoder),
+        ),
+        migrations.AlterField(
+            model_name='visualizationdata',
+            name='probabilistic_insights',
+            field=models.JSONField(blank=True, default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True),
+        ),
+    ]
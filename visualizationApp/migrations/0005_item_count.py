@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-17 07:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('visualizationApp', '0004_batch_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='visualizationdata',
+            name='itemCount',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -1,4 +1,5 @@
 import uuid
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.utils.timezone import now
 from decimal import Decimal
@@ -6,13 +7,16 @@ from decimal import Decimal
 class VisualizationData(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     analyzed_endpoint = models.CharField(max_length=255, db_index=True)
+    batchId = models.UUIDField(null=True, blank=True, db_index=True)
     input_transformed_data = models.JSONField(default=list, blank=True)
-    all_phrases_analysis = models.JSONField(default=list, blank=True)
+    all_phrases_analysis = models.JSONField(default=list, blank=True, encoder=DjangoJSONEncoder)
     global_frequency_stats = models.JSONField(default=dict, blank=True)
     global_percentage_stats = models.JSONField(default=dict, blank=True)
     per_source_stats = models.JSONField(default=dict, blank=True)
-    probabilistic_insights = models.JSONField(default=dict, null=True, blank=True)
+    probabilistic_insights = models.JSONField(default=dict, null=True, blank=True, encoder=DjangoJSONEncoder)
     inferential_stats_summary = models.JSONField(default=dict, null=True, blank=True)
+    # TransformationData rows the analysis was built from.
+    itemCount = models.PositiveIntegerField(default=0)
     createdAt = models.DateTimeField(auto_now_add=True, db_index=True)
     updatedAt = models.DateTimeField(auto_now=True, db_index=True)
 
@@ -0,0 +1,388 @@
+from decimal import Decimal
+from collections import Counter, defaultdict
+from itertools import islice
+import numpy as np
+from scipy import stats as scipy_stats
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from configs.endpoint import SERVICES_VISUALIZATION_PATH
+from configs.jsontext import extract_strings, iter_strings
+from configs.utils import StageError
+from pipelineApp.watermarks import advance_watermark, get_watermark, read_from
+from transformationApp.models import TransformationData, TransformationTerm
+from visualizationApp.accumulators import PhraseCounts, ValueStats
+from visualizationApp.models import VisualizationData
+
+NUM_PREVIOUS_RUNS_FOR_TREND = 5 # Constant for clarity
+WATERMARK_STAGE = "visualization"
+TERM_QUERY_CHUNK = 900
+
+def phrase_keys():
+    return getattr(settings, 'VISUALIZATION_PHRASE_KEYS', None)
+
+def phrase_source():
+    return getattr(settings, 'VISUALIZATION_PHRASE_SOURCE', 'content')
+
+def stored_term_counts(transformation_ids):
+    """Per transformation row, a Counter of its stored top TF-IDF terms and their occurrences."""
+    counters = {transformation_id: Counter() for transformation_id in transformation_ids}
+    for chunk_start in range(0, len(transformation_ids), TERM_QUERY_CHUNK):
+        chunk = transformation_ids[chunk_start:chunk_start + TERM_QUERY_CHUNK]
+        terms = TransformationTerm.objects.filter(transformation_id__in=chunk).order_by('transformation_id', '-weight')
+        for transformation_id, term, count in terms.values_list('transformation_id', 'term', 'count'):
+            counters[transformation_id][term] = count
+    return [counters[transformation_id] for transformation_id in transformation_ids]
+
+def extract_all_strings_from_json(data_content, keys=None):
+    return list(iter_strings(data_content, keys))
+
+def calculate_descriptive_stats(data_list):
+    if not data_list:
+        return {"mean": None, "median": None, "std_dev": None, "variance": None, "count": 0, "min": None, "max": None, "sum": None}
+
+    # Ensure data is numeric and convert to float for numpy
+    valid_data = [float(x) for x in data_list if x is not None and isinstance(x, (int, float, Decimal))]
+    if not valid_data:
+        return {"mean": None, "median": None, "std_dev": None, "variance": None, "count": 0, "min": None, "max": None, "sum": None}
+
+    arr = np.array(valid_data, dtype=float)
+    
+    # Handle cases where std is 0 (e.g., all values are same)
+    std_dev = np.std(arr)
+    variance = np.var(arr)
+
+    return {
+        "mean": round(np.mean(arr), 4),
+        "median": round(np.median(arr), 4),
+        "std_dev": round(std_dev, 4),
+        "variance": round(variance, 4),
+        "count": len(valid_data),
+        "min": round(np.min(arr), 4),
+        "max": round(np.max(arr), 4),
+        "sum": round(np.sum(arr), 4),
+    }
+
+def get_interpretation(p_value, alpha=0.05, test_type="general"):
+    if p_value is None:
+        return "Test not performed or not applicable."
+    if p_value < alpha:
+        return f"Significant result (p < {alpha}): Indicates a statistically significant {test_type}."
+    else:
+        return f"Not significant (p >= {alpha}): No statistically significant {test_type} detected."
+
+def unanalyzed_batch(window_qs, batch_qs):
+    """Newest batch with rows in ``window_qs`` whose latest analysis did not cover all of its rows in ``batch_qs``.
+
+    Rows re-read from the watermark overlap belong to batches that were
+    analyzed already; a batch only comes up again when a row committed late
+    changed its row count.
+    """
+    batches = (
+        window_qs.order_by().exclude(batchId=None).values('batchId')
+        .annotate(newest=Max('createdAt')).order_by('-newest').values_list('batchId', flat=True)
+    )
+    for candidate in batches:
+        analyzed = (
+            VisualizationData.objects.filter(batchId=candidate).order_by('-createdAt')
+            .values_list('itemCount', flat=True).first()
+        )
+        if analyzed != batch_qs.filter(batchId=candidate).count():
+            return candidate
+    return None
+
+def run_visualization(base_url="", batch_id=None, force=False, since=None, until=None, chunk_size=None):
+    """Analyze one batch of transformation rows and persist one VisualizationData record.
+
+    Reads TransformationData directly instead of crawling ``/transformation/collect``;
+    ``base_url`` only prefixes the stored ``analyzed_endpoint``. Without ``batch_id``
+    the newest batch among rows created after ``since`` and up to ``until`` is
+    analyzed; all rows when only pre-batch rows exist. By default ``since`` is
+    the stage watermark minus ``PIPELINE_WATERMARK_OVERLAP``: the newest batch
+    in that window whose rows are not all covered by its last analysis (see
+    ``unanalyzed_batch``) is analyzed whole. When there is nothing new (an
+    explicit ``batch_id`` without rows, or no unanalyzed rows past the
+    watermark) no record is written; ``force`` ignores the watermark.
+    Rows are streamed ``chunk_size`` at a time (default ``PIPELINE_CHUNK_SIZE``)
+    and folded into the accumulators of ``visualizationApp.accumulators``, so
+    memory does not grow with the number of rows analyzed. Returns a dict with
+    the ``batch_id``, the created ``analysis`` (or None) and the ``item_count``
+    it was built from.
+    """
+    source_data_url = f"{base_url}{SERVICES_VISUALIZATION_PATH}"
+    skip_when_empty = batch_id is not None
+
+    try:
+        transformed_qs = TransformationData.objects.order_by('-createdAt')
+        if batch_id is None:
+            watermark = None
+            if since is None and not force:
+                watermark = get_watermark(WATERMARK_STAGE)
+                since = read_from(WATERMARK_STAGE)
+            if until is not None:
+                transformed_qs = transformed_qs.filter(createdAt__lte=until)
+            in_window = transformed_qs.filter(createdAt__gt=since) if since is not None else transformed_qs
+            skip_when_empty = since is not None
+            if watermark is None:
+                batch_id = in_window.values_list('batchId', flat=True).first()
+                transformed_qs = in_window
+            else:
+                # A batch is analyzed whole, including rows committed after its last analysis.
+                batch_id = unanalyzed_batch(in_window, transformed_qs)
+                if not batch_id:
+                    # Pre-batch rows are only analyzed past the watermark itself.
+                    transformed_qs = in_window.filter(batchId=None, createdAt__gt=watermark)
+        if batch_id:
+            transformed_qs = transformed_qs.filter(batchId=batch_id)
+        # With stored terms the (large) content payloads are not read at all.
+        use_terms = phrase_source() == 'terms'
+        item_fields = ['id', 'source', 'frequency', 'percentage', 'createdAt']
+        if not use_terms:
+            item_fields.append('content')
+        chunk_size = chunk_size or getattr(settings, 'PIPELINE_CHUNK_SIZE', 500)
+        rows = transformed_qs.values(*item_fields).iterator(chunk_size=chunk_size)
+
+        # --- Data Extraction and Initial Processing ---
+        # Each chunk is folded into the accumulators and dropped before the next one is read.
+        phrase_counts = PhraseCounts()
+        global_frequency_values, global_percentage_values = ValueStats(), ValueStats()
+        per_source_frequency_values = defaultdict(ValueStats)
+        per_source_percentage_values = defaultdict(ValueStats)
+        item_count = 0
+        newest_created_at = None
+
+        while chunk := list(islice(rows, chunk_size)):
+            if use_terms:
+                phrase_counters = stored_term_counts([item['id'] for item in chunk])
+            else:
+                phrase_counters = [
+                    Counter(phrases) for phrases in extract_strings((item.get('content') for item in chunk), keys=phrase_keys())
+                ]
+            for item, phrases in zip(chunk, phrase_counters):
+                source_url = item.get('source')
+                item_freq, item_perc = item.get('frequency'), item.get('percentage')
+
+                if item_freq is not None:
+                    try:
+                        val = Decimal(str(item_freq))
+                        global_frequency_values.add(val)
+                        if source_url: per_source_frequency_values[source_url].add(val)
+                    except (TypeError, ValueError): pass # Silently skip invalid frequency values
+                if item_perc is not None:
+                    try:
+                        val = Decimal(str(item_perc))
+                        global_percentage_values.add(val)
+                        if source_url: per_source_percentage_values[source_url].add(val)
+                    except (TypeError, ValueError): pass # Silently skip invalid percentage values
+
+                phrase_counts.add(source_url, phrases)
+            item_count += len(chunk)
+            chunk_newest = max(item['createdAt'] for item in chunk)
+            newest_created_at = chunk_newest if newest_created_at is None else max(newest_created_at, chunk_newest)
+
+        if not item_count and skip_when_empty:
+            return {"batch_id": batch_id, "analysis": None, "item_count": 0}
+
+        if not item_count:
+            with transaction.atomic():
+                analysis_obj = VisualizationData.objects.create(
+                    analyzed_endpoint=source_data_url,
+                    batchId=batch_id,
+                    input_transformed_data=[], # Store only what's necessary or summary
+                    itemCount=0,
+                    all_phrases_analysis=[],
+                    global_frequency_stats=calculate_descriptive_stats([]),
+                    global_percentage_stats=calculate_descriptive_stats([]),
+                    per_source_stats={},
+                    probabilistic_insights={"notes": "No source data to process for advanced probability."},
+                    inferential_stats_summary={"notes": "No source data for comparison or inferential tests."}
+                )
+            return {"batch_id": batch_id, "analysis": analysis_obj, "item_count": 0}
+
+        # --- Global Phrase Analysis ---
+        current_all_phrases_analysis_list = []
+        total_phrases_overall_count = sum(phrase_counts.overall.values())
+
+        for phrase, count in phrase_counts.overall.items():
+            s_details = []
+            for src, source_phrases in phrase_counts.per_source.items():
+                c_in_s = source_phrases.get(phrase, 0)
+                if c_in_s > 0:
+                    total_in_source = phrase_counts.source_totals[src]
+                    percentage_in_source = round((Decimal(c_in_s) / Decimal(total_in_source)) * Decimal(100), 2) if total_in_source > 0 else Decimal('0.00')
+                    s_details.append({"source_url": src, "count_in_source": c_in_s, "percentage_in_source": percentage_in_source})
+            global_probability_percent = round((Decimal(count) / Decimal(total_phrases_overall_count)) * Decimal(100), 2) if total_phrases_overall_count > 0 else Decimal('0.00')
+            current_all_phrases_analysis_list.append({
+                "phrase": phrase,
+                "global_count": count,
+                "global_probability_percent": global_probability_percent,
+                "source_details": sorted(s_details, key=lambda x: x['count_in_source'], reverse=True)
+            })
+        current_all_phrases_analysis_list_sorted = sorted(current_all_phrases_analysis_list, key=lambda x: x['global_count'], reverse=True)
+
+        # --- Descriptive Statistics Calculation ---
+        current_global_freq_stats = global_frequency_values.summary()
+        current_global_perc_stats = global_percentage_values.summary()
+        current_per_source_stats = {}
+        unique_sources = set(per_source_frequency_values.keys()).union(set(per_source_percentage_values.keys()))
+        for src in unique_sources:
+            current_per_source_stats[src] = {
+                "frequency_stats": per_source_frequency_values.get(src, ValueStats()).summary(),
+                "percentage_stats": per_source_percentage_values.get(src, ValueStats()).summary()
+            }
+
+    except Exception as e:
+        raise StageError(f"Error during initial data processing: {str(e)}") from e
+
+    # --- Inferential Statistics & Probabilistic Forecasting ---
+    inferential_summary = {"comparison_target": "No previous analysis found."}
+    probabilistic_forecast = {"notes": "Insufficient historical data for trend analysis or forecasting."}
+
+    # Fetch NUM_PREVIOUS_RUNS_FOR_TREND records efficiently
+    recent_analyses_qs = list(VisualizationData.objects.order_by('-createdAt').values(
+        'global_frequency_stats', 'all_phrases_analysis', 'createdAt'
+    )[:NUM_PREVIOUS_RUNS_FOR_TREND])
+
+    previous_analysis_raw = recent_analyses_qs[0] if recent_analyses_qs else None
+
+    if previous_analysis_raw:
+        inferential_summary["comparison_target"] = f"Previous analysis created At: {previous_analysis_raw['createdAt'].isoformat()}"
+
+        prev_freq_stats = previous_analysis_raw['global_frequency_stats']
+        # T-test for mean frequency
+        if current_global_freq_stats["count"] > 1 and prev_freq_stats.get("count", 0) > 1 and \
+           current_global_freq_stats.get("std_dev") is not None and prev_freq_stats.get("std_dev") is not None and \
+           current_global_freq_stats["std_dev"] >= 0 and prev_freq_stats["std_dev"] >= 0: # std_dev can be 0 for constant data
+            try:
+                t_stat_freq, p_val_freq = scipy_stats.ttest_ind_from_stats(
+                    mean1=current_global_freq_stats["mean"], std1=current_global_freq_stats["std_dev"], nobs1=current_global_freq_stats["count"],
+                    mean2=prev_freq_stats["mean"], std2=prev_freq_stats["std_dev"], nobs2=prev_freq_stats["count"]
+                )
+                inferential_summary["global_frequency_mean_ttest"] = {
+                    "statistic": round(t_stat_freq, 4),
+                    "p_value": round(p_val_freq, 4),
+                    "interpretation": get_interpretation(p_val_freq, test_type="difference in mean frequency")
+                }
+            except ValueError: # e.g., if nobs is too small, or std_dev prevents calculation
+                 inferential_summary["global_frequency_mean_ttest"] = {"notes": "Could not perform t-test. Data might be constant or insufficient observations."}
+        else:
+             inferential_summary["global_frequency_mean_ttest"] = {"notes": "Insufficient data (count <= 1 or std_dev is None) for t-test."}
+
+        # F-test for variance frequency
+        if current_global_freq_stats.get("variance") is not None and prev_freq_stats.get("variance") is not None and \
+           current_global_freq_stats["count"] > 1 and prev_freq_stats["count"] > 1: # Variances can be 0
+            try:
+                f_stat_var = current_global_freq_stats["variance"] / prev_freq_stats["variance"] if prev_freq_stats["variance"] > 0 else np.inf # Handle division by zero for F-stat
+                p_val_var = scipy_stats.f.sf(f_stat_var, current_global_freq_stats["count"] - 1, prev_freq_stats["count"] - 1)
+                inferential_summary["global_frequency_variance_ftest"] = {
+                    "statistic": round(f_stat_var, 4),
+                    "p_value": round(p_val_var, 4),
+                    "interpretation": get_interpretation(p_val_var, test_type="difference in frequency variance")
+                }
+            except (ValueError, ZeroDivisionError): # e.g., if dof is too small, or variance is zero for both
+                inferential_summary["global_frequency_variance_ftest"] = {"notes": "Could not perform F-test. Data might be constant or insufficient observations."}
+        else:
+            inferential_summary["global_frequency_variance_ftest"] = {"notes": "Insufficient data (count <= 1 or variance is None) for F-test."}
+
+        # Chi-square test for phrase distribution
+        current_top_phrases_dict = {p['phrase']: p['global_count'] for p in current_all_phrases_analysis_list_sorted[:20]}
+        prev_top_phrases_dict = {p['phrase']: p['global_count'] for p in previous_analysis_raw['all_phrases_analysis'][:20]}
+        common_phrases = sorted(list(set(current_top_phrases_dict.keys()).intersection(set(prev_top_phrases_dict.keys()))))
+
+        if len(common_phrases) >= 2: # At least 2 common phrases for chi-square
+            observed_counts_current = [current_top_phrases_dict.get(p, 0) for p in common_phrases]
+            observed_counts_previous = [prev_top_phrases_dict.get(p, 0) for p in common_phrases]
+
+            # Filter out columns where both observed counts are zero
+            filtered_current = []
+            filtered_previous = []
+            for cur, prev in zip(observed_counts_current, observed_counts_previous):
+                if cur > 0 or prev > 0:
+                    filtered_current.append(cur)
+                    filtered_previous.append(prev)
+
+            if len(filtered_current) >= 2: # Need at least 2 non-zero columns
+                contingency_table = [filtered_current, filtered_previous]
+                try:
+                    chi2_stat, p_val_chi2, dof, expected = scipy_stats.chi2_contingency(contingency_table)
+                    inferential_summary["phrase_distribution_chi2test"] = {
+                        "statistic": round(chi2_stat,4),
+                        "p_value": round(p_val_chi2,4),
+                        "dof": dof,
+                        "interpretation": get_interpretation(p_val_chi2, test_type="difference in phrase distributions (top common phrases)")
+                    }
+                except ValueError:
+                    inferential_summary["phrase_distribution_chi2test"] = {"notes": "Could not perform Chi-square test due to data structure (e.g., too few common phrases or zero counts after filtering)."}
+            else:
+                inferential_summary["phrase_distribution_chi2test"] = {"notes": "Not enough non-zero common top phrases for Chi-square test."}
+        else:
+            inferential_summary["phrase_distribution_chi2test"] = {"notes": "Not enough common top phrases between current and previous run for Chi-square test."}
+
+        # --- Probabilistic Forecasting (Trend Analysis) ---
+        # Re-fetch recent analyses to get means for the trend calculation, including the current one if applicable
+        all_means_for_trend = [
+            float(rec['global_frequency_stats'].get('mean', 0))
+            for rec in reversed(recent_analyses_qs) # Reversed to get chronological order
+            if rec['global_frequency_stats'].get('mean') is not None
+        ]
+        if current_global_freq_stats.get('mean') is not None:
+            all_means_for_trend.append(float(current_global_freq_stats['mean']))
+
+
+        if len(all_means_for_trend) >= 2:
+            indices = np.arange(len(all_means_for_trend))
+            # Filter out NaNs if any means are None (shouldn't happen with current calculate_descriptive_stats)
+            valid_indices = [i for i, val in enumerate(all_means_for_trend) if val is not None]
+            if len(valid_indices) >= 2:
+                filtered_means = [all_means_for_trend[i] for i in valid_indices]
+                filtered_indices = [indices[i] for i in valid_indices]
+
+                slope, intercept, r_value, p_value_regr, std_err = scipy_stats.linregress(filtered_indices, filtered_means)
+
+                direction = "stable"
+                if slope > 0.001: direction = "increasing" # Small threshold for significant change
+                elif slope < -0.001: direction = "decreasing"
+
+                next_index = len(all_means_for_trend) # The index for the next period
+                predicted_next_mean_freq = intercept + slope * next_index
+
+                probabilistic_forecast["mean_frequency_trend"] = {
+                    "slope": round(slope, 4),
+                    "intercept": round(intercept, 4),
+                    "r_squared": round(r_value**2, 4),
+                    "p_value_for_slope": round(p_value_regr, 4),
+                    "direction": direction,
+                    "next_period_prediction": round(predicted_next_mean_freq, 4),
+                    "interpretation": get_interpretation(p_value_regr, test_type="significance of trend")
+                }
+
+                changes = np.diff(np.array(all_means_for_trend))
+                if len(changes) > 0:
+                    probabilistic_forecast["prob_freq_increase_empiric_pct"] = round((Decimal(int(np.sum(changes > 0))) / Decimal(len(changes))) * Decimal(100), 2)
+                    probabilistic_forecast["prob_freq_decrease_empiric_pct"] = round((Decimal(int(np.sum(changes < 0))) / Decimal(len(changes))) * Decimal(100), 2)
+            else:
+                probabilistic_forecast["mean_frequency_trend"] = {"notes": "Not enough valid data points for trend analysis after filtering NaNs."}
+        else:
+            probabilistic_forecast["mean_frequency_trend"] = {"notes": "Not enough data points for trend analysis."}
+
+
+    try:
+        with transaction.atomic():
+            analysis_result_obj = VisualizationData.objects.create(
+                analyzed_endpoint=source_data_url,
+                batchId=batch_id,
+                itemCount=item_count,
+                # input_transformed_data=all_transformed_items, # Consider if really needed or if summary is enough
+                all_phrases_analysis=current_all_phrases_analysis_list_sorted,
+                global_frequency_stats=current_global_freq_stats,
+                global_percentage_stats=current_global_perc_stats,
+                per_source_stats=current_per_source_stats,
+                probabilistic_insights=probabilistic_forecast,
+                inferential_stats_summary=inferential_summary
+            )
+            advance_watermark(WATERMARK_STAGE, newest_created_at)
+
+    except Exception as e:
+        raise StageError(f"Error saving analysis results: {str(e)}") from e
+
+    return {"batch_id": batch_id, "analysis": analysis_result_obj, "item_count": item_count}
@@ -7,6 +7,7 @@ class VisualizationDataSerializer(serializers.ModelSerializer):
         fields = [
             'id',
             'analyzed_endpoint',
+            'batchId',
             'input_transformed_data',
             'all_phrases_analysis',
             'global_frequency_stats',
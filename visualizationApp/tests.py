@@ -0,0 +1,94 @@
+import random
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from django.test import SimpleTestCase, TestCase
+from transformationApp.models import TransformationData
+from visualizationApp.accumulators import PhraseCounts, ValueStats
+from visualizationApp.models import VisualizationData
+from visualizationApp.pipeline import calculate_descriptive_stats, run_visualization
+
+
+def value_stats(values):
+    stats = ValueStats()
+    for value in values:
+        stats.add(value)
+    return stats
+
+
+class AccumulatorTests(SimpleTestCase):
+    def test_value_stats_match_descriptive_stats(self):
+        rng = random.Random(7)
+        for size in (1, 2, 7, 100, 5001):
+            values = [Decimal(rng.randrange(-30000, 90000)).scaleb(-2) for _ in range(size)] + [None]
+            self.assertEqual(value_stats(values).summary(), calculate_descriptive_stats(values))
+        self.assertEqual(value_stats([]).summary(), calculate_descriptive_stats([]))
+
+    def test_merged_accumulators_equal_one_pass(self):
+        values = [Decimal("1.25"), Decimal("3.50"), Decimal("1.25"), Decimal("-2.00")]
+        merged = value_stats(values[:1]).merge(value_stats(values[1:]))
+        self.assertEqual(merged.summary(), value_stats(values).summary())
+
+        left, right, whole = PhraseCounts(), PhraseCounts(), PhraseCounts()
+        rows = [("a", {"oil": 2}), ("b", {"oil": 1, "fed": 1}), ("", {"fed": 3})]
+        for source, phrases in rows[:1]:
+            left.add(source, phrases)
+        for source, phrases in rows[1:]:
+            right.add(source, phrases)
+        for source, phrases in rows:
+            whole.add(source, phrases)
+        left.merge(right)
+        self.assertEqual((left.overall, left.per_source, left.source_totals), (whole.overall, whole.per_source, whole.source_totals))
+
+
+class StreamingAnalysisTests(TestCase):
+    def test_analysis_does_not_depend_on_chunk_size(self):
+        batch_id = uuid.uuid4()
+        rng = random.Random(3)
+        words = ["oil", "fed", "rates", "rally", "crypto"]
+        TransformationData.objects.bulk_create([
+            TransformationData(
+                content=[{"title": rng.choice(words), "tags": [rng.choice(words), rng.choice(words)]}],
+                source=f"http://testserver/{i % 3}",
+                batchId=batch_id,
+                frequency=Decimal(rng.randrange(0, 500)).scaleb(-2),
+                percentage=Decimal(rng.randrange(-900, 900)).scaleb(-2),
+            )
+            for i in range(25)
+        ])
+
+        fields = ["all_phrases_analysis", "global_frequency_stats", "global_percentage_stats", "per_source_stats"]
+        analyses = []
+        for size in (1, 4, 1000):
+            # Each run starts without earlier analyses, so only the chunking differs.
+            VisualizationData.objects.all().delete()
+            analyses.append(run_visualization(batch_id=batch_id, chunk_size=size))
+        self.assertEqual({result["item_count"] for result in analyses}, {25})
+        first = analyses[0]["analysis"]
+        for result in analyses[1:]:
+            for field in fields:
+                self.assertEqual(getattr(result["analysis"], field), getattr(first, field))
+        self.assertEqual(first.global_frequency_stats["count"], 25)
+        self.assertEqual(sum(row["global_count"] for row in first.all_phrases_analysis), 75)
+
+
+class WatermarkOverlapTests(TestCase):
+    def _row(self, batch_id, source, frequency):
+        return TransformationData.objects.create(
+            content=[{"title": "oil"}], source=source, batchId=batch_id, frequency=Decimal(frequency), percentage=Decimal("0.00"),
+        )
+
+    def test_overlap_reanalyzes_a_batch_only_when_rows_arrived_late(self):
+        batch_id = uuid.uuid4()
+        first = self._row(batch_id, "http://testserver/a", "1.00")
+        self.assertEqual(run_visualization()["item_count"], 1)
+
+        # Re-reading the overlap finds only rows the last analysis covered.
+        self.assertIsNone(run_visualization()["analysis"])
+
+        late = self._row(batch_id, "http://testserver/b", "2.00")
+        TransformationData.objects.filter(pk=late.pk).update(createdAt=first.createdAt - timedelta(seconds=1))
+        result = run_visualization()
+
+        self.assertEqual((result["batch_id"], result["item_count"]), (batch_id, 2))
+        self.assertEqual(VisualizationData.objects.filter(batchId=batch_id).count(), 2)